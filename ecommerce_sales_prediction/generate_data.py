@@ -1,218 +1,581 @@
 """
 E-Commerce Data Generator
 Generates realistic synthetic datasets for sales prediction system
+
+Two engines build the sales transactions:
+  loop   - one transaction per Python iteration (default; reproduces the
+           datasets shipped in data/ exactly)
+  numpy  - draws every column of a block of transactions as NumPy arrays and
+           looks prices up by product index; use it for large datasets, e.g.
+           python generate_data.py --engine numpy --transactions 100000000
+
+With the numpy engine, behavior sessions are generated in shards of customers,
+in parallel with --workers N; the output is the same for any N.
+
+Sales and behavior data are written chunk by chunk, as CSV (default) or with
+--format parquet as Parquet datasets partitioned by year/month.
 """
 
+import argparse
+import os
+import shutil
+from collections import deque
+from multiprocessing import Pool
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only --format parquet needs it
+    pa = pq = None
 
 # Configuration
 START_DATE = datetime(2023, 1, 1)
 END_DATE = datetime(2024, 12, 31)
+DAYS_DIFF = (END_DATE - START_DATE).days
 NUM_CUSTOMERS = 1000
 NUM_PRODUCTS = 200
 NUM_TRANSACTIONS = 15000
 
-print("Generating E-Commerce Datasets...")
-print("=" * 60)
-
-# 1. Generate Product Data
-print("\n1. Generating Product Data...")
-categories = ['Electronics', 'Clothing', 'Home & Garden', 'Books', 'Toys', 
+categories = ['Electronics', 'Clothing', 'Home & Garden', 'Books', 'Toys',
               'Sports', 'Beauty', 'Food & Beverages']
 brands = ['BrandA', 'BrandB', 'BrandC', 'BrandD', 'BrandE', 'Generic']
+cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix',
+          'Philadelphia', 'San Antonio', 'San Diego', 'Dallas', 'San Jose']
+segments = ['Premium', 'Regular', 'Budget']
 
-products = []
-for i in range(1, NUM_PRODUCTS + 1):
-    category = random.choice(categories)
-    brand = random.choice(brands)
-    base_price = round(random.uniform(10, 500), 2)
-    
-    products.append({
-        'product_id': f'P{i:04d}',
-        'product_name': f'{category} {brand} Item {i}',
-        'category': category,
-        'brand': brand,
-        'base_price': base_price,
-        'cost': round(base_price * random.uniform(0.4, 0.7), 2),
-        'stock_quantity': random.randint(0, 500),
-        'rating': round(random.uniform(2.5, 5.0), 1),
-        'num_reviews': random.randint(0, 1000),
-        'weight_kg': round(random.uniform(0.1, 10.0), 2),
-        'is_featured': random.choice([True, False]),
-        'discount_eligible': random.choice([True, False])
-    })
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'PayPal', 'Cash on Delivery']
+ORDER_STATUSES = ['Completed', 'Cancelled', 'Returned', 'Pending']
+STATUS_WEIGHTS = [0.85, 0.05, 0.05, 0.05]
+DISCOUNTS = [5, 10, 15, 20, 25]
+DEVICE_TYPES = ['Mobile', 'Desktop', 'Tablet']
+TRAFFIC_SOURCES = ['Organic', 'Paid Ads', 'Social Media', 'Direct', 'Email']
 
-df_products = pd.DataFrame(products)
-df_products.to_csv('data/product_data.csv', index=False)
-print(f"   ✓ Generated {len(df_products)} products")
+# Data quality rules, as rates so they scale with the number of transactions
+# (15,000 transactions: 2% missing per column, 50 duplicates, 20 outliers)
+MISSING_COLUMNS = ['shipping_cost', 'device_type', 'traffic_source']
+MISSING_RATE = 0.02
+DUPLICATE_RATE = 50 / 15000
+OUTLIER_RATE = 20 / 15000
 
-# 2. Generate Customer Data
-print("\n2. Generating Customer Data...")
-cities = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 
-          'Philadelphia', 'San Antonio', 'San Diego', 'Dallas', 'San Jose']
-segments = ['Premium', 'Regular', 'Budget']
+# The numpy engine generates this many transactions at a time. Block i draws
+# from its own stream, the i-th child of the seed's sales sequence, so the
+# output depends only on the seed and the transaction count (not the chunk size).
+BLOCK_ROWS = 100_000
+SALES_STREAM = 0
 
-customers = []
-for i in range(1, NUM_CUSTOMERS + 1):
-    registration_date = START_DATE + timedelta(days=random.randint(0, 400))
-    
-    customers.append({
-        'customer_id': f'C{i:05d}',
-        'age': random.randint(18, 75),
-        'gender': random.choice(['M', 'F', 'Other']),
-        'city': random.choice(cities),
-        'registration_date': registration_date.strftime('%Y-%m-%d'),
-        'customer_segment': random.choice(segments),
-        'is_premium_member': random.choice([True, False]),
-        'email_subscribed': random.choice([True, False]),
-        'preferred_category': random.choice(categories),
-        'total_orders': 0,  # Will be updated from sales data
-        'lifetime_value': 0.0  # Will be updated from sales data
-    })
+# The numpy engine's behavior data is generated per shard of this many
+# customers, shard i from the i-th child of the seed's behavior sequence.
+# Shards are fixed by the customer table alone, not by the number of workers.
+SHARD_CUSTOMERS = 10_000
+BEHAVIOR_STREAM = 1
 
-df_customers = pd.DataFrame(customers)
-df_customers.to_csv('data/customer_data.csv', index=False)
-print(f"   ✓ Generated {len(df_customers)} customers")
-
-# 3. Generate Sales/Transaction Data
-print("\n3. Generating Sales Transaction Data...")
-transactions = []
-transaction_id = 1
-
-for _ in range(NUM_TRANSACTIONS):
-    # Random date between start and end
-    days_diff = (END_DATE - START_DATE).days
-    transaction_date = START_DATE + timedelta(days=random.randint(0, days_diff))
-    
-    # Add seasonality and day-of-week patterns
-    month = transaction_date.month
-    day_of_week = transaction_date.weekday()
-    
-    # Higher sales in Nov-Dec (holiday season)
-    seasonal_factor = 1.5 if month in [11, 12] else 1.0
-    # Higher sales on weekends
-    weekend_factor = 1.2 if day_of_week >= 5 else 1.0
-    
-    # Random customer and product
-    customer_id = random.choice(df_customers['customer_id'].values)
-    product_id = random.choice(df_products['product_id'].values)
-    
-    # Get product details
-    product = df_products[df_products['product_id'] == product_id].iloc[0]
-    base_price = product['base_price']
-    
-    # Quantity (more items during holidays)
-    max_qty = int(3 * seasonal_factor)
-    quantity = random.randint(1, max_qty)
-    
-    # Price with discount
-    discount_pct = 0
-    if random.random() < 0.3:  # 30% chance of discount
-        discount_pct = random.choice([5, 10, 15, 20, 25])
-    
-    unit_price = base_price * (1 - discount_pct/100)
-    total_amount = round(unit_price * quantity, 2)
-    
-    # Shipping and tax
-    shipping_cost = round(random.uniform(0, 15), 2) if total_amount < 50 else 0
-    tax = round(total_amount * 0.08, 2)
-    
-    # Payment method
-    payment_method = random.choice(['Credit Card', 'Debit Card', 'PayPal', 'Cash on Delivery'])
-    
-    # Order status
-    status = random.choices(
-        ['Completed', 'Cancelled', 'Returned', 'Pending'],
-        weights=[0.85, 0.05, 0.05, 0.05]
-    )[0]
-    
-    # Add transaction
-    transactions.append({
-        'transaction_id': f'T{transaction_id:06d}',
-        'customer_id': customer_id,
-        'product_id': product_id,
-        'transaction_date': transaction_date.strftime('%Y-%m-%d'),
-        'transaction_time': f'{random.randint(0, 23):02d}:{random.randint(0, 59):02d}:00',
-        'quantity': quantity,
-        'unit_price': round(unit_price, 2),
-        'discount_percent': discount_pct,
-        'total_amount': total_amount,
-        'shipping_cost': shipping_cost,
-        'tax': tax,
-        'grand_total': round(total_amount + shipping_cost + tax, 2),
-        'payment_method': payment_method,
-        'order_status': status,
-        'device_type': random.choice(['Mobile', 'Desktop', 'Tablet']),
-        'traffic_source': random.choice(['Organic', 'Paid Ads', 'Social Media', 'Direct', 'Email']),
-    })
-    
-    transaction_id += 1
-
-df_sales = pd.DataFrame(transactions)
-
-# Add some missing values and outliers to make it realistic
-# Missing values (2-3% missing data)
-for col in ['shipping_cost', 'device_type', 'traffic_source']:
-    missing_idx = np.random.choice(df_sales.index, size=int(len(df_sales) * 0.02), replace=False)
-    df_sales.loc[missing_idx, col] = None
-
-# Add a few duplicates
-duplicates = df_sales.sample(n=50)
-df_sales = pd.concat([df_sales, duplicates], ignore_index=True)
-
-# Add some outliers (unusually high prices)
-outlier_idx = np.random.choice(df_sales.index, size=20, replace=False)
-df_sales.loc[outlier_idx, 'total_amount'] *= random.uniform(3, 5)
-df_sales.loc[outlier_idx, 'grand_total'] = df_sales.loc[outlier_idx, 'total_amount'] + \
-                                             df_sales.loc[outlier_idx, 'shipping_cost'].fillna(0) + \
-                                             df_sales.loc[outlier_idx, 'tax']
-
-df_sales.to_csv('data/sales_data.csv', index=False)
-print(f"   ✓ Generated {len(df_sales)} transactions")
-
-# 4. Generate Customer Behavior Data (browsing, clicks, etc.)
-print("\n4. Generating Customer Behavior Data...")
-behaviors = []
-
-for customer_id in df_customers['customer_id'].sample(n=800):  # 80% of customers have behavior data
-    num_sessions = random.randint(1, 50)
-    
-    for _ in range(num_sessions):
-        session_date = START_DATE + timedelta(days=random.randint(0, days_diff))
-        
-        behaviors.append({
+# Rows held in memory before a chunk is written (default --chunk-size)
+CHUNK_ROWS = 1_000_000
+
+# Column types of the Parquet datasets; dates become date32 and year/month
+# partition columns are derived from them
+SALES_DTYPES = {
+    'quantity': 'int8',
+    'discount_percent': 'int8',
+    'payment_method': pd.CategoricalDtype(PAYMENT_METHODS),
+    'order_status': pd.CategoricalDtype(ORDER_STATUSES),
+    'device_type': pd.CategoricalDtype(DEVICE_TYPES),
+    'traffic_source': pd.CategoricalDtype(TRAFFIC_SOURCES),
+}
+BEHAVIOR_DTYPES = {
+    'session_duration_min': 'int16',
+    'pages_viewed': 'int16',
+    'products_viewed': 'int16',
+    'added_to_cart': 'int16',
+    'search_queries': 'int16',
+    'email_opened': 'boolean',
+    'email_clicked': 'boolean',
+}
+
+
+def generate_products(num_products):
+    products = []
+    for i in range(1, num_products + 1):
+        category = random.choice(categories)
+        brand = random.choice(brands)
+        base_price = round(random.uniform(10, 500), 2)
+
+        products.append({
+            'product_id': f'P{i:04d}',
+            'product_name': f'{category} {brand} Item {i}',
+            'category': category,
+            'brand': brand,
+            'base_price': base_price,
+            'cost': round(base_price * random.uniform(0.4, 0.7), 2),
+            'stock_quantity': random.randint(0, 500),
+            'rating': round(random.uniform(2.5, 5.0), 1),
+            'num_reviews': random.randint(0, 1000),
+            'weight_kg': round(random.uniform(0.1, 10.0), 2),
+            'is_featured': random.choice([True, False]),
+            'discount_eligible': random.choice([True, False])
+        })
+    return pd.DataFrame(products)
+
+
+def generate_customers(num_customers):
+    customers = []
+    for i in range(1, num_customers + 1):
+        registration_date = START_DATE + timedelta(days=random.randint(0, 400))
+
+        customers.append({
+            'customer_id': f'C{i:05d}',
+            'age': random.randint(18, 75),
+            'gender': random.choice(['M', 'F', 'Other']),
+            'city': random.choice(cities),
+            'registration_date': registration_date.strftime('%Y-%m-%d'),
+            'customer_segment': random.choice(segments),
+            'is_premium_member': random.choice([True, False]),
+            'email_subscribed': random.choice([True, False]),
+            'preferred_category': random.choice(categories),
+            'total_orders': 0,  # Will be updated from sales data
+            'lifetime_value': 0.0  # Will be updated from sales data
+        })
+    return pd.DataFrame(customers)
+
+
+def generate_sales_loop(df_customers, df_products, num_transactions):
+    """All transactions in one DataFrame, one Python iteration per transaction"""
+    transactions = []
+    transaction_id = 1
+
+    for _ in range(num_transactions):
+        # Random date between start and end
+        transaction_date = START_DATE + timedelta(days=random.randint(0, DAYS_DIFF))
+
+        # Add seasonality and day-of-week patterns
+        month = transaction_date.month
+        day_of_week = transaction_date.weekday()
+
+        # Higher sales in Nov-Dec (holiday season)
+        seasonal_factor = 1.5 if month in [11, 12] else 1.0
+        # Higher sales on weekends
+        weekend_factor = 1.2 if day_of_week >= 5 else 1.0
+
+        # Random customer and product
+        customer_id = random.choice(df_customers['customer_id'].values)
+        product_id = random.choice(df_products['product_id'].values)
+
+        # Get product details
+        product = df_products[df_products['product_id'] == product_id].iloc[0]
+        base_price = product['base_price']
+
+        # Quantity (more items during holidays)
+        max_qty = int(3 * seasonal_factor)
+        quantity = random.randint(1, max_qty)
+
+        # Price with discount
+        discount_pct = 0
+        if random.random() < 0.3:  # 30% chance of discount
+            discount_pct = random.choice(DISCOUNTS)
+
+        unit_price = base_price * (1 - discount_pct/100)
+        total_amount = round(unit_price * quantity, 2)
+
+        # Shipping and tax
+        shipping_cost = round(random.uniform(0, 15), 2) if total_amount < 50 else 0
+        tax = round(total_amount * 0.08, 2)
+
+        # Payment method
+        payment_method = random.choice(PAYMENT_METHODS)
+
+        # Order status
+        status = random.choices(ORDER_STATUSES, weights=STATUS_WEIGHTS)[0]
+
+        # Add transaction
+        transactions.append({
+            'transaction_id': f'T{transaction_id:06d}',
             'customer_id': customer_id,
-            'session_date': session_date.strftime('%Y-%m-%d'),
-            'session_duration_min': random.randint(1, 120),
-            'pages_viewed': random.randint(1, 50),
-            'products_viewed': random.randint(0, 30),
-            'added_to_cart': random.randint(0, 10),
-            'abandoned_cart': random.choice([True, False]),
-            'search_queries': random.randint(0, 15),
-            'email_opened': random.choice([True, False, None]),
-            'email_clicked': random.choice([True, False, None]),
+            'product_id': product_id,
+            'transaction_date': transaction_date.strftime('%Y-%m-%d'),
+            'transaction_time': f'{random.randint(0, 23):02d}:{random.randint(0, 59):02d}:00',
+            'quantity': quantity,
+            'unit_price': round(unit_price, 2),
+            'discount_percent': discount_pct,
+            'total_amount': total_amount,
+            'shipping_cost': shipping_cost,
+            'tax': tax,
+            'grand_total': round(total_amount + shipping_cost + tax, 2),
+            'payment_method': payment_method,
+            'order_status': status,
+            'device_type': random.choice(DEVICE_TYPES),
+            'traffic_source': random.choice(TRAFFIC_SOURCES),
+        })
+
+        transaction_id += 1
+
+    df_sales = pd.DataFrame(transactions)
+
+    # Add some missing values and outliers to make it realistic
+    # Missing values (2-3% missing data)
+    for col in MISSING_COLUMNS:
+        missing_idx = np.random.choice(df_sales.index, size=int(len(df_sales) * MISSING_RATE), replace=False)
+        df_sales.loc[missing_idx, col] = None
+
+    # Add a few duplicates
+    duplicates = df_sales.sample(n=round(len(df_sales) * DUPLICATE_RATE))
+    df_sales = pd.concat([df_sales, duplicates], ignore_index=True)
+
+    # Add some outliers (unusually high prices)
+    outlier_idx = np.random.choice(df_sales.index, size=round(num_transactions * OUTLIER_RATE), replace=False)
+    df_sales.loc[outlier_idx, 'total_amount'] *= random.uniform(3, 5)
+    df_sales.loc[outlier_idx, 'grand_total'] = df_sales.loc[outlier_idx, 'total_amount'] + \
+                                                 df_sales.loc[outlier_idx, 'shipping_cost'].fillna(0) + \
+                                                 df_sales.loc[outlier_idx, 'tax']
+    return df_sales
+
+
+def block_rng(seed, stream, index):
+    """Generator of the index-th child of the seed's sequence for stream"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(stream, index)))
+
+
+def generate_sales_blocks(df_customers, df_products, num_transactions, seed):
+    """
+    Same transactions as the loop engine (same distributions and data quality
+    rules), generated BLOCK_ROWS at a time: yields one DataFrame per block.
+    """
+    customer_ids = df_customers['customer_id'].to_numpy()
+    product_ids = df_products['product_id'].to_numpy()
+    base_prices = df_products['base_price'].to_numpy()
+    start = np.datetime64(START_DATE.date())
+    times = np.array([f'{hour:02d}:{minute:02d}:00' for hour in range(24) for minute in range(60)], dtype=object)
+    discounts = np.array(DISCOUNTS)
+    choices = {name: np.array(values, dtype=object) for name, values in (
+        ('payment_method', PAYMENT_METHODS), ('order_status', ORDER_STATUSES),
+        ('device_type', DEVICE_TYPES), ('traffic_source', TRAFFIC_SOURCES))}
+
+    for block, first in enumerate(range(0, num_transactions, BLOCK_ROWS)):
+        rng = block_rng(seed, SALES_STREAM, block)
+        n = min(BLOCK_ROWS, num_transactions - first)
+
+        # Dates, with more items per order in Nov-Dec (holiday season)
+        days = rng.integers(0, DAYS_DIFF, n, endpoint=True)
+        dates = start + days
+        month = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        max_qty = np.where((month == 11) | (month == 12), int(3 * 1.5), 3)
+        quantity = rng.integers(1, max_qty, endpoint=True)
+
+        # Customers and products by index; the price is a direct lookup
+        customer = rng.integers(0, len(customer_ids), n)
+        product = rng.integers(0, len(product_ids), n)
+        base_price = base_prices[product]
+
+        # 30% chance of discount
+        discount_pct = np.where(rng.random(n) < 0.3, discounts[rng.integers(0, len(discounts), n)], 0)
+        unit_price = base_price * (1 - discount_pct / 100)
+        total_amount = np.round(unit_price * quantity, 2)
+
+        # Shipping and tax
+        shipping_cost = np.where(total_amount < 50, np.round(rng.uniform(0, 15, n), 2), 0.0)
+        tax = np.round(total_amount * 0.08, 2)
+
+        df = pd.DataFrame({
+            'transaction_id': 'T' + pd.Series(np.arange(first + 1, first + n + 1)).astype(str).str.zfill(6),
+            'customer_id': customer_ids[customer],
+            'product_id': product_ids[product],
+            'transaction_date': np.datetime_as_string(dates, unit='D'),
+            'transaction_time': times[rng.integers(0, len(times), n)],
+            'quantity': quantity,
+            'unit_price': np.round(unit_price, 2),
+            'discount_percent': discount_pct,
+            'total_amount': total_amount,
+            'shipping_cost': shipping_cost,
+            'tax': tax,
+            'grand_total': np.round(total_amount + shipping_cost + tax, 2),
+            'payment_method': choices['payment_method'][rng.integers(0, len(PAYMENT_METHODS), n)],
+            'order_status': choices['order_status'][rng.choice(len(ORDER_STATUSES), n, p=STATUS_WEIGHTS)],
+            'device_type': choices['device_type'][rng.integers(0, len(DEVICE_TYPES), n)],
+            'traffic_source': choices['traffic_source'][rng.integers(0, len(TRAFFIC_SOURCES), n)],
         })
 
-df_behavior = pd.DataFrame(behaviors)
-df_behavior.to_csv('data/customer_behavior.csv', index=False)
-print(f"   ✓ Generated {len(df_behavior)} behavior records")
-
-# Summary Statistics
-print("\n" + "=" * 60)
-print("DATA GENERATION SUMMARY")
-print("=" * 60)
-print(f"\n✓ Product Data: {len(df_products)} products across {len(categories)} categories")
-print(f"✓ Customer Data: {len(df_customers)} customers from {len(cities)} cities")
-print(f"✓ Sales Data: {len(df_sales)} transactions over 2 years")
-print(f"✓ Behavior Data: {len(df_behavior)} customer sessions")
-print(f"\nDate Range: {START_DATE.strftime('%Y-%m-%d')} to {END_DATE.strftime('%Y-%m-%d')}")
-print(f"Total Revenue: ${df_sales[df_sales['order_status'] == 'Completed']['grand_total'].sum():,.2f}")
-print("\nAll datasets saved to 'data/' directory!")
-print("=" * 60)
+        # Missing values, duplicates and outliers, at the loop engine's rates
+        for col in MISSING_COLUMNS:
+            df.loc[rng.choice(n, size=int(n * MISSING_RATE), replace=False), col] = None
+        duplicates = df.iloc[np.sort(rng.choice(n, size=round(n * DUPLICATE_RATE), replace=False))]
+        df = pd.concat([df, duplicates], ignore_index=True)
+        outlier_idx = rng.choice(len(df), size=round(n * OUTLIER_RATE), replace=False)
+        df.loc[outlier_idx, 'total_amount'] *= rng.uniform(3, 5)
+        df.loc[outlier_idx, 'grand_total'] = df.loc[outlier_idx, 'total_amount'] + \
+                                              df.loc[outlier_idx, 'shipping_cost'].fillna(0) + \
+                                              df.loc[outlier_idx, 'tax']
+        yield df
+
+
+def generate_behavior(df_customers, chunk_size):
+    """Behavior sessions, yielded as DataFrames of chunk_size records"""
+    behaviors = []
+
+    for customer_id in df_customers['customer_id'].sample(n=int(len(df_customers) * 0.8)):  # 80% of customers have behavior data
+        num_sessions = random.randint(1, 50)
+
+        for _ in range(num_sessions):
+            session_date = START_DATE + timedelta(days=random.randint(0, DAYS_DIFF))
+
+            behaviors.append({
+                'customer_id': customer_id,
+                'session_date': session_date.strftime('%Y-%m-%d'),
+                'session_duration_min': random.randint(1, 120),
+                'pages_viewed': random.randint(1, 50),
+                'products_viewed': random.randint(0, 30),
+                'added_to_cart': random.randint(0, 10),
+                'abandoned_cart': random.choice([True, False]),
+                'search_queries': random.randint(0, 15),
+                'email_opened': random.choice([True, False, None]),
+                'email_clicked': random.choice([True, False, None]),
+            })
+            if len(behaviors) == chunk_size:
+                yield pd.DataFrame(behaviors)
+                behaviors = []
+
+    if behaviors:
+        yield pd.DataFrame(behaviors)
+
+
+def generate_behavior_shard(seed, shard, customer_ids):
+    """
+    Behavior sessions of one shard of customers, drawn as NumPy arrays with
+    the loop's distributions: 80% of the customers, 1-50 sessions each.
+    """
+    rng = block_rng(seed, BEHAVIOR_STREAM, shard)
+    sampled = customer_ids[rng.permutation(len(customer_ids))[:round(len(customer_ids) * 0.8)]]
+    num_sessions = rng.integers(1, 50, len(sampled), endpoint=True)
+    n = int(num_sessions.sum())
+    days = rng.integers(0, DAYS_DIFF, n, endpoint=True)
+    # Dates and nullable flags stay typed; to_csv writes them exactly like
+    # the loop's strings
+    email_flags = pd.array([True, False, None], dtype='boolean')
+
+    return pd.DataFrame({
+        'customer_id': np.repeat(sampled, num_sessions),
+        'session_date': np.datetime64(START_DATE.date(), 'ns') + days.astype('timedelta64[D]'),
+        'session_duration_min': rng.integers(1, 120, n, endpoint=True),
+        'pages_viewed': rng.integers(1, 50, n, endpoint=True),
+        'products_viewed': rng.integers(0, 30, n, endpoint=True),
+        'added_to_cart': rng.integers(0, 10, n, endpoint=True),
+        'abandoned_cart': rng.random(n) < 0.5,
+        'search_queries': rng.integers(0, 15, n, endpoint=True),
+        'email_opened': email_flags[rng.integers(0, 3, n)],
+        'email_clicked': email_flags[rng.integers(0, 3, n)],
+    })
+
+
+def map_in_order(function, tasks, workers):
+    """
+    function(task) for each task, in task order, on a pool of workers. At most
+    two results per worker are held back, so memory stays bounded when the
+    consumer is slower than the pool.
+    """
+    if workers <= 1:
+        yield from map(function, tasks)
+        return
+    with Pool(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(function, (task,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def write_behavior_shard(task):
+    """
+    Generates one shard and renders it through the sink, in the worker: CSV
+    text for the parent to append, or Parquet part files written in place.
+    """
+    seed, shard, customer_ids, sink = task
+    df = generate_behavior_shard(seed, shard, customer_ids)
+    return len(df), sink.render(df, shard)
+
+
+def write_behavior_sharded(df_customers, seed, workers, sink):
+    """
+    Behavior sessions of every shard of customers through sink. Workers do
+    all per-row work; the parent only appends their output in shard order.
+    """
+    customer_ids = df_customers['customer_id'].to_numpy()
+    tasks = ((seed, shard, customer_ids[first:first + SHARD_CUSTOMERS], sink)
+             for shard, first in enumerate(range(0, len(customer_ids), SHARD_CUSTOMERS)))
+    for rows, rendered in map_in_order(write_behavior_shard, tasks, workers):
+        sink.append(rows, rendered)
+
+
+def rechunk(frames, chunk_size):
+    """Concatenates consecutive DataFrames into chunks of at least chunk_size rows"""
+    pending, rows = [], 0
+    for df in frames:
+        pending.append(df)
+        rows += len(df)
+        if rows >= chunk_size:
+            yield pd.concat(pending, ignore_index=True)
+            pending, rows = [], 0
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+class CsvSink:
+    """
+    Appends chunks to one CSV file. render() (which may run in a worker)
+    formats a chunk as CSV bytes; append() writes them, in part order.
+    """
+
+    def __init__(self, output_dir, name):
+        self.path = os.path.join(output_dir, f'{name}.csv')
+        self.rows = 0
+        self.parts = 0
+
+    def render(self, df, part):
+        return df.to_csv(index=False, header=part == 0).encode('utf-8')
+
+    def append(self, rows, rendered):
+        with open(self.path, 'wb' if self.parts == 0 else 'ab') as f:
+            f.write(rendered)
+        self.rows += rows
+        self.parts += 1
+
+    def write(self, df):
+        self.append(len(df), self.render(df, self.parts))
+
+
+class ParquetSink:
+    """
+    Writes chunks to a Parquet dataset, <output_dir>/<name>/year=YYYY/month=M/,
+    one file per chunk and partition, with the column types in dtypes.
+    render() writes part files itself (also from a worker); append() only counts.
+    """
+
+    def __init__(self, output_dir, name, date_column, dtypes):
+        self.path = os.path.join(output_dir, name)
+        self.date_column = date_column
+        self.dtypes = dtypes
+        self.rows = 0
+        self.parts = 0
+        # A previous run's files would otherwise be read as part of the dataset
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def render(self, df, part):
+        dates = pd.to_datetime(df[self.date_column], format='%Y-%m-%d')
+        df = df.astype(self.dtypes).assign(**{self.date_column: dates}, year=dates.dt.year.astype('int16'),
+                                           month=dates.dt.month.astype('int8'))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        index = table.schema.get_field_index(self.date_column)
+        table = table.set_column(index, self.date_column, table.column(index).cast(pa.date32()))
+        pq.write_to_dataset(table, self.path, partition_cols=['year', 'month'],
+                            basename_template=f'part-{part:05d}-{{i}}.parquet',
+                            existing_data_behavior='overwrite_or_ignore')
+
+    def append(self, rows, rendered):
+        self.rows += rows
+        self.parts += 1
+
+    def write(self, df):
+        self.append(len(df), self.render(df, self.parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic e-commerce datasets")
+    parser.add_argument('--engine', choices=['loop', 'numpy'], default='loop',
+                        help="Sales generation engine (default: loop, which reproduces data/ exactly)")
+    parser.add_argument('--transactions', type=int, default=NUM_TRANSACTIONS,
+                        help=f"Sales transactions before duplicates are added (default: {NUM_TRANSACTIONS})")
+    parser.add_argument('--customers', type=int, default=NUM_CUSTOMERS)
+    parser.add_argument('--products', type=int, default=NUM_PRODUCTS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="Format of the sales and behavior data (default: csv); parquet needs pyarrow")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"Processes generating and writing the numpy engine's behavior shards of "
+                             f"{SHARD_CUSTOMERS:,} customers (default: 1)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ROWS,
+                        help=f"Rows generated and written at a time (default: {CHUNK_ROWS:,}; "
+                             f"the numpy engine's minimum is {BLOCK_ROWS:,}). Bounds memory only with "
+                             f"--engine numpy: the loop engine builds all its sales before writing them")
+    args = parser.parse_args()
+    if args.format == 'parquet' and pa is None:
+        parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+
+    def sink(name, date_column, dtypes):
+        if args.format == 'parquet':
+            return ParquetSink(args.output_dir, name, date_column, dtypes)
+        return CsvSink(args.output_dir, name)
+
+    # Set random seed for reproducibility
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print("Generating E-Commerce Datasets...")
+    print("=" * 60)
+
+    # 1. Generate Product Data
+    print("\n1. Generating Product Data...")
+    df_products = generate_products(args.products)
+    df_products.to_csv(os.path.join(args.output_dir, 'product_data.csv'), index=False)
+    print(f"   ✓ Generated {len(df_products)} products")
+
+    # 2. Generate Customer Data
+    print("\n2. Generating Customer Data...")
+    df_customers = generate_customers(args.customers)
+    df_customers.to_csv(os.path.join(args.output_dir, 'customer_data.csv'), index=False)
+    print(f"   ✓ Generated {len(df_customers)} customers")
+
+    # 3. Generate Sales/Transaction Data
+    print(f"\n3. Generating Sales Transaction Data ({args.engine} engine)...")
+    if args.engine == 'loop':
+        df_sales = generate_sales_loop(df_customers, df_products, args.transactions)
+        chunks = (df_sales.iloc[i:i + args.chunk_size] for i in range(0, len(df_sales), args.chunk_size))
+    else:
+        chunks = rechunk(generate_sales_blocks(df_customers, df_products, args.transactions, args.seed),
+                         args.chunk_size)
+    sales = sink('sales_data', 'transaction_date', SALES_DTYPES)
+    revenue = 0.0
+    for chunk in chunks:
+        sales.write(chunk)
+        revenue += chunk[chunk['order_status'] == 'Completed']['grand_total'].sum()
+        if args.transactions > args.chunk_size:
+            print(f"   ... {sales.rows:,} transactions written")
+    num_sales = sales.rows
+    print(f"   ✓ Generated {num_sales} transactions")
+
+    # 4. Generate Customer Behavior Data (browsing, clicks, etc.)
+    print("\n4. Generating Customer Behavior Data...")
+    behavior = sink('customer_behavior', 'session_date', BEHAVIOR_DTYPES)
+    shards = -(-len(df_customers) // SHARD_CUSTOMERS)
+    if args.workers > 1 and args.engine == 'loop':
+        print("   ⚠ --workers only applies to --engine numpy; generating in one process")
+    elif args.workers > shards:
+        print(f"   ⚠ {len(df_customers):,} customers make {shards} shard(s) of {SHARD_CUSTOMERS:,}; "
+              f"using {shards} of {args.workers} workers")
+    if args.engine == 'loop':
+        for chunk in generate_behavior(df_customers, args.chunk_size):
+            behavior.write(chunk)
+    else:
+        write_behavior_sharded(df_customers, args.seed, min(args.workers, shards), behavior)
+    print(f"   ✓ Generated {behavior.rows} behavior records")
+
+    # Summary Statistics
+    print("\n" + "=" * 60)
+    print("DATA GENERATION SUMMARY")
+    print("=" * 60)
+    print(f"\n✓ Product Data: {len(df_products)} products across {len(categories)} categories")
+    print(f"✓ Customer Data: {len(df_customers)} customers from {len(cities)} cities")
+    print(f"✓ Sales Data: {num_sales} transactions over 2 years")
+    print(f"✓ Behavior Data: {behavior.rows} customer sessions")
+    print(f"\nDate Range: {START_DATE.strftime('%Y-%m-%d')} to {END_DATE.strftime('%Y-%m-%d')}")
+    print(f"Total Revenue: ${revenue:,.2f}")
+    print(f"\nAll datasets saved to '{args.output_dir}/' directory!")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
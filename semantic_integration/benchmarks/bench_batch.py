@@ -0,0 +1,98 @@
+"""
+Benchmark: the report queries and validation run as one batch on 1-8 workers
+Workers are forked from a process holding the graph, so none of them reparses
+Turtle; results must be identical whatever the worker count
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph, Literal, RDF, XSD
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import columnar_eval  # noqa: E402
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from query_registry import default_registry  # noqa: E402
+from validation_engine import ShapeValidator, load_shapes  # noqa: E402
+from vocab import UNI, dept_uri  # noqa: E402
+from xml_mapper import COURSE_FIELDS, COURSE_MAPPINGS  # noqa: E402
+from bench_store import MAJORS, load  # noqa: E402
+
+BATCH = ['query1', 'query2', 'query3', 'query4', 'query5', 'query6', 'validation_report', 'cross_validation']
+
+
+def add_catalog(graph, courses=500, instructors=100):
+    """Departments, courses and instructors for the synthetic students to point at"""
+    for i, major in enumerate(MAJORS):
+        department = dept_uri(major)
+        graph.add((department, RDF.type, UNI.Department))
+        graph.add((department, UNI.departmentName, Literal(major, datatype=XSD.string)))
+        graph.add((department, UNI.building, Literal(f"Building {i}", datatype=XSD.string)))
+        graph.add((department, UNI.facultyCount, Literal(20 + i, datatype=XSD.integer)))
+        graph.add((department, UNI.budget, Literal(1000000 * (i + 1), datatype=XSD.integer)))
+    for c in range(courses):
+        record = {
+            'course_code': f"C{c}",
+            'course_name': f"Course {c}",
+            'department': MAJORS[c % len(MAJORS)],
+            'credits': str(3 + c % 2),
+            'instructor_id': f"I{c % instructors}",
+            'instructor_name': f"Dr. First{c % instructors} Last{c % instructors}",
+        }
+        row = tuple(record[field] for field in COURSE_FIELDS)
+        for mapping in COURSE_MAPPINGS:
+            for triple in mapping.triples(row):
+                graph.add(triple)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    parser.add_argument('--store', choices=['snapshot', 'memory'], default='snapshot')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    graph = Graph()
+    load(graph, args.students, args.enrollments_per_student)
+    add_catalog(graph)
+    print(f"Graph size: {len(graph):,} triples, {os.cpu_count()} CPU(s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.store == 'snapshot':
+            ttl_path = os.path.join(tmp, 'graph.ttl')
+            open(ttl_path, 'w').close()
+            write_snapshot(graph, ttl_path, os.path.join(tmp, 'snapshot'))
+            graph = Graph(store=SnapshotStore())
+            graph.open(os.path.join(tmp, 'snapshot'))
+            columnar_eval.enable()
+
+        validator = ShapeValidator(load_shapes())
+        jobs = {'validation_report': (validator.cache_key(), validator.validate)}
+        warm = default_registry(cache_dir=os.path.join(tmp, 'query_cache'))
+        for name in BATCH:
+            if name in warm.queries:
+                warm.prepare(name)  # fills the algebra cache so no run pays for parsing
+
+        expected = None
+        print(f"\n{'workers':>8}{'end to end (s)':>16}{'speedup':>10}")
+        for workers in args.workers:
+            # A fresh registry per run: no result cache, algebra from the disk cache
+            registry = default_registry(cache_dir=os.path.join(tmp, 'query_cache'))
+            start = time.perf_counter()
+            results = registry.results(graph, BATCH, workers=workers, jobs=jobs)
+            seconds = time.perf_counter() - start
+            if expected is None:
+                expected, baseline = results, seconds
+            assert list(results) == BATCH and results == expected, workers
+            print(f"{workers:8}{seconds:16.2f}{baseline / seconds:9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: vectorized BGP joins over the columnar snapshot index
+Runs join-heavy queries on an in-memory graph, on the snapshot with rdflib's
+triple-at-a-time evaluation and on the snapshot with the columnar evaluator,
+and checks all three return the same rows
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'integration'))
+
+import columnar_eval  # noqa: E402
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from bench_store import load  # noqa: E402
+
+QUERIES = {
+    'grades_by_major': """
+        PREFIX uni: <http://university.edu/ontology#>
+        SELECT ?department ?grade (COUNT(?enrollment) AS ?n) WHERE {
+            ?student a uni:Student ;
+                     uni:majorIn ?department ;
+                     uni:hasEnrollment ?enrollment .
+            ?enrollment uni:grade ?grade .
+        }
+        GROUP BY ?department ?grade""",
+    'physics_courses': """
+        PREFIX uni: <http://university.edu/ontology#>
+        PREFIX data: <http://university.edu/data#>
+        SELECT ?student ?course ?semester WHERE {
+            ?student uni:majorIn data:dept_Physics ;
+                     uni:hasEnrollment ?enrollment .
+            ?enrollment uni:enrollmentFor ?course ;
+                        uni:semester ?semester .
+        }""",
+    'top_gpa_names': """
+        PREFIX uni: <http://university.edu/ontology#>
+        SELECT ?firstName ?lastName ?gpa WHERE {
+            ?student a uni:Student ;
+                     uni:firstName ?firstName ;
+                     uni:lastName ?lastName ;
+                     uni:gpa ?gpa .
+        }
+        ORDER BY DESC(?gpa)
+        LIMIT 20""",
+}
+
+
+def run(graph, query, columnar):
+    if columnar:
+        columnar_eval.enable()
+    else:
+        columnar_eval.disable()
+    try:
+        start = time.perf_counter()
+        rows = [tuple(row) for row in graph.query(query)]
+        return time.perf_counter() - start, rows
+    finally:
+        columnar_eval.disable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=40000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    args = parser.parse_args()
+
+    memory = Graph()
+    load(memory, args.students, args.enrollments_per_student)
+    print(f"Graph size: {len(memory):,} triples")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl_path = os.path.join(tmp, 'graph.ttl')
+        snapshot_dir = os.path.join(tmp, 'snapshot')
+        open(ttl_path, 'w').close()
+        write_snapshot(memory, ttl_path, snapshot_dir)
+        mapped = Graph(store=SnapshotStore())
+        mapped.open(snapshot_dir)
+
+        print(f"\n{'(s)':24}{'memory':>12}{'snapshot':>12}{'columnar':>12}{'speedup':>10}{'rows':>10}")
+        for name, query in QUERIES.items():
+            memory_seconds, expected = run(memory, query, False)
+            snapshot_seconds, rows = run(mapped, query, False)
+            columnar_seconds, columnar_rows = run(mapped, query, True)
+            if 'ORDER BY' in query:
+                # Both snapshot evaluators emit ties in the same order; the
+                # in-memory graph may break them differently
+                assert rows == columnar_rows, name
+                assert [row[-1] for row in rows] == [row[-1] for row in expected], name
+            else:
+                assert sorted(rows) == sorted(expected) == sorted(columnar_rows), name
+            print(f"{name:24}{memory_seconds:12.2f}{snapshot_seconds:12.2f}{columnar_seconds:12.2f}"
+                  f"{memory_seconds / columnar_seconds:9.1f}x{len(rows):10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: columnar CSV mapper vs the original DataFrame.iterrows loop
+Generates a departments-shaped CSV, maps it both ways and checks the triples match
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from rdflib import Literal, RDF, XSD
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'integration'))
+
+from vocab import UNI, DATA  # noqa: E402
+from csv_mapper import department_mapping, map_csv  # noqa: E402
+
+
+class CountingSink:
+    """Discards triples but counts them, so only mapping cost is measured"""
+
+    def __init__(self, keep=0):
+        self.count = 0
+        self.keep = keep
+        self.kept = set()
+
+    def add(self, triples):
+        self.count += len(triples)
+        if len(self.kept) < self.keep:
+            self.kept.update(triples[:self.keep - len(self.kept)])
+
+
+def write_csv(path, rows, seed=42):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, rows + 1)
+    pd.DataFrame({
+        'department_id': [f"D{i:07d}" for i in ids],
+        'department_name': [f"Department {i}" for i in ids],
+        'building': [f"Building {i % 97}" for i in ids],
+        'head_of_department': [f"Dr. Head {i}" for i in ids],
+        'faculty_count': rng.integers(5, 40, rows),
+        'established_year': rng.integers(1900, 2020, rows),
+        'budget': rng.integers(500000, 5000000, rows),
+    }).to_csv(path, index=False)
+
+
+def iterrows_triples(path, sink):
+    """The original departments loop, minus the headedBy lookup"""
+    df = pd.read_csv(path)
+    for _, row in df.iterrows():
+        dept_uri = DATA[f"dept_{row['department_name'].replace(' ', '_')}"]
+        sink.add([
+            (dept_uri, RDF.type, UNI.Department),
+            (dept_uri, UNI.departmentID, Literal(row['department_id'], datatype=XSD.string)),
+            (dept_uri, UNI.departmentName, Literal(row['department_name'], datatype=XSD.string)),
+            (dept_uri, UNI.building, Literal(row['building'], datatype=XSD.string)),
+            (dept_uri, UNI.facultyCount, Literal(int(row['faculty_count']), datatype=XSD.integer)),
+            (dept_uri, UNI.establishedYear, Literal(int(row['established_year']), datatype=XSD.gYear)),
+            (dept_uri, UNI.budget, Literal(int(row['budget']), datatype=XSD.integer)),
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--check-rows', type=int, default=10_000,
+                        help="Rows whose triples are compared between both mappers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'departments.csv')
+        print(f"Writing {args.rows:,} rows to {path}...")
+        write_csv(path, args.rows)
+
+        # Equality check on a prefix of the file
+        check_path = os.path.join(tmp, 'check.csv')
+        pd.read_csv(path, nrows=args.check_rows).to_csv(check_path, index=False)
+        legacy, columnar = CountingSink(keep=10 ** 9), CountingSink(keep=10 ** 9)
+        iterrows_triples(check_path, legacy)
+        map_csv(check_path, department_mapping(), columnar)
+        same = legacy.kept == columnar.kept
+        print(f"Triples identical on first {args.check_rows:,} rows: {same}")
+
+        sink = CountingSink()
+        start = time.perf_counter()
+        iterrows_triples(path, sink)
+        legacy_seconds = time.perf_counter() - start
+        print(f"iterrows : {legacy_seconds:8.2f}s  {args.rows / legacy_seconds:12,.0f} rows/sec  ({sink.count:,} triples)")
+
+        sink = CountingSink()
+        start = time.perf_counter()
+        map_csv(path, department_mapping(), sink, chunk_size=args.chunk_size)
+        columnar_seconds = time.perf_counter() - start
+        print(f"columnar : {columnar_seconds:8.2f}s  {args.rows / columnar_seconds:12,.0f} rows/sec  ({sink.count:,} triples)")
+        print(f"speedup  : {legacy_seconds / columnar_seconds:.2f}x")
+
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
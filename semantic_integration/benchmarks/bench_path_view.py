@@ -0,0 +1,98 @@
+"""
+Benchmark: report queries answered by joins vs routed to the materialized path view
+The view is built from a synthetic university graph; every query is run with
+and without routing (planner on in both) and must give the same rows. Also
+times patching the view after one new enrollment against rebuilding it.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph, Literal, URIRef
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import columnar_eval  # noqa: E402
+import path_view_eval  # noqa: E402
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from graph_statistics import collect_statistics  # noqa: E402
+from path_view import ViewReader, load_views, update_views, write_views  # noqa: E402
+from query_planner import QueryPlanner  # noqa: E402
+from query_registry import DATA, UNI, default_registry  # noqa: E402
+from bench_batch import add_catalog  # noqa: E402
+from bench_planner import timed  # noqa: E402
+from bench_store import load  # noqa: E402
+
+QUERIES = ['query3', 'query5', 'cross_validation']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    parser.add_argument('--store', choices=['memory', 'snapshot'], default='memory')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per variant, alternating; the fastest is reported")
+    args = parser.parse_args()
+
+    graph = Graph()
+    load(graph, args.students, args.enrollments_per_student)
+    add_catalog(graph)
+    planner = QueryPlanner(dict(collect_statistics(graph), graph_version='benchmark'))
+    print(f"Graph size: {len(graph):,} triples")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        view_path = os.path.join(tmp, 'path_views.sqlite')
+        views = load_views()
+        start = time.perf_counter()
+        rows = write_views(graph, 'benchmark', view_path, views)['enrollment_path']['rows']
+        print(f"View built in {time.perf_counter() - start:.2f}s ({rows:,} rows)")
+
+        # One new enrollment, patched in place vs rebuilt
+        enrollment = URIRef(DATA + 'enrollment_benchmark')
+        student = next(graph.subjects(UNI.hasEnrollment, None))
+        course = next(graph.objects(None, UNI.enrollmentFor))
+        graph.add((student, UNI.hasEnrollment, enrollment))
+        graph.add((enrollment, UNI.enrollmentFor, course))
+        graph.add((enrollment, UNI.grade, Literal('A')))
+        start = time.perf_counter()
+        update_views(graph, {student, enrollment, course}, 'benchmark', view_path, views)
+        patch_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        write_views(graph, 'benchmark', view_path, views)
+        print(f"One new enrollment: patched in {patch_seconds:.3f}s, rebuilt in {time.perf_counter() - start:.2f}s")
+
+        if args.store == 'snapshot':
+            ttl_path = os.path.join(tmp, 'graph.ttl')
+            open(ttl_path, 'w').close()
+            write_snapshot(graph, ttl_path, os.path.join(tmp, 'snapshot'))
+            graph = Graph(store=SnapshotStore())
+            graph.open(os.path.join(tmp, 'snapshot'))
+            columnar_eval.enable()
+        reader = ViewReader(view_path, views)
+        registry = default_registry(cache_dir=os.path.join(tmp, 'query_cache'), planner=planner)
+
+        print(f"\n{'query':18}{'joins (s)':>12}{'view (s)':>12}{'speedup':>10}")
+        for name in QUERIES:
+            registry.prepare(name)
+            joins_seconds = view_seconds = float('inf')
+            for _ in range(args.repeat):
+                path_view_eval.disable()
+                seconds, expected = timed(registry, graph, name)
+                joins_seconds = min(joins_seconds, seconds)
+                path_view_eval.enable(graph, reader)
+                seconds, records = timed(registry, graph, name)
+                view_seconds = min(view_seconds, seconds)
+            # The report queries order their rows totally: same rows, same order
+            assert records == expected, name
+            print(f"{name:18}{joins_seconds:12.3f}{view_seconds:12.3f}{joins_seconds / view_seconds:9.2f}x")
+        path_view_eval.disable()
+
+
+if __name__ == '__main__':
+    main()
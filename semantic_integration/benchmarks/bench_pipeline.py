@@ -0,0 +1,275 @@
+"""
+Benchmark suite: the whole pipeline at several scales, with regression checks
+`run` generates sources for each scale in a scratch copy of the project, runs
+the integration (profiled per stage), loads the graph from each store and runs
+every named query and the validation pass, each step in its own process, and
+writes one JSON report. `compare` diffs two reports and exits non-zero when a
+metric got slower (or bigger) than the threshold allows.
+
+    python benchmarks/bench_pipeline.py run --scales 1k,10k --output benchmarks/results/base.json
+    python benchmarks/bench_pipeline.py compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT = os.path.dirname(HERE)
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+# generate_data_sources.py makes 10,000 students per unit of scale factor
+STUDENTS_PER_SF = 10000
+COPIED = ['integration', 'queries', 'ontology', 'mappings', 'generate_data_sources.py']
+IGNORED = shutil.ignore_patterns('__pycache__', '.query_cache', '.result_cache', 'results',
+                                 'query_*results.json', 'mapping_documentation.json')
+
+# Timing one store's load in a fresh process, as the query entry points do
+LOAD_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, 'queries')
+from graph_loader import open_graph
+start = time.perf_counter()
+graph, source, warnings = open_graph(sys.argv[1], path_views=False)
+print(json.dumps({'seconds': time.perf_counter() - start, 'triples': len(graph), 'warnings': warnings}))
+"""
+
+
+def parse_count(text):
+    """'1k' -> 1000, '1M' -> 1000000, '2500' -> 2500"""
+    text = text.strip()
+    multiplier = {'k': 10 ** 3, 'K': 10 ** 3, 'm': 10 ** 6, 'M': 10 ** 6}.get(text[-1:], 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+def scale_label(students):
+    for size, suffix in ((10 ** 6, 'M'), (10 ** 3, 'k')):
+        if students >= size and students % size == 0:
+            return f"{students // size}{suffix}"
+    return str(students)
+
+
+def run_step(workdir, name, command, timeout):
+    """Run one step in workdir with its output in <workdir>/<name>.log; returns wall seconds"""
+    log_path = os.path.join(workdir, f"{name}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        completed = subprocess.run(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+                                   timeout=timeout)
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        with open(log_path, encoding='utf-8') as log:
+            tail = ''.join(log.readlines()[-20:])
+        raise RuntimeError(f"{name} failed with exit code {completed.returncode}:\n{tail}")
+    return seconds
+
+
+def prepare_workdir(parent):
+    workdir = tempfile.mkdtemp(prefix='si_bench_', dir=parent)
+    for entry in COPIED:
+        source = os.path.join(PROJECT, entry)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(workdir, entry), ignore=IGNORED)
+        else:
+            shutil.copy2(source, workdir)
+    for directory in ('data_sources', 'output'):
+        os.makedirs(os.path.join(workdir, directory), exist_ok=True)
+    return workdir
+
+
+def run_scale(students, args):
+    """Metrics of one scale, flat as {'<group>.<item>.<measure>': value}"""
+    python = sys.executable
+    workdir = prepare_workdir(args.workdir)
+    metrics = {}
+    info = {'students': students, 'workdir': workdir}
+    try:
+        seconds = run_step(workdir, 'generate',
+                           [python, 'generate_data_sources.py', '--scale-factor', str(students / STUDENTS_PER_SF),
+                            '--seed', str(args.seed)], args.timeout)
+        metrics['generate.total.wall_seconds'] = seconds
+        print(f"   ✓ Generated sources in {seconds:.1f}s")
+
+        seconds = run_step(workdir, 'integration',
+                           [python, 'integration/semantic_integration.py', '--profile'], args.timeout)
+        metrics['integration.total.wall_seconds'] = seconds
+        with open(os.path.join(workdir, 'output', 'run_report.json'), encoding='utf-8') as f:
+            run_report = json.load(f)
+        info['triples'] = run_report['total_triples']
+        for stage in run_report['stages']:
+            for measure in ('wall_seconds', 'cpu_seconds', 'peak_rss_mb'):
+                if stage.get(measure) is not None:
+                    metrics[f"integration.{stage['stage']}.{measure}"] = stage[measure]
+        print(f"   ✓ Integrated {info['triples']:,} triples in {seconds:.1f}s")
+
+        for store in args.load_stores:
+            best = None
+            for _ in range(args.repeat):
+                completed = subprocess.run([python, '-c', LOAD_SCRIPT, store], cwd=workdir, capture_output=True,
+                                           text=True, timeout=args.timeout, check=True)
+                load = json.loads(completed.stdout.strip().splitlines()[-1])
+                best = load if best is None or load['seconds'] < best['seconds'] else best
+            if best['warnings']:
+                print(f"   ⚠ {store}: {'; '.join(best['warnings'])}")
+            metrics[f"load.{store}.seconds"] = best['seconds']
+            print(f"   ✓ Loaded from {store} in {best['seconds']:.3f}s")
+
+        timings = {}
+        for run in range(args.repeat):
+            run_step(workdir, f"queries_{run + 1}",
+                     [python, 'queries/sparql_queries.py', '--no-result-cache', '--no-query-cache'], args.timeout)
+            with open(os.path.join(workdir, 'queries', 'query_results.json'), encoding='utf-8') as f:
+                statistics = json.load(f)['statistics']
+            for name, timing in statistics['query_timings'].items():
+                seconds = (timing['parse_ms'] + timing['execute_ms']) / 1000
+                timings[name] = min(timings.get(name, seconds), seconds)
+        for name, seconds in timings.items():
+            group = 'validation' if name.startswith('validation') else 'query'
+            metrics[f"{group}.{name}.seconds"] = seconds
+        print(f"   ✓ Ran {len(timings)} queries and validations "
+              f"(slowest: {max(timings, key=timings.get)} {max(timings.values()):.2f}s)")
+    finally:
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+            info.pop('workdir')
+    return info, {name: round(value, 4) for name, value in metrics.items()}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import rdflib
+    return {
+        'python': platform.python_version(),
+        'rdflib': rdflib.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'git_commit': commit,
+    }
+
+
+def command_run(args):
+    scales = [parse_count(text) for text in args.scales.split(',')]
+    report = {
+        'created': datetime.now().isoformat(),
+        'environment': environment(),
+        'parameters': {'scales': scales, 'seed': args.seed, 'repeat': args.repeat, 'load_stores': args.load_stores},
+        'scales': {},
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    for students in scales:
+        label = scale_label(students)
+        print(f"\nScale {label} ({students:,} students)")
+        info, metrics = run_scale(students, args)
+        report['scales'][label] = dict(info, metrics=metrics)
+        # Written after every scale, so a long run that fails later keeps what it measured
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(f"\n✓ Wrote {output}")
+    if args.compare:
+        return compare_reports(load_report(args.compare), report, args)
+    return 0
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(baseline, current, args):
+    """Print every metric the two reports share; returns 1 when any regressed"""
+    regressions = []
+    for label, scale in current['scales'].items():
+        if label not in baseline['scales']:
+            print(f"\n{label}: not in the baseline")
+            continue
+        before_metrics = baseline['scales'][label]['metrics']
+        after_metrics = scale['metrics']
+        rows = []
+        for name in sorted(set(before_metrics) & set(after_metrics)):
+            before, after = before_metrics[name], after_metrics[name]
+            # Tiny absolute changes are noise, whatever the ratio
+            floor = args.min_mb if name.endswith('_mb') else args.min_seconds
+            ratio = after / before if before else float('inf') if after else 1.0
+            if after - before > floor and ratio > 1 + args.threshold:
+                status = 'REGRESSION'
+                regressions.append((label, name, before, after))
+            elif before - after > floor and ratio < 1 / (1 + args.threshold):
+                status = 'improved'
+            else:
+                status = ''
+            rows.append((name, before, after, ratio, status))
+        print(f"\n{label}:")
+        print(f"  {'metric':52}{'baseline':>12}{'current':>12}{'ratio':>9}")
+        for name, before, after, ratio, status in rows:
+            if status or args.verbose:
+                print(f"  {name:52}{before:12.3f}{after:12.3f}{ratio:8.2f}x  {status}")
+        unchanged = sum(1 for *_, status in rows if not status)
+        if unchanged and not args.verbose:
+            print(f"  ({unchanged} metrics within ±{args.threshold:.0%})")
+        for name in sorted(set(before_metrics) ^ set(after_metrics)):
+            print(f"  {name}: only in {'baseline' if name in before_metrics else 'current'}")
+    for label in baseline['scales'].keys() - current['scales'].keys():
+        print(f"\n{label}: only in the baseline")
+
+    if regressions:
+        print(f"\n⚠ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("\n✓ No regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with regression checks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Benchmark the pipeline at each scale and write a JSON report")
+    run.add_argument('--scales', default='1k,10k',
+                     help="Comma-separated student counts, e.g. 1k,100k,1M (1M takes hours on one core)")
+    run.add_argument('--seed', type=int, default=42, help="Seed passed to generate_data_sources.py")
+    run.add_argument('--repeat', type=int, default=1,
+                     help="Runs of the load and query steps; the fastest time per item is kept")
+    run.add_argument('--load-stores', nargs='+', default=['snapshot', 'memory'], choices=['snapshot', 'memory'],
+                     help="Stores whose graph load is timed")
+    run.add_argument('--output', default=None,
+                     help="Report path (default: benchmarks/results/pipeline_<timestamp>.json)")
+    run.add_argument('--workdir', default=None, help="Parent of the scratch copies (default: system temp)")
+    run.add_argument('--keep-workdir', action='store_true', help="Keep each scale's scratch copy and step logs")
+    run.add_argument('--timeout', type=float, default=None, help="Seconds allowed per step")
+    run.add_argument('--compare', metavar='BASELINE', default=None,
+                     help="Compare the new report against BASELINE when done")
+
+    compare = commands.add_parser('compare', help="Flag regressions of a report against a baseline report")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--verbose', action='store_true', help="List unchanged metrics too")
+
+    for command in (run, compare):
+        command.add_argument('--threshold', type=float, default=0.10,
+                             help="Relative increase counted as a regression (0.10 = 10%%)")
+        command.add_argument('--min-seconds', type=float, default=0.05,
+                             help="Ignore timing changes smaller than this many seconds")
+        command.add_argument('--min-mb', type=float, default=10.0,
+                             help="Ignore peak RSS changes smaller than this many MB")
+    run.set_defaults(verbose=False)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        sys.exit(command_run(args))
+    sys.exit(compare_reports(load_report(args.baseline), load_report(args.current), args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: report queries in rdflib's pattern order vs the statistics-driven plan
+Statistics are collected from a synthetic university graph; every query is run
+as translated and as rewritten by the planner, and must give the same rows
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import columnar_eval  # noqa: E402
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from graph_statistics import collect_statistics  # noqa: E402
+from query_planner import QueryPlanner  # noqa: E402
+from query_registry import default_registry  # noqa: E402
+from bench_batch import add_catalog  # noqa: E402
+from bench_store import load  # noqa: E402
+
+QUERIES = ['query1', 'query2', 'query3', 'query4', 'query5', 'query6', 'cross_validation']
+# The report's untyped default matches nothing in the mapped data
+PARAMETERS = {'query5': {'department': 'Computer Science'}}
+
+
+def timed(registry, graph, name):
+    bindings = registry[name].bindings(PARAMETERS.get(name))
+    start = time.perf_counter()
+    records = registry.records(graph, name, bindings)
+    return time.perf_counter() - start, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    parser.add_argument('--store', choices=['memory', 'snapshot'], default='memory')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per variant, alternating; the fastest is reported")
+    args = parser.parse_args()
+
+    graph = Graph()
+    load(graph, args.students, args.enrollments_per_student)
+    add_catalog(graph)
+    start = time.perf_counter()
+    statistics = dict(collect_statistics(graph), graph_version='benchmark')
+    print(f"Graph size: {len(graph):,} triples; statistics collected in {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.store == 'snapshot':
+            ttl_path = os.path.join(tmp, 'graph.ttl')
+            open(ttl_path, 'w').close()
+            write_snapshot(graph, ttl_path, os.path.join(tmp, 'snapshot'))
+            graph = Graph(store=SnapshotStore())
+            graph.open(os.path.join(tmp, 'snapshot'))
+            columnar_eval.enable()
+
+        cache_dir = os.path.join(tmp, 'query_cache')
+        original = default_registry(cache_dir=cache_dir)
+        planned = default_registry(cache_dir=cache_dir, planner=QueryPlanner(statistics))
+
+        print(f"\n{'query':18}{'patterns':>10}{'original (s)':>14}{'planned (s)':>13}{'speedup':>10}")
+        for name in QUERIES:
+            original.prepare(name)
+            planned.prepare(name)
+            original_seconds = planned_seconds = float('inf')
+            for _ in range(args.repeat):
+                seconds, expected = timed(original, graph, name)
+                original_seconds = min(original_seconds, seconds)
+                seconds, records = timed(planned, graph, name)
+                planned_seconds = min(planned_seconds, seconds)
+            # The report queries order their rows totally: same rows, same order
+            assert records == expected, name
+            plans = planned.plans[name]
+            patterns = (f"{sum(len(plan.original) for plan in plans)}->"
+                        f"{sum(len(plan.steps) for plan in plans)}")
+            print(f"{name:18}{patterns:>10}{original_seconds:14.3f}{planned_seconds:13.3f}"
+                  f"{original_seconds / planned_seconds:9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: query-engine cold start from Turtle vs the binary snapshot
+Measures Turtle parse time, snapshot open time, bound-subject point lookups
+and the first query on each
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph, URIRef
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'integration'))
+
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from bench_store import QUERIES, load  # noqa: E402
+
+DATA = 'http://university.edu/data#'
+
+
+def lookup_micros(graph, subjects):
+    """Mean microseconds to fetch every triple of one subject"""
+    start = time.perf_counter()
+    for subject in subjects:
+        for _ in graph.triples((subject, None, None)):
+            pass
+    return (time.perf_counter() - start) / len(subjects) * 1e6
+
+
+def search_micros(store, subjects):
+    """Mean microseconds of the snapshot's binary search alone, without decoding rows"""
+    patterns = [store.encode_pattern((subject, None, None)) for subject in subjects]
+    start = time.perf_counter()
+    for ids in patterns:
+        store.id_range(ids)
+    return (time.perf_counter() - start) / len(patterns) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    args = parser.parse_args()
+
+    graph = Graph()
+    load(graph, args.students, args.enrollments_per_student)
+    print(f"Graph size: {len(graph):,} triples")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl_path = os.path.join(tmp, 'graph.ttl')
+        snapshot_dir = os.path.join(tmp, 'snapshot')
+        graph.serialize(destination=ttl_path, format='turtle', encoding='utf-8')
+
+        start = time.perf_counter()
+        write_snapshot(graph, ttl_path, snapshot_dir)
+        write_seconds = time.perf_counter() - start
+        size_mb = sum(os.path.getsize(os.path.join(snapshot_dir, name))
+                      for name in os.listdir(snapshot_dir)) / 2 ** 20
+
+        start = time.perf_counter()
+        parsed = Graph().parse(ttl_path, format='turtle')
+        parse_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mapped = Graph(store=SnapshotStore())
+        mapped.open(snapshot_dir)
+        open_seconds = time.perf_counter() - start
+
+        print(f"\n{'':34}{'turtle':>12}{'snapshot':>12}")
+        print(f"{'startup (s)':34}{parse_seconds:12.3f}{open_seconds:12.4f}")
+        print(f"{'snapshot write (s)':34}{'-':>12}{write_seconds:12.2f}")
+        print(f"{'on disk (MB)':34}{os.path.getsize(ttl_path) / 2 ** 20:12.1f}{size_mb:12.1f}")
+        step = max(1, args.students // 2000)
+        subjects = [URIRef(f"{DATA}student_{1000000 + i}") for i in range(0, args.students, step)]
+        lookups = [lookup_micros(g, subjects) for g in (parsed, mapped)]
+        search = search_micros(mapped.store, subjects)
+        print(f"{'subject lookup (µs)':34}{lookups[0]:12.1f}{lookups[1]:12.1f}")
+        print(f"{'  of which id search (µs)':34}{'-':>12}{search:12.1f}")
+        for name, query in QUERIES.items():
+            timings = []
+            for g in (parsed, mapped):
+                start = time.perf_counter()
+                rows = sorted(map(tuple, g.query(query)))
+                timings.append((time.perf_counter() - start, rows))
+            assert timings[0][1] == timings[1][1], name
+            print(f"{'first ' + name + ' (ms)':34}{timings[0][0] * 1000:12.1f}{timings[1][0] * 1000:12.1f}")
+
+    # The search is O(log n) and should cost a fraction of a whole in-memory
+    # lookup; an O(n) scan (e.g. a search key NumPy has to upcast the column
+    # for) overtakes it as soon as the graph is of any size
+    if search > lookups[0]:
+        print(f"\n⚠ A snapshot id search takes {search:.0f}µs, more than a whole in-memory lookup "
+              f"({lookups[0]:.0f}µs): is it scanning the column?")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
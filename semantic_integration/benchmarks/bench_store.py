@@ -0,0 +1,128 @@
+"""
+Benchmark: in-memory rdflib graph vs the on-disk SQLite triple store
+Measures load time, reopen time and query latency on a synthetic university graph
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from rdflib import Graph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'integration'))
+
+from sinks import GraphSink  # noqa: E402
+from sqlite_mapper import student_triples, enrollment_triples  # noqa: E402
+from sqlite_store import SQLiteStore  # noqa: E402
+
+MAJORS = ['Computer Science', 'Mathematics', 'Physics', 'Engineering', 'Biology', 'Chemistry']
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C']
+
+QUERIES = {
+    'student_by_id': """
+        PREFIX uni: <http://university.edu/ontology#>
+        SELECT ?firstName ?gpa WHERE {
+            ?student uni:studentID "1000042"^^<http://www.w3.org/2001/XMLSchema#string> ;
+                     uni:firstName ?firstName ;
+                     uni:gpa ?gpa .
+        }""",
+    'enrollments_of_student': """
+        PREFIX uni: <http://university.edu/ontology#>
+        PREFIX data: <http://university.edu/data#>
+        SELECT ?course ?grade WHERE {
+            data:student_1000042 uni:hasEnrollment ?enrollment .
+            ?enrollment uni:enrollmentFor ?course ;
+                        uni:grade ?grade .
+        }""",
+    'count_students': """
+        PREFIX uni: <http://university.edu/ontology#>
+        SELECT (COUNT(?s) AS ?n) WHERE { ?s a uni:Student . }""",
+}
+
+
+def synthetic_batches(students, enrollments_per_student, batch=10000):
+    """Students/Enrollments rows in the shape of students.db, mapped in batches"""
+    out = []
+    enrollment_id = 1
+    for i in range(students):
+        student_id = 1000000 + i
+        out.extend(student_triples((student_id, f"First{i}", f"Last{i}", f"s{i}@university.edu",
+                                    '2002-01-01', 2020 + i % 4, MAJORS[i % len(MAJORS)],
+                                    round(2.0 + (i % 20) / 10, 1))))
+        for j in range(enrollments_per_student):
+            out.extend(enrollment_triples((enrollment_id, student_id, f"C{(i + j) % 500}",
+                                           f"Fall {2020 + j % 4}", GRADES[(i + j) % len(GRADES)], 3)))
+            enrollment_id += 1
+        if len(out) >= batch:
+            yield out
+            out = []
+    if out:
+        yield out
+
+
+def load(graph, students, enrollments_per_student):
+    sink = GraphSink(graph)
+    start = time.perf_counter()
+    for batch in synthetic_batches(students, enrollments_per_student):
+        sink.add(batch)
+    graph.commit()
+    return time.perf_counter() - start
+
+
+def time_queries(graph, repeat):
+    latencies = {}
+    for name, query in QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(graph.query(query))
+        latencies[name] = (time.perf_counter() - start) / repeat
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    memory = Graph()
+    memory_load = load(memory, args.students, args.enrollments_per_student)
+    print(f"Graph size: {len(memory):,} triples")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'store.sqlite')
+        disk = Graph(store=SQLiteStore())
+        disk.open(path, create=True)
+        disk_load = load(disk, args.students, args.enrollments_per_student)
+        disk.close(commit_pending_transaction=True)
+
+        start = time.perf_counter()
+        disk = Graph(store=SQLiteStore())
+        disk.open(path)
+        reopen = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 2 ** 20
+
+        # What the query script paid before: reparsing the serialized graph
+        nt_path = os.path.join(tmp, 'graph.nt')
+        memory.serialize(destination=nt_path, format='nt', encoding='utf-8')
+        start = time.perf_counter()
+        Graph().parse(nt_path, format='nt')
+        reparse = time.perf_counter() - start
+
+        print(f"\n{'':24}{'memory':>12}{'sqlite':>12}")
+        print(f"{'load (s)':24}{memory_load:12.2f}{disk_load:12.2f}")
+        print(f"{'startup (s)':24}{reparse:12.2f}{reopen:12.4f}   (N-Triples reparse vs store open)")
+        print(f"{'store size (MB)':24}{'-':>12}{size_mb:12.1f}")
+
+        memory_latency = time_queries(memory, args.repeat)
+        disk_latency = time_queries(disk, args.repeat)
+        for name in QUERIES:
+            print(f"{name + ' (ms)':24}{memory_latency[name] * 1000:12.1f}{disk_latency[name] * 1000:12.1f}")
+        disk.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,60 +1,42 @@
 """
 Generate heterogeneous data sources for semantic integration
 Domain: University Academic System
+
+Without --scale-factor the small hand-written sample is written. With
+--scale-factor SF the sources are synthesized, dbgen-style: about 10,000 x SF
+students with four to five enrollments each, 200 x SF courses and 80 x SF instructors
+over a fixed catalogue of 30 departments. The output depends only on SF and
+--seed.
 """
 
-import pandas as pd
-import sqlite3
+import argparse
 import json
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from datetime import datetime
-import random
+import os
+import sqlite3
+import time
+from statistics import NormalDist
 
-print("="*70)
-print("GENERATING HETEROGENEOUS DATA SOURCES")
-print("="*70)
+import numpy as np
+import pandas as pd
 
-# Set random seed for reproducibility
-random.seed(42)
+parser = argparse.ArgumentParser(description="Generate the university data sources")
+parser.add_argument('--scale-factor', type=float, default=None,
+                    help="Synthesize ~10,000 x SF students instead of writing the hand-written sample "
+                         "(1 = ~38k enrollments, 100 = ~1M students and ~4.8M enrollments)")
+parser.add_argument('--seed', type=int, default=42,
+                    help="Seed of the synthetic generator; the same SF and seed give identical sources")
+parser.add_argument('--output-dir', default='data_sources',
+                    help="Directory the sources are written to")
+args = parser.parse_args()
+
+DB_PATH = os.path.join(args.output_dir, 'students.db')
+XML_PATH = os.path.join(args.output_dir, 'courses.xml')
+CSV_PATH = os.path.join(args.output_dir, 'departments.csv')
+SCHEMAS_PATH = os.path.join(args.output_dir, 'schemas.json')
 
 # ============================================================================
-# DATA SOURCE 1: SQLite Relational Database (Students and Enrollments)
+# Hand-written sample
 # ============================================================================
-print("\n1. Creating SQLite Database (students.db)...")
-
-# Connect to SQLite database
-conn = sqlite3.connect('data_sources/students.db')
-cursor = conn.cursor()
-
-# Create Students table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS Students (
-    student_id INTEGER PRIMARY KEY,
-    first_name TEXT NOT NULL,
-    last_name TEXT NOT NULL,
-    email TEXT UNIQUE,
-    date_of_birth TEXT,
-    enrollment_year INTEGER,
-    major TEXT,
-    gpa REAL
-)
-''')
-
-# Create Enrollments table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS Enrollments (
-    enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    student_id INTEGER,
-    course_code TEXT,
-    semester TEXT,
-    grade TEXT,
-    credits INTEGER,
-    FOREIGN KEY (student_id) REFERENCES Students(student_id)
-)
-''')
-
-# Generate student data
 students_data = [
     (1001, 'John', 'Smith', 'john.smith@university.edu', '2002-05-15', 2021, 'Computer Science', 3.7),
     (1002, 'Emily', 'Johnson', 'emily.j@university.edu', '2001-08-22', 2020, 'Mathematics', 3.9),
@@ -68,9 +50,6 @@ students_data = [
     (1010, 'Jennifer', 'Martinez', 'jennifer.m@university.edu', '2003-04-20', 2022, 'Engineering', 3.8),
 ]
 
-cursor.executemany('INSERT INTO Students VALUES (?,?,?,?,?,?,?,?)', students_data)
-
-# Generate enrollment data
 enrollments_data = [
     (1001, 'CS101', 'Fall 2021', 'A', 3),
     (1001, 'CS201', 'Spring 2022', 'A-', 3),
@@ -89,87 +68,392 @@ enrollments_data = [
     (1005, 'MATH150', 'Fall 2020', 'B', 4),
 ]
 
-cursor.executemany('INSERT INTO Enrollments (student_id, course_code, semester, grade, credits) VALUES (?,?,?,?,?)', 
-                   enrollments_data)
-
-conn.commit()
-conn.close()
-
-print(f"   ✓ Created Students table with {len(students_data)} records")
-print(f"   ✓ Created Enrollments table with {len(enrollments_data)} records")
-
-# ============================================================================
-# DATA SOURCE 2: XML File (Courses and Instructors)
-# ============================================================================
-print("\n2. Creating XML File (courses.xml)...")
-
-# Create root element
-root = ET.Element('UniversityCourses')
-root.set('xmlns', 'http://university.edu/courses')
-root.set('version', '1.0')
-
-# Course data
 courses = [
-    {'code': 'CS101', 'name': 'Introduction to Programming', 'dept': 'Computer Science', 
+    {'code': 'CS101', 'name': 'Introduction to Programming', 'dept': 'Computer Science',
      'credits': 3, 'instructor': 'Dr. Alan Turing', 'instructor_id': 'I001'},
-    {'code': 'CS201', 'name': 'Data Structures', 'dept': 'Computer Science', 
+    {'code': 'CS201', 'name': 'Data Structures', 'dept': 'Computer Science',
      'credits': 3, 'instructor': 'Dr. Grace Hopper', 'instructor_id': 'I002'},
-    {'code': 'MATH150', 'name': 'Calculus I', 'dept': 'Mathematics', 
+    {'code': 'MATH150', 'name': 'Calculus I', 'dept': 'Mathematics',
      'credits': 4, 'instructor': 'Dr. Emmy Noether', 'instructor_id': 'I003'},
-    {'code': 'MATH201', 'name': 'Linear Algebra', 'dept': 'Mathematics', 
+    {'code': 'MATH201', 'name': 'Linear Algebra', 'dept': 'Mathematics',
      'credits': 4, 'instructor': 'Dr. Carl Gauss', 'instructor_id': 'I004'},
-    {'code': 'MATH301', 'name': 'Abstract Algebra', 'dept': 'Mathematics', 
+    {'code': 'MATH301', 'name': 'Abstract Algebra', 'dept': 'Mathematics',
      'credits': 3, 'instructor': 'Dr. Emmy Noether', 'instructor_id': 'I003'},
-    {'code': 'PHYS201', 'name': 'Classical Mechanics', 'dept': 'Physics', 
+    {'code': 'PHYS201', 'name': 'Classical Mechanics', 'dept': 'Physics',
      'credits': 4, 'instructor': 'Dr. Isaac Newton', 'instructor_id': 'I005'},
-    {'code': 'PHYS301', 'name': 'Quantum Mechanics', 'dept': 'Physics', 
+    {'code': 'PHYS301', 'name': 'Quantum Mechanics', 'dept': 'Physics',
      'credits': 3, 'instructor': 'Dr. Marie Curie', 'instructor_id': 'I006'},
-    {'code': 'ENG101', 'name': 'Engineering Fundamentals', 'dept': 'Engineering', 
+    {'code': 'ENG101', 'name': 'Engineering Fundamentals', 'dept': 'Engineering',
      'credits': 3, 'instructor': 'Dr. Nikola Tesla', 'instructor_id': 'I007'},
-    {'code': 'ENG201', 'name': 'Thermodynamics', 'dept': 'Engineering', 
+    {'code': 'ENG201', 'name': 'Thermodynamics', 'dept': 'Engineering',
      'credits': 4, 'instructor': 'Dr. James Watt', 'instructor_id': 'I008'},
-    {'code': 'ENG301', 'name': 'Control Systems', 'dept': 'Engineering', 
+    {'code': 'ENG301', 'name': 'Control Systems', 'dept': 'Engineering',
      'credits': 3, 'instructor': 'Dr. Nikola Tesla', 'instructor_id': 'I007'},
 ]
 
-for course in courses:
-    course_elem = ET.SubElement(root, 'Course')
-    course_elem.set('courseCode', course['code'])
-    
-    ET.SubElement(course_elem, 'CourseName').text = course['name']
-    ET.SubElement(course_elem, 'Department').text = course['dept']
-    ET.SubElement(course_elem, 'Credits').text = str(course['credits'])
-    
-    instructor_elem = ET.SubElement(course_elem, 'Instructor')
-    instructor_elem.set('instructorID', course['instructor_id'])
-    instructor_elem.text = course['instructor']
-
-# Pretty print XML
-xml_str = minidom.parseString(ET.tostring(root)).toprettyxml(indent='  ')
-
-with open('data_sources/courses.xml', 'w', encoding='utf-8') as f:
-    f.write(xml_str)
-
-print(f"   ✓ Created courses.xml with {len(courses)} courses")
-
-# ============================================================================
-# DATA SOURCE 3: CSV File (Departments and Faculty)
-# ============================================================================
-print("\n3. Creating CSV File (departments.csv)...")
-
 departments_data = {
     'department_id': ['D001', 'D002', 'D003', 'D004', 'D005', 'D006'],
     'department_name': ['Computer Science', 'Mathematics', 'Physics', 'Engineering', 'Biology', 'Chemistry'],
     'building': ['Tech Center', 'Science Hall', 'Physics Building', 'Engineering Complex', 'Life Sciences', 'Chemistry Lab'],
-    'head_of_department': ['Dr. Donald Knuth', 'Dr. Emmy Noether', 'Dr. Richard Feynman', 
+    'head_of_department': ['Dr. Donald Knuth', 'Dr. Emmy Noether', 'Dr. Richard Feynman',
                            'Dr. Nikola Tesla', 'Dr. Charles Darwin', 'Dr. Marie Curie'],
     'faculty_count': [15, 12, 10, 18, 14, 11],
     'established_year': [1985, 1970, 1975, 1980, 1972, 1978],
     'budget': [2500000, 1800000, 1500000, 3000000, 1600000, 1700000]
 }
 
+# ============================================================================
+# Scale-factor generator
+# ============================================================================
+STUDENTS_PER_SF = 10000
+COURSES_PER_SF = 200
+INSTRUCTORS_PER_SF = 80
+# Students are generated and inserted in fixed-size chunks, so memory stays
+# flat and the random stream (and so the output) does not depend on SF splits
+CHUNK_STUDENTS = 100000
+FIRST_YEAR, LAST_YEAR = 2019, 2024
+
+# (name, course code prefix, building, relative share of majors)
+DEPARTMENTS = [
+    ('Computer Science', 'CS', 'Tech Center', 14), ('Mathematics', 'MATH', 'Science Hall', 6),
+    ('Physics', 'PHYS', 'Physics Building', 4), ('Engineering', 'ENG', 'Engineering Complex', 11),
+    ('Biology', 'BIO', 'Life Sciences', 9), ('Chemistry', 'CHEM', 'Chemistry Lab', 5),
+    ('Economics', 'ECON', 'Commerce Hall', 8), ('Psychology', 'PSY', 'Behavioral Sciences', 9),
+    ('History', 'HIST', 'Humanities Hall', 3), ('English', 'ENGL', 'Humanities Hall', 3),
+    ('Philosophy', 'PHIL', 'Humanities Hall', 2), ('Political Science', 'POLS', 'Social Sciences', 4),
+    ('Sociology', 'SOC', 'Social Sciences', 3), ('Business Administration', 'BUS', 'Commerce Hall', 12),
+    ('Nursing', 'NURS', 'Health Sciences', 7), ('Statistics', 'STAT', 'Science Hall', 3),
+    ('Environmental Science', 'ENVS', 'Life Sciences', 2), ('Art', 'ART', 'Fine Arts Center', 2),
+    ('Music', 'MUS', 'Fine Arts Center', 1), ('Linguistics', 'LING', 'Humanities Hall', 1),
+    ('Anthropology', 'ANTH', 'Social Sciences', 1), ('Geology', 'GEOL', 'Earth Sciences', 1),
+    ('Astronomy', 'ASTR', 'Physics Building', 1), ('Architecture', 'ARCH', 'Design Studio', 2),
+    ('Education', 'EDU', 'Education Building', 4), ('Communication', 'COMM', 'Media Center', 4),
+    ('Neuroscience', 'NEUR', 'Health Sciences', 2), ('Public Health', 'PUBH', 'Health Sciences', 3),
+    ('Data Science', 'DS', 'Tech Center', 5), ('Materials Science', 'MSE', 'Engineering Complex', 1),
+]
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Christopher', 'Lisa', 'Daniel', 'Nancy', 'Matthew', 'Betty', 'Anthony', 'Sandra', 'Mark', 'Margaret',
+    'Donald', 'Ashley', 'Steven', 'Kimberly', 'Andrew', 'Emily', 'Paul', 'Donna', 'Joshua', 'Michelle',
+    'Kenneth', 'Carol', 'Kevin', 'Amanda', 'Brian', 'Melissa', 'George', 'Deborah', 'Timothy', 'Stephanie',
+    'Ronald', 'Dorothy', 'Jason', 'Rebecca', 'Edward', 'Sharon', 'Jeffrey', 'Laura', 'Ryan', 'Cynthia',
+    'Jacob', 'Amy', 'Gary', 'Kathleen', 'Nicholas', 'Angela', 'Eric', 'Shirley', 'Jonathan', 'Brenda',
+    'Stephen', 'Emma', 'Larry', 'Anna', 'Justin', 'Pamela', 'Scott', 'Nicole', 'Brandon', 'Samantha',
+    'Benjamin', 'Katherine', 'Samuel', 'Christine', 'Gregory', 'Helen', 'Alexander', 'Debra', 'Patrick',
+    'Rachel', 'Frank', 'Carolyn', 'Raymond', 'Janet', 'Jack', 'Maria', 'Dennis', 'Olivia', 'Jerry', 'Heather',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+    'Green', 'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell', 'Carter', 'Roberts',
+    'Gomez', 'Phillips', 'Evans', 'Turner', 'Diaz', 'Parker', 'Cruz', 'Edwards', 'Collins', 'Reyes',
+    'Stewart', 'Morris', 'Morales', 'Murphy', 'Cook', 'Rogers', 'Gutierrez', 'Ortiz', 'Morgan', 'Cooper',
+    'Peterson', 'Bailey', 'Reed', 'Kelly', 'Howard', 'Ramos', 'Kim', 'Cox', 'Ward', 'Richardson',
+    'Watson', 'Brooks', 'Chavez', 'Wood', 'James', 'Bennett', 'Gray', 'Mendoza', 'Ruiz', 'Hughes',
+    'Price', 'Alvarez', 'Castillo', 'Sanders', 'Patel', 'Myers', 'Long', 'Ross', 'Foster', 'Jimenez',
+]
+COURSE_TITLES = ['Introduction to', 'Foundations of', 'Principles of', 'Methods in', 'Topics in',
+                 'Applied', 'Advanced', 'Research Seminar in']
+
+GRADES = np.array(['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'D', 'F'], dtype=object)
+GRADE_POINTS = np.array([4.0, 3.7, 3.3, 3.0, 2.7, 2.3, 2.0, 1.0, 0.0])
+# Share of each grade, best first; a student's grades are drawn around their ability
+GRADE_SHARES = [0.20, 0.15, 0.17, 0.15, 0.10, 0.08, 0.07, 0.05, 0.03]
+ABILITY_NOISE = 0.8
+GRADE_CUTS = -np.array([NormalDist(0, (1 + ABILITY_NOISE ** 2) ** 0.5).inv_cdf(share)
+                        for share in np.cumsum(GRADE_SHARES)[:-1]])
+CREDITS = np.array([3, 4, 2, 1])
+CREDIT_SHARES = [0.60, 0.30, 0.07, 0.03]
+# Enrollments per semester studied, and the share taken in the student's major
+ENROLLMENTS_PER_SEMESTER = 1.0
+MAJOR_SHARE = 0.7
+
+
+def zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def instructor_name(i):
+    """Distinct for every index: first x last name, then a middle initial"""
+    per_initial = len(FIRST_NAMES) * len(LAST_NAMES)
+    initial = f"{chr(ord('A') + (i // per_initial - 1) % 26)}. " if i >= per_initial else ''
+    return f"Dr. {FIRST_NAMES[i % len(FIRST_NAMES)]} {initial}{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+
+
+def generate_catalog(rng, scale_factor):
+    """
+    Departments, courses and instructors. Courses and instructors are split
+    across departments by their share of majors; within a department, lower
+    course numbers are more popular (Zipf), and the first instructor heads it.
+    """
+    shares = np.array([share for *_, share in DEPARTMENTS], dtype=float)
+    shares /= shares.sum()
+    n_departments = len(DEPARTMENTS)
+    n_courses = max(n_departments, round(COURSES_PER_SF * scale_factor))
+    n_instructors = max(n_departments, round(INSTRUCTORS_PER_SF * scale_factor))
+    course_counts = 1 + rng.multinomial(n_courses - n_departments, shares)
+    instructor_counts = 1 + rng.multinomial(n_instructors - n_departments, shares)
+    instructor_starts = np.concatenate([[0], np.cumsum(instructor_counts)[:-1]])
+
+    course_department = np.repeat(np.arange(n_departments), course_counts)
+    course_rank = np.concatenate([np.arange(count) for count in course_counts])
+    course_credits = rng.choice(CREDITS, size=n_courses, p=CREDIT_SHARES)
+    course_instructor = (instructor_starts[course_department]
+                         + (rng.random(n_courses) * instructor_counts[course_department]).astype(np.int64))
+    # The head teaches the department's first course, so the CSV can link them
+    course_starts = np.concatenate([[0], np.cumsum(course_counts)[:-1]])
+    course_instructor[course_starts] = instructor_starts
+    popularity = np.concatenate([zipf_weights(count, 0.8) for count in course_counts])
+
+    courses = []
+    for i in range(n_courses):
+        name, prefix, _, _ = DEPARTMENTS[course_department[i]]
+        rank = int(course_rank[i])
+        title = f"{COURSE_TITLES[rank % len(COURSE_TITLES)]} {name}"
+        if rank >= len(COURSE_TITLES):
+            title += f" {rank // len(COURSE_TITLES) + 1}"
+        courses.append({'code': f"{prefix}{100 + rank}", 'name': title, 'dept': name,
+                        'credits': int(course_credits[i]),
+                        'instructor': instructor_name(int(course_instructor[i])),
+                        'instructor_id': f"I{course_instructor[i] + 1:05d}"})
+
+    established = rng.integers(1900, 2001, size=n_departments)
+    budget_per_faculty = rng.integers(80, 200, size=n_departments) * 1000
+    departments = {
+        'department_id': [f"D{i + 1:03d}" for i in range(n_departments)],
+        'department_name': [name for name, *_ in DEPARTMENTS],
+        'building': [building for _, _, building, _ in DEPARTMENTS],
+        'head_of_department': [instructor_name(int(start)) for start in instructor_starts],
+        'faculty_count': instructor_counts.tolist(),
+        'established_year': established.tolist(),
+        'budget': (instructor_counts * budget_per_faculty).tolist(),
+    }
+
+    # Cumulative popularity over courses grouped by department: a uniform
+    # draw inside a department's segment picks one of its courses
+    cumulative = np.cumsum(popularity)
+    segment_low = np.concatenate([[0.0], cumulative])[course_starts]
+    segment_high = cumulative[course_starts + course_counts - 1]
+    sampler = {
+        'shares': shares, 'cumulative': cumulative, 'low': segment_low, 'high': segment_high,
+        'codes': np.array([course['code'] for course in courses], dtype=object),
+        'credits': course_credits,
+    }
+    return courses, departments, sampler
+
+
+def semester_labels():
+    """Label of every semester code year * 2 + (0 Spring, 1 Fall) the generator can emit"""
+    labels = {}
+    for year in range(FIRST_YEAR, LAST_YEAR + 5):
+        labels[year * 2] = f"Spring {year}"
+        labels[year * 2 + 1] = f"Fall {year}"
+    table = np.empty(max(labels) + 1, dtype=object)
+    for code, label in labels.items():
+        table[code] = label
+    return table
+
+
+def generate_students(rng, first_id, n, sampler, semesters, first_enrollment_id):
+    """
+    One chunk of students and their enrollments, with ids from first_id and
+    first_enrollment_id. Each student has an ability that shifts all their
+    grades; the GPA is their credit-weighted grade average.
+    """
+    departments = np.array([name for name, *_ in DEPARTMENTS], dtype=object)
+    ids = np.arange(first_id, first_id + n)
+    year = rng.choice(np.arange(FIRST_YEAR, LAST_YEAR + 1), size=n, p=zipf_weights(6, 0.3)[::-1])
+    major = rng.choice(len(DEPARTMENTS), size=n, p=sampler['shares'])
+    first = np.array(FIRST_NAMES, dtype=object)[rng.choice(len(FIRST_NAMES), size=n,
+                                                           p=zipf_weights(len(FIRST_NAMES), 0.7))]
+    last = np.array(LAST_NAMES, dtype=object)[rng.choice(len(LAST_NAMES), size=n,
+                                                         p=zipf_weights(len(LAST_NAMES), 0.7))]
+    birth_year = year - 18 - rng.choice(3, size=n, p=[0.6, 0.3, 0.1])
+    birth_date = ((birth_year - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+                  + rng.integers(0, 365, size=n))
+    ability = rng.normal(0.0, 1.0, size=n)
+
+    # Semesters from Fall of the entry year to Fall LAST_YEAR, at most eight
+    studied = np.minimum(8, 2 * (LAST_YEAR - year) + 1)
+    counts = rng.poisson(ENROLLMENTS_PER_SEMESTER * studied)
+    student = np.repeat(np.arange(n), counts)
+    m = len(student)
+    term = (rng.random(m) * studied[student]).astype(np.int64)
+    semester = year[student] * 2 + 1 + term
+    in_major = rng.random(m) < MAJOR_SHARE
+    department = np.where(in_major, major[student], rng.choice(len(DEPARTMENTS), size=m, p=sampler['shares']))
+    low, high = sampler['low'][department], sampler['high'][department]
+    course = np.searchsorted(sampler['cumulative'], low + rng.random(m) * (high - low), side='right')
+    course = np.minimum(course, len(sampler['codes']) - 1)
+    grade = np.searchsorted(-GRADE_CUTS, -(ability[student] + rng.normal(0.0, ABILITY_NOISE, size=m)))
+    credits = sampler['credits'][course]
+
+    # In student and semester order, keeping only the first time a student takes a course
+    order = np.lexsort((course, semester, student))
+    _, first_taken = np.unique(student[order] * len(sampler['codes']) + course[order], return_index=True)
+    order = order[np.sort(first_taken)]
+    student, semester, course, grade, credits = (
+        student[order], semester[order], course[order], grade[order], credits[order])
+
+    attempted = np.bincount(student, weights=credits, minlength=n)
+    earned = np.bincount(student, weights=GRADE_POINTS[grade] * credits, minlength=n)
+    # Students without enrollments keep a GPA from their ability alone
+    gpa = np.where(attempted > 0, earned / np.maximum(attempted, 1), np.clip(3.0 + 0.5 * ability, 0.0, 4.0))
+    gpa = np.round(gpa, 2)
+
+    first_list, last_list = first.tolist(), last.tolist()
+    ids_list = ids.tolist()
+    students = list(zip(
+        ids_list, first_list, last_list,
+        [f"{f.lower()}.{l.lower()}{i}@university.edu" for f, l, i in zip(first_list, last_list, ids_list)],
+        np.datetime_as_string(birth_date, unit='D').tolist(), year.tolist(),
+        departments[major].tolist(), gpa.tolist()))
+    enrollments = list(zip(
+        range(first_enrollment_id, first_enrollment_id + len(student)), ids[student].tolist(),
+        sampler['codes'][course].tolist(), semesters[semester].tolist(), GRADES[grade].tolist(),
+        credits.tolist()))
+    return students, enrollments
+
+
+# ============================================================================
+# Writers
+# ============================================================================
+def open_database(path):
+    """A new database with the source schema, tuned for one bulk load"""
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    # Nothing to protect until the file is complete: no journal, no fsync
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -262144")
+    # Same schema text as the original sample database
+    conn.execute('''
+CREATE TABLE IF NOT EXISTS Students (
+    student_id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    email TEXT UNIQUE,
+    date_of_birth TEXT,
+    enrollment_year INTEGER,
+    major TEXT,
+    gpa REAL
+)
+''')
+    conn.execute('''
+CREATE TABLE IF NOT EXISTS Enrollments (
+    enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER,
+    course_code TEXT,
+    semester TEXT,
+    grade TEXT,
+    credits INTEGER,
+    FOREIGN KEY (student_id) REFERENCES Students(student_id)
+)
+''')
+    return conn
+
+
+def close_database(conn, path):
+    # Everything went in as one transaction
+    conn.commit()
+    conn.close()
+    os.replace(f"{path}.tmp", path)
+
+
+def _xml_escape(value):
+    # minidom's escaping, so the sample file keeps its previous bytes
+    return (str(value).replace('&', '&amp;').replace('<', '&lt;')
+            .replace('"', '&quot;').replace('>', '&gt;'))
+
+
+def write_courses_xml(path, courses):
+    """Write <Course> elements as they come, in the layout minidom's pretty-printer used"""
+    count = 0
+    instructors = set()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" ?>\n')
+        f.write('<UniversityCourses xmlns="http://university.edu/courses" version="1.0">\n')
+        for course in courses:
+            f.write(f'  <Course courseCode="{_xml_escape(course["code"])}">\n'
+                    f'    <CourseName>{_xml_escape(course["name"])}</CourseName>\n'
+                    f'    <Department>{_xml_escape(course["dept"])}</Department>\n'
+                    f'    <Credits>{course["credits"]}</Credits>\n'
+                    f'    <Instructor instructorID="{_xml_escape(course["instructor_id"])}">'
+                    f'{_xml_escape(course["instructor"])}</Instructor>\n'
+                    f'  </Course>\n')
+            count += 1
+            instructors.add(course['instructor_id'])
+        f.write('</UniversityCourses>\n')
+    return count, len(instructors)
+
+
+print("="*70)
+print("GENERATING HETEROGENEOUS DATA SOURCES")
+print("="*70)
+if args.scale_factor is not None:
+    print(f"\nScale factor {args.scale_factor:g}, seed {args.seed}")
+start = time.perf_counter()
+
+if args.scale_factor is not None:
+    rng = np.random.default_rng(args.seed)
+    courses, departments_data, sampler = generate_catalog(rng, args.scale_factor)
+
+# ============================================================================
+# DATA SOURCE 1: SQLite Relational Database (Students and Enrollments)
+# ============================================================================
+print("\n1. Creating SQLite Database (students.db)...")
+
+os.makedirs(args.output_dir, exist_ok=True)
+conn = open_database(DB_PATH)
+if args.scale_factor is None:
+    conn.executemany('INSERT INTO Students VALUES (?,?,?,?,?,?,?,?)', students_data)
+    conn.executemany('INSERT INTO Enrollments (student_id, course_code, semester, grade, credits) '
+                     'VALUES (?,?,?,?,?)', enrollments_data)
+    student_count, enrollment_count = len(students_data), len(enrollments_data)
+else:
+    total_students = max(1, round(STUDENTS_PER_SF * args.scale_factor))
+    semesters = semester_labels()
+    student_count = enrollment_count = 0
+    for first in range(0, total_students, CHUNK_STUDENTS):
+        students, enrollments = generate_students(rng, 1001 + first, min(CHUNK_STUDENTS, total_students - first),
+                                                  sampler, semesters, enrollment_count + 1)
+        conn.executemany('INSERT INTO Students VALUES (?,?,?,?,?,?,?,?)', students)
+        conn.executemany('INSERT INTO Enrollments VALUES (?,?,?,?,?,?)', enrollments)
+        student_count += len(students)
+        enrollment_count += len(enrollments)
+        if total_students > CHUNK_STUDENTS:
+            print(f"   ... {student_count:,} students, {enrollment_count:,} enrollments "
+                  f"({time.perf_counter() - start:.1f}s)")
+close_database(conn, DB_PATH)
+
+print(f"   ✓ Created Students table with {student_count:,} records")
+print(f"   ✓ Created Enrollments table with {enrollment_count:,} records")
+
+# ============================================================================
+# DATA SOURCE 2: XML File (Courses and Instructors)
+# ============================================================================
+print("\n2. Creating XML File (courses.xml)...")
+
+course_count, instructor_count = write_courses_xml(XML_PATH, courses)
+
+print(f"   ✓ Created courses.xml with {course_count:,} courses")
+
+# ============================================================================
+# DATA SOURCE 3: CSV File (Departments and Faculty)
+# ============================================================================
+print("\n3. Creating CSV File (departments.csv)...")
+
 df_departments = pd.DataFrame(departments_data)
-df_departments.to_csv('data_sources/departments.csv', index=False)
+df_departments.to_csv(CSV_PATH, index=False)
 
 print(f"   ✓ Created departments.csv with {len(df_departments)} departments")
 
@@ -184,13 +468,13 @@ schemas = {
         "file": "students.db",
         "tables": {
             "Students": {
-                "columns": ["student_id", "first_name", "last_name", "email", 
+                "columns": ["student_id", "first_name", "last_name", "email",
                            "date_of_birth", "enrollment_year", "major", "gpa"],
                 "primary_key": "student_id",
                 "description": "Student personal and academic information"
             },
             "Enrollments": {
-                "columns": ["enrollment_id", "student_id", "course_code", 
+                "columns": ["enrollment_id", "student_id", "course_code",
                            "semester", "grade", "credits"],
                 "primary_key": "enrollment_id",
                 "foreign_keys": {"student_id": "Students.student_id"},
@@ -232,7 +516,7 @@ schemas = {
     }
 }
 
-with open('data_sources/schemas.json', 'w', encoding='utf-8') as f:
+with open(SCHEMAS_PATH, 'w', encoding='utf-8') as f:
     json.dump(schemas, f, indent=2)
 
 print(f"   ✓ Created schemas.json documentation")
@@ -244,16 +528,16 @@ print("\n" + "="*70)
 print("DATA GENERATION SUMMARY")
 print("="*70)
 print(f"\n✓ Data Source 1 (Relational): SQLite database 'students.db'")
-print(f"    - Students table: {len(students_data)} records")
-print(f"    - Enrollments table: {len(enrollments_data)} records")
+print(f"    - Students table: {student_count:,} records")
+print(f"    - Enrollments table: {enrollment_count:,} records")
 
 print(f"\n✓ Data Source 2 (Semi-structured): XML file 'courses.xml'")
-print(f"    - Courses: {len(courses)} records")
-print(f"    - Unique instructors: {len(set(c['instructor_id'] for c in courses))}")
+print(f"    - Courses: {course_count:,} records")
+print(f"    - Unique instructors: {instructor_count:,}")
 
 print(f"\n✓ Data Source 3 (Tabular): CSV file 'departments.csv'")
 print(f"    - Departments: {len(df_departments)} records")
 
 print(f"\n✓ Schema documentation: 'schemas.json'")
-print("\nAll data sources created successfully!")
+print(f"\nAll data sources created successfully in {time.perf_counter() - start:.1f}s!")
 print("="*70)
@@ -0,0 +1,324 @@
+"""
+Binary graph snapshot
+Dictionary-encoded terms plus sorted integer triple permutations (SPO, POS,
+OSP), written next to the Turtle output and opened with memory mapping, so a
+query process starts without parsing the graph and every triple pattern is a
+range lookup.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+
+import numpy as np
+import rdflib
+from rdflib import BNode, Literal, URIRef
+from rdflib.store import Store, VALID_STORE, NO_STORE
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = 'output/snapshot'
+
+URI, BNODE, LITERAL = 0, 1, 2
+
+FILES = {
+    'values': 'term_values.npy',
+    'offsets': 'term_offsets.npy',
+    'kinds': 'term_kinds.npy',
+    'datatypes': 'term_datatypes.npy',
+    'langs': 'term_langs.npy',
+    'spo': 'triples_spo.npy',
+    'pos': 'triples_pos.npy',
+    'osp': 'triples_osp.npy',
+}
+
+# Column order of each permutation, as positions in an (s, p, o) triple
+PERMUTATIONS = {
+    'spo': (0, 1, 2),
+    'pos': (1, 2, 0),
+    'osp': (2, 0, 1),
+}
+
+
+def fingerprint(path, previous=None):
+    """Size, mtime and SHA-256 of a file; the hash is reused when size and mtime are unchanged"""
+    stat = os.stat(path)
+    result = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        result['sha256'] = previous['sha256']
+        return result
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    result['sha256'] = digest.hexdigest()
+    return result
+
+
+def _term_key(term):
+    if isinstance(term, Literal):
+        return (LITERAL, str(term), str(term.datatype or ''), term.language or '')
+    if isinstance(term, BNode):
+        return (BNODE, str(term), '', '')
+    return (URI, str(term), '', '')
+
+
+def write_snapshot(graph, source_path, directory=SNAPSHOT_DIR):
+    """
+    Write graph as a snapshot of source_path (the serialization it mirrors).
+
+    Terms are sorted by (kind, value, datatype, lang) so a term's id is its
+    rank and lookups are a binary search. Triples are stored three times as
+    (n, 3) id arrays, each lexicographically sorted in its permutation's
+    column order, so any combination of bound terms is a prefix range.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    keys = {}
+    for triple in graph:
+        for term in triple:
+            if term not in keys:
+                keys[term] = _term_key(term)
+    ordered = sorted(keys.items(), key=lambda item: item[1])
+    ids = {term: i for i, (term, _) in enumerate(ordered)}
+
+    datatypes = sorted({key[2] for _, key in ordered if key[2]})
+    langs = sorted({key[3] for _, key in ordered if key[3]})
+    datatype_ids = {datatype: i for i, datatype in enumerate(datatypes)}
+    lang_ids = {lang: i for i, lang in enumerate(langs)}
+
+    encoded = [key[1].encode('utf-8') for _, key in ordered]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    id_type = np.int32 if len(ordered) < 2 ** 31 else np.int64
+
+    arrays = {
+        'values': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        'offsets': offsets,
+        'kinds': np.array([key[0] for _, key in ordered], dtype=np.uint8),
+        'datatypes': np.array([datatype_ids.get(key[2], -1) for _, key in ordered], dtype=np.int32),
+        'langs': np.array([lang_ids.get(key[3], -1) for _, key in ordered], dtype=np.int32),
+    }
+
+    count = len(graph)
+    spo = np.fromiter((ids[term] for triple in graph for term in triple),
+                      dtype=id_type, count=count * 3).reshape(count, 3)
+    for name, columns in PERMUTATIONS.items():
+        permuted = spo[:, columns]
+        arrays[name] = permuted[np.lexsort((permuted[:, 2], permuted[:, 1], permuted[:, 0]))]
+
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, FILES[name]), array)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'rdflib': rdflib.__version__,
+        'triples': count,
+        'terms': len(ordered),
+        'datatypes': datatypes,
+        'langs': langs,
+        'namespaces': [[prefix, str(uri)] for prefix, uri in graph.namespaces()],
+        'source': fingerprint(source_path),
+    }
+    # meta.json goes last: a snapshot without it is never opened
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def snapshot_status(source_path, directory=SNAPSHOT_DIR):
+    """
+    (meta, None) when the snapshot matches source_path, else (None, reason).
+    A size/mtime match is trusted; otherwise the source is rehashed, so a
+    copied or touched but identical file still counts as fresh.
+    """
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None, 'no snapshot'
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != SNAPSHOT_VERSION:
+        return None, f"snapshot format {meta.get('version')} != {SNAPSHOT_VERSION}"
+    if not os.path.exists(source_path):
+        return None, f"{source_path} missing"
+    if fingerprint(source_path, meta['source'])['sha256'] != meta['source']['sha256']:
+        return None, f"{source_path} changed since the snapshot was written"
+    return meta, None
+
+
+class SnapshotStore(Store):
+    """
+    Read-only rdflib store over a snapshot directory (the configuration).
+
+    Arrays are memory-mapped, so opening costs a few file opens whatever the
+    graph size. Terms are decoded on first use and cached; bound pattern
+    terms are found by binary search over the sorted term table.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self.meta = None
+        self._terms = {}
+        self._ids = {}
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        meta_path = os.path.join(configuration, 'meta.json')
+        if not os.path.exists(meta_path):
+            return NO_STORE
+        with open(meta_path, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        for name, file_name in FILES.items():
+            setattr(self, f"_{name}", np.load(os.path.join(configuration, file_name), mmap_mode='r'))
+        self._datatype_uris = [URIRef(datatype) for datatype in self.meta['datatypes']]
+        self._term_count = self.meta['terms']
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        self.meta = None
+
+    # ------------------------------------------------------------------ #
+    # Term dictionary
+    # ------------------------------------------------------------------ #
+    def _value(self, term_id):
+        return bytes(self._values[self._offsets[term_id]:self._offsets[term_id + 1]]).decode('utf-8')
+
+    def _key(self, term_id):
+        kind = int(self._kinds[term_id])
+        datatype = int(self._datatypes[term_id])
+        lang = int(self._langs[term_id])
+        return (kind, self._value(term_id),
+                self.meta['datatypes'][datatype] if datatype >= 0 else '',
+                self.meta['langs'][lang] if lang >= 0 else '')
+
+    def _decode(self, term_id):
+        term = self._terms.get(term_id)
+        if term is None:
+            kind, value, datatype, lang = self._key(term_id)
+            if kind == LITERAL:
+                term = Literal(value, datatype=URIRef(datatype) if datatype else None, lang=lang or None)
+            elif kind == BNODE:
+                term = BNode(value)
+            else:
+                term = URIRef(value)
+            self._terms[term_id] = term
+        return term
+
+    def decode_column(self, ids):
+        """Terms for an array of ids, decoding each distinct id once"""
+        distinct, inverse = np.unique(ids, return_inverse=True)
+        terms = [self._decode(term_id) for term_id in distinct.tolist()]
+        return [terms[i] for i in inverse.ravel().tolist()]
+
+    def _lookup(self, term):
+        """Id of a term, or None when the snapshot does not contain it"""
+        if term in self._ids:
+            return self._ids[term]
+        key = _term_key(term)
+        position = bisect.bisect_left(range(self._term_count), key, key=self._key)
+        term_id = position if position < self._term_count and self._key(position) == key else None
+        self._ids[term] = term_id
+        return term_id
+
+    # ------------------------------------------------------------------ #
+    # Triples
+    # ------------------------------------------------------------------ #
+    def encode_pattern(self, triple_pattern):
+        """Term ids of a pattern's bound terms (None for unbound); None when a term is unknown"""
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._lookup(term)
+            if term_id is None:
+                return None
+            ids.append(term_id)
+        return ids
+
+    @staticmethod
+    def permutation(bound):
+        """Name of the permutation whose sort prefix covers the bound (s, p, o) positions"""
+        s, p, o = bound
+        if s:
+            return 'osp' if o and not p else 'spo'
+        return 'pos' if p else 'osp'
+
+    def id_range(self, ids):
+        """
+        Rows matching an id pattern, as (rows, columns): rows is a slice of the
+        permutation whose prefix covers every bound position and columns gives
+        the row column holding s, p and o.
+        """
+        name = self.permutation([term_id is not None for term_id in ids])
+        order = PERMUTATIONS[name]
+        rows = getattr(self, f"_{name}")
+
+        low, high = 0, len(rows)
+        for column, position in enumerate(order):
+            term_id = ids[position]
+            if term_id is None:
+                break
+            # Rows in [low, high) share the prefix so far, so this column is sorted.
+            # The key has the column's dtype: a Python int would make NumPy cast
+            # the whole slice to int64 first, an O(rows) copy per lookup
+            values = rows[low:high, column]
+            key = rows.dtype.type(term_id)
+            low, high = (low + int(np.searchsorted(values, key, 'left')),
+                         low + int(np.searchsorted(values, key, 'right')))
+        return rows[low:high], tuple(order.index(position) for position in range(3))
+
+    def triples(self, triple_pattern, context=None):
+        ids = self.encode_pattern(triple_pattern)
+        if ids is None:
+            return
+        rows, (s_col, p_col, o_col) = self.id_range(ids)
+        decode = self._decode
+        for start in range(0, len(rows), 65536):
+            for row in rows[start:start + 65536].tolist():
+                yield (decode(row[s_col]), decode(row[p_col]), decode(row[o_col])), iter(())
+
+    def __len__(self, context=None):
+        return self.meta['triples']
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def add(self, triple, context, quoted=False):
+        raise TypeError("SnapshotStore is read-only")
+
+    def addN(self, quads):
+        raise TypeError("SnapshotStore is read-only")
+
+    def remove(self, triple_pattern, context=None):
+        raise TypeError("SnapshotStore is read-only")
+
+    # ------------------------------------------------------------------ #
+    # Namespaces
+    # ------------------------------------------------------------------ #
+    def bind(self, prefix, namespace, override=True):
+        bindings = dict(self.meta['namespaces'])
+        if override or prefix not in bindings:
+            bindings = {p: uri for p, uri in bindings.items() if uri != str(namespace)}
+            bindings[prefix] = str(namespace)
+            self.meta['namespaces'] = [[p, uri] for p, uri in bindings.items()]
+
+    def namespace(self, prefix):
+        for p, uri in self.meta['namespaces']:
+            if p == prefix:
+                return URIRef(uri)
+        return None
+
+    def prefix(self, namespace):
+        for p, uri in self.meta['namespaces']:
+            if uri == str(namespace):
+                return p
+        return None
+
+    def namespaces(self):
+        for prefix, uri in self.meta['namespaces']:
+            yield prefix, URIRef(uri)
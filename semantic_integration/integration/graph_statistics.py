@@ -0,0 +1,136 @@
+"""
+Graph statistics for query planning
+Predicate and class cardinalities of the integrated graph, written by the
+integration step to output/graph_statistics.json under the graph version they
+were counted on. Besides counts, it records implications the data actually
+satisfies (every subject of a predicate having a class, a property chain
+always having its shortcut triple), which the query planner uses to drop
+redundant triple patterns.
+"""
+
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from rdflib import RDF, URIRef
+
+from graph_version import current_graph_version
+from mapping_engine import SPEC, expand
+
+STATISTICS_PATH = 'output/graph_statistics.json'
+
+
+def chain_candidates(spec=SPEC):
+    """
+    Property chains the mapping spec emits together with their shortcut:
+    within one mapping, p1 from X to Y, p2 from Y to Z and q from X to Z
+    (by URI template) give ((p1, p2), q). Enrollment rows, for example, link
+    student -> enrollment -> course and also student -> course directly.
+    """
+    prefixes = spec['prefixes']
+    chains = []
+    for mapping in spec['mappings'].values():
+        links = [(rule.get('subject', mapping['subject']), URIRef(expand(rule['predicate'], prefixes)),
+                  rule['object'])
+                 for rule in mapping['properties'] if 'object' in rule]
+        for s1, p1, o1 in links:
+            for s2, p2, o2 in links:
+                if s2 != o1 or p2 == p1:
+                    continue
+                for s3, q, o3 in links:
+                    if (s3, o3) == (s1, o2) and q not in (p1, p2):
+                        chains.append(((p1, p2), q))
+    return chains
+
+
+def _check_chain(graph, chain, shortcut):
+    """(paths, paths without the shortcut triple)"""
+    first, second = chain
+    paths = missing = 0
+    for s, _, middle in graph.triples((None, first, None)):
+        for o in graph.objects(middle, second):
+            paths += 1
+            if (s, shortcut, o) not in graph:
+                missing += 1
+    return paths, missing
+
+
+def collect_statistics(graph, chains=None):
+    """
+    One pass over the graph: per predicate the triple, distinct subject and
+    distinct object counts and the classes all its subjects (objects) belong
+    to; per class the instance count. Candidate property chains are then
+    checked against the data.
+    """
+    triples = 0
+    counts = defaultdict(int)
+    subjects = defaultdict(set)
+    objects = defaultdict(set)
+    instances = defaultdict(set)
+    for s, p, o in graph:
+        triples += 1
+        counts[p] += 1
+        subjects[p].add(s)
+        objects[p].add(o)
+        if p == RDF.type:
+            instances[o].add(s)
+
+    def covering(nodes):
+        return sorted(str(cls) for cls, members in instances.items() if nodes <= members)
+
+    all_subjects = set().union(*subjects.values()) if subjects else set()
+    all_objects = set().union(*objects.values()) if objects else set()
+    predicates = {}
+    for p in sorted(counts):
+        predicates[str(p)] = {
+            'triples': counts[p],
+            'subjects': len(subjects[p]),
+            'objects': len(objects[p]),
+            'subject_classes': covering(subjects[p]) if p != RDF.type else [],
+            'object_classes': covering(objects[p]) if p != RDF.type else [],
+        }
+
+    property_chains = []
+    for chain, shortcut in (chain_candidates() if chains is None else chains):
+        paths, missing = _check_chain(graph, chain, shortcut)
+        property_chains.append({'chain': [str(p) for p in chain], 'implies': str(shortcut),
+                                'paths': paths, 'holds': missing == 0})
+
+    return {
+        'triples': triples,
+        'subjects': len(all_subjects),
+        'objects': len(all_objects),
+        'typed_subjects': len(set().union(*instances.values())) if instances else 0,
+        'predicates': predicates,
+        'classes': {str(cls): len(members) for cls, members in sorted(instances.items())},
+        'property_chains': property_chains,
+    }
+
+
+def write_statistics(graph, graph_version, path=STATISTICS_PATH):
+    statistics = dict(collect_statistics(graph), graph_version=graph_version,
+                      written=datetime.now().isoformat())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(statistics, f, indent=2)
+    os.replace(tmp_path, path)
+    return statistics
+
+
+def load_statistics(source_path, path=STATISTICS_PATH):
+    """
+    (statistics, None) when they were counted on the graph source_path
+    currently holds, else (None, reason). Stale statistics are never used:
+    the implications they record may no longer hold.
+    """
+    version, reason = current_graph_version(source_path)
+    if version is None:
+        return None, reason
+    if not os.path.exists(path):
+        return None, f"no statistics at {path}"
+    with open(path, encoding='utf-8') as f:
+        statistics = json.load(f)
+    if statistics.get('graph_version') != version:
+        return None, f"{path} was counted on another graph version"
+    return statistics, None
@@ -0,0 +1,75 @@
+"""
+Graph version
+A content hash of the integrated graph, written by the integration step to
+output/graph_version.json. Anything derived from the graph (cached query
+results) is keyed on it, so a new graph invalidates it without bookkeeping.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from graph_snapshot import fingerprint
+
+GRAPH_VERSION_PATH = 'output/graph_version.json'
+
+
+def content_hash(graph):
+    """
+    Order-independent hash of the graph's triples: the sum of per-triple
+    SHA-256 prefixes, so the same triples give the same version however they
+    were loaded or serialized.
+    """
+    total = 0
+    for triple in graph:
+        line = ' '.join(term.n3() for term in triple).encode('utf-8')
+        total += int.from_bytes(hashlib.sha256(line).digest()[:16], 'big')
+    return f"{total % 2 ** 128:032x}-{len(graph)}"
+
+
+def write_graph_version(graph, source_path, path=GRAPH_VERSION_PATH):
+    """Record the graph's content hash and the fingerprint of the serialization it was written to"""
+    version = {
+        'version': content_hash(graph),
+        'triples': len(graph),
+        'written': datetime.now().isoformat(),
+        'source': fingerprint(source_path),
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(version, f, indent=2)
+    os.replace(tmp_path, path)
+    return version
+
+
+def recorded_source(source_path, path=GRAPH_VERSION_PATH):
+    """
+    The serialization the graph version was written against: source_path, or
+    source_path + '.gz' when the integration step ran with --gzip. Without a
+    recorded version, whichever of the two exists (source_path if neither).
+    """
+    compressed = source_path + '.gz'
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            recorded = json.load(f)['source']['path']
+        if recorded in (source_path, compressed):
+            return recorded
+    return compressed if os.path.exists(compressed) and not os.path.exists(source_path) else source_path
+
+
+def current_graph_version(source_path, path=GRAPH_VERSION_PATH):
+    """
+    (version, None) when the recorded version still describes source_path,
+    else (None, reason): the serialization was rewritten without going
+    through the integration step, so the recorded hash cannot be trusted.
+    """
+    if not os.path.exists(path):
+        return None, 'no graph version recorded'
+    with open(path, encoding='utf-8') as f:
+        recorded = json.load(f)
+    if not os.path.exists(source_path):
+        return None, f"{source_path} missing"
+    if fingerprint(source_path, recorded['source'])['sha256'] != recorded['source']['sha256']:
+        return None, f"{source_path} changed since the graph version was written"
+    return recorded['version'], None
@@ -0,0 +1,276 @@
+"""
+Incremental re-integration
+A persisted manifest records a fingerprint per source and a row watermark per
+SQLite table, so a re-run only remaps what changed and patches the previous graph.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+from rdflib import Graph, RDF
+
+from vocab import UNI, dept_uri
+from sinks import GraphSink, NodeSink, NTriplesSink, TeeSink
+from instructor_index import InstructorIndex
+from sqlite_mapper import TABLE_MAPPINGS, stream_table
+from xml_mapper import map_courses
+from csv_mapper import DEFAULT_CHUNK_SIZE, department_mapping, map_csv
+
+MANIFEST_VERSION = 1
+MANIFEST_PATH = 'output/integration_manifest.json'
+SOURCE_SHARD_DIR = 'output/sources'
+
+TABLES = TABLE_MAPPINGS
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Size, mtime and SHA-256 of a file. When size and mtime match the previous
+    fingerprint the stored hash is reused, so unchanged files are never read.
+    """
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['sha256'] = previous['sha256']
+        return fingerprint
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def table_digest(conn, table, max_rowid=None):
+    """Order-stable content hash of a table, optionally only up to a rowid"""
+    digest = hashlib.sha256()
+    if max_rowid is None:
+        cursor = conn.execute(f"SELECT * FROM {table} ORDER BY rowid")
+    else:
+        cursor = conn.execute(f"SELECT * FROM {table} WHERE rowid <= ? ORDER BY rowid", (max_rowid,))
+    while True:
+        rows = cursor.fetchmany(10000)
+        if not rows:
+            break
+        digest.update(repr(rows).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def table_watermark(conn, table):
+    max_rowid, count = conn.execute(f"SELECT MAX(rowid), COUNT(*) FROM {table}").fetchone()
+    return {'max_rowid': max_rowid or 0, 'count': count}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    manifest['version'] = MANIFEST_VERSION
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def shard_path(unit):
+    return os.path.join(SOURCE_SHARD_DIR, f"{unit}.nt")
+
+
+def plan_changes(manifest, sources, graph_path):
+    """
+    Compare the sources with the previous manifest.
+
+    sources maps 'ontology', 'sqlite', 'xml' and 'csv' to file paths. Returns a
+    plan with 'full' (rebuild everything), 'remap' (units to retract and map
+    again), 'append' (table -> first new rowid for append-only growth) and the
+    new fingerprints/watermarks to store once the run succeeds.
+    """
+    previous_files = (manifest or {}).get('files', {})
+    files = {name: file_fingerprint(path, previous_files.get(name)) for name, path in sources.items()}
+
+    conn = sqlite3.connect(sources['sqlite'])
+    tables = {table: table_watermark(conn, table) for table in TABLES}
+
+    plan = {'full': False, 'reason': None, 'remap': [], 'append': {}, 'files': files, 'tables': tables}
+
+    shards_present = all(os.path.exists(shard_path(unit))
+                         for unit in list(TABLES) + ['courses', 'departments', 'links'])
+    if manifest is None:
+        plan['full'], plan['reason'] = True, 'no previous manifest'
+    elif not shards_present or not os.path.exists(graph_path):
+        plan['full'], plan['reason'] = True, 'previous outputs missing'
+    elif files['ontology']['sha256'] != previous_files['ontology']['sha256']:
+        plan['full'], plan['reason'] = True, 'ontology changed'
+
+    if plan['full']:
+        for table in TABLES:
+            tables[table]['digest'] = table_digest(conn, table)
+        conn.close()
+        return plan
+
+    if files['sqlite']['sha256'] == previous_files['sqlite']['sha256']:
+        for table in TABLES:
+            tables[table]['digest'] = manifest['tables'][table]['digest']
+    else:
+        for table in TABLES:
+            old = manifest['tables'][table]
+            new = tables[table]
+            new['digest'] = table_digest(conn, table)
+            if new['digest'] == old['digest']:
+                continue
+            # Rows only appended past the old watermark: map just the new rows
+            grew = new['max_rowid'] > old['max_rowid'] and new['count'] > old['count']
+            if grew and table_digest(conn, table, old['max_rowid']) == old['digest']:
+                plan['append'][table] = old['max_rowid'] + 1
+            else:
+                plan['remap'].append(table)
+    conn.close()
+
+    if files['xml']['sha256'] != previous_files['xml']['sha256']:
+        plan['remap'].append('courses')
+    if files['csv']['sha256'] != previous_files['csv']['sha256']:
+        plan['remap'].append('departments')
+
+    return plan
+
+
+def has_changes(plan):
+    return plan['full'] or bool(plan['remap']) or bool(plan['append'])
+
+
+def instructor_index_from_graph(graph):
+    """Rebuild the name index from instructors already in the graph"""
+    instructor_index = InstructorIndex()
+    for instructor in graph.subjects(RDF.type, UNI.Instructor):
+        first_name = graph.value(instructor, UNI.firstName)
+        last_name = graph.value(instructor, UNI.lastName)
+        if first_name is not None and last_name is not None:
+            instructor_index.add(instructor, str(first_name), str(last_name))
+    return instructor_index
+
+
+def department_head_links(csv_path, instructor_index, chunk_size=DEFAULT_CHUNK_SIZE):
+    """uni:headedBy triples for departments.csv, kept in their own 'links' unit"""
+    triples = []
+    ambiguous_heads = {}
+    columns = ['department_name', 'head_of_department']
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype='string', chunksize=chunk_size):
+        names = chunk['department_name'].tolist()
+        for dept_name, head_name in zip(names, chunk['head_of_department'].tolist()):
+            head_uri, candidates = instructor_index.resolve(head_name)
+            if head_uri is not None:
+                triples.append((dept_uri(dept_name), UNI.headedBy, head_uri))
+            elif candidates:
+                ambiguous_heads[dept_name] = {
+                    'head_of_department': head_name,
+                    'candidates': [str(uri) for uri in candidates]
+                }
+    return triples, ambiguous_heads
+
+
+def retract(graph, unit):
+    """Remove the triples a unit contributed last time and return them"""
+    old = Graph()
+    old.parse(shard_path(unit), format='nt')
+    graph -= old
+    return old
+
+
+def changed_nodes(old, unit):
+    """Resources whose triples differ between a unit's retracted and remapped shards"""
+    new = Graph()
+    new.parse(shard_path(unit), format='nt')
+    sink = NodeSink()
+    sink.add(old - new)
+    sink.add(new - old)
+    return sink.nodes
+
+
+def apply_plan(graph, plan, manifest, sources, batch_size, csv_chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Map the units the plan selects into the graph, recording each unit's
+    triples in its source shard. On a full plan the graph holds only the
+    ontology; otherwise it holds the previous integrated graph and is patched.
+    Returns per-unit stats, ambiguous heads, the number of retracted triples
+    and, for a patch, the resources whose triples changed.
+    """
+    os.makedirs(SOURCE_SHARD_DIR, exist_ok=True)
+    stats = dict((manifest or {}).get('stats', {}))
+    graph_sink = GraphSink(graph)
+    retracted = 0
+    start = time.perf_counter()
+    # Appended rows are new triples; remapped units are diffed against their old shard
+    appended = NodeSink()
+    old_shards = {}
+
+    units = list(TABLES) + ['courses', 'departments'] if plan['full'] else plan['remap']
+    if not plan['full']:
+        for unit in units:
+            old_shards[unit] = retract(graph, unit)
+            retracted += len(old_shards[unit])
+
+    instructor_index = None
+    conn = sqlite3.connect(sources['sqlite'])
+    for table, mapping in TABLES.items():
+        if table in units:
+            with NTriplesSink(shard_path(table)) as shard:
+                stats[table] = stream_table(conn, table, mapping.triples, TeeSink(graph_sink, shard),
+                                            batch_size=batch_size, columns=mapping.columns)
+        elif table in plan['append']:
+            rowid_range = (plan['append'][table], plan['tables'][table]['max_rowid'])
+            with NTriplesSink(shard_path(table), append=True) as shard:
+                delta = stream_table(conn, table, mapping.triples, TeeSink(graph_sink, shard, appended),
+                                     batch_size=batch_size, rowid_range=rowid_range,
+                                     columns=mapping.columns)
+            delta['appended_rows'] = delta['rows']
+            delta['rows'] += stats[table]['rows']
+            delta['triples'] += stats[table]['triples']
+            stats[table] = delta
+    conn.close()
+
+    if 'courses' in units:
+        instructor_index = InstructorIndex()
+        with NTriplesSink(shard_path('courses')) as shard:
+            stats['courses'] = map_courses(sources['xml'], TeeSink(graph_sink, shard),
+                                           instructor_index, batch_size=batch_size)
+
+    if 'departments' in units:
+        with NTriplesSink(shard_path('departments')) as shard:
+            stats['departments'] = map_csv(sources['csv'], department_mapping(),
+                                           TeeSink(graph_sink, shard), chunk_size=csv_chunk_size)
+
+    # headedBy depends on both the XML instructors and the CSV heads
+    ambiguous_heads = (manifest or {}).get('ambiguous_heads', {})
+    if 'courses' in units or 'departments' in units:
+        if not plan['full']:
+            old_shards['links'] = retract(graph, 'links')
+            retracted += len(old_shards['links'])
+        if instructor_index is None:
+            instructor_index = instructor_index_from_graph(graph)
+        links, ambiguous_heads = department_head_links(sources['csv'], instructor_index, csv_chunk_size)
+        with NTriplesSink(shard_path('links')) as shard:
+            TeeSink(graph_sink, shard).add(links)
+        stats['links'] = {'rows': len(links), 'triples': len(links)}
+
+    changed = None
+    if not plan['full']:
+        changed = appended.nodes
+        for unit, old in old_shards.items():
+            changed |= changed_nodes(old, unit)
+
+    return {
+        'units': units + [f"{table} (append)" for table in plan['append']],
+        'stats': stats,
+        'ambiguous_heads': ambiguous_heads,
+        'retracted': retracted,
+        'changed_nodes': changed,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
@@ -0,0 +1,52 @@
+"""
+Instructor name index
+Built while instructors are mapped so department heads resolve with hash lookups
+"""
+
+
+def _normalize(name):
+    return ' '.join(name.replace('Dr. ', '').split()).lower()
+
+
+class InstructorIndex:
+    """Full-name and last-name -> instructor URI lookups"""
+
+    def __init__(self):
+        self.by_full_name = {}
+        self.by_last_name = {}
+
+    def add(self, instructor_uri, first_name, last_name):
+        full_key = _normalize(f"{first_name} {last_name}")
+        last_key = _normalize(last_name)
+        for index, key in ((self.by_full_name, full_key), (self.by_last_name, last_key)):
+            uris = index.setdefault(key, [])
+            if instructor_uri not in uris:
+                uris.append(instructor_uri)
+
+    def merge(self, other):
+        """Fold in an index built by another worker"""
+        for mine, theirs in ((self.by_full_name, other.by_full_name),
+                             (self.by_last_name, other.by_last_name)):
+            for key, uris in theirs.items():
+                existing = mine.setdefault(key, [])
+                existing.extend(uri for uri in uris if uri not in existing)
+
+    def resolve(self, head_name):
+        """
+        Resolve a department head name to an instructor.
+
+        An exact full-name match wins; otherwise the last name is used. Returns
+        (uri, candidates): uri is None when nothing matches or when several
+        instructors share the name, in which case candidates lists all of them.
+        """
+        full_key = _normalize(head_name)
+        candidates = self.by_full_name.get(full_key)
+        if not candidates:
+            candidates = self.by_last_name.get(full_key.split(' ')[-1], [])
+
+        if len(candidates) == 1:
+            return candidates[0], candidates
+        return None, list(candidates)
+
+    def __len__(self):
+        return sum(len(uris) for uris in self.by_full_name.values())
@@ -0,0 +1,209 @@
+"""
+Declarative mapping engine
+Compiles mappings/mapping_spec.json into row -> triples functions once, so the
+per-row work is index lookups and Literal construction with no spec access.
+"""
+
+import json
+import os
+import string
+
+from rdflib import Literal, RDF, URIRef, XSD
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mappings', 'mapping_spec.json')
+
+# Python value each datatype's Literal is built from; anything else passes through
+CONVERTERS = {
+    XSD.string: str,
+    XSD.integer: int,
+}
+
+
+def _split_name(name):
+    parts = name.replace('Dr. ', '').split(' ')
+    return parts if len(parts) >= 2 else None
+
+
+def _first_name(name):
+    parts = _split_name(name)
+    return parts[0] if parts else None
+
+
+def _last_name(name):
+    parts = _split_name(name)
+    return ' '.join(parts[1:]) if parts else None
+
+
+# Value transforms a property rule may name; returning None drops the triple
+TRANSFORMS = {
+    'first_name': _first_name,
+    'last_name': _last_name,
+}
+
+
+def load_spec(path=SPEC_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def expand(curie, prefixes):
+    """'uni:Student' -> full IRI string"""
+    prefix, _, local = curie.partition(':')
+    if prefix not in prefixes:
+        raise ValueError(f"Unknown prefix in mapping spec: {curie}")
+    return prefixes[prefix] + local
+
+
+def template_fields(template):
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+def compile_template(template, prefixes, positions):
+    """
+    Turn 'data:student_{student_id}' into row -> URIRef. Field names become
+    row positions up front; spaces in values become '_'. Rows with a missing
+    or empty field yield None.
+    """
+    fields = template_fields(template)
+    indices = [positions[field] for field in fields]
+    pattern = expand(template, prefixes)
+    for i, field in enumerate(fields):
+        pattern = pattern.replace('{' + field + '}', '{' + str(i) + '}')
+
+    if len(indices) == 1:
+        index = indices[0]
+
+        def build(row):
+            value = row[index]
+            if value is None or value == '':
+                return None
+            return URIRef(pattern.format(str(value).replace(' ', '_')))
+        return build
+
+    def build(row):
+        values = [row[index] for index in indices]
+        if any(value is None or value == '' for value in values):
+            return None
+        return URIRef(pattern.format(*(str(value).replace(' ', '_') for value in values)))
+    return build
+
+
+def _literal_rule(rule, prefixes, positions, subject):
+    index = positions[rule['column']]
+    predicate = URIRef(expand(rule['predicate'], prefixes))
+    datatype = URIRef(expand(rule['datatype'], prefixes))
+    convert = CONVERTERS.get(datatype)
+    transform = TRANSFORMS[rule['transform']] if 'transform' in rule else None
+
+    def emit(row, row_subject):
+        value = row[index]
+        if value is None:
+            return None
+        if transform is not None:
+            value = transform(value)
+            if value is None:
+                return None
+        if convert is not None:
+            value = convert(value)
+        return (subject(row) if subject else row_subject, predicate, Literal(value, datatype=datatype))
+    return emit
+
+
+def _link_rule(rule, prefixes, positions, subject):
+    predicate = URIRef(expand(rule['predicate'], prefixes))
+    target = compile_template(rule['object'], prefixes, positions)
+
+    def emit(row, row_subject):
+        obj = target(row)
+        if obj is None:
+            return None
+        return (subject(row) if subject else row_subject, predicate, obj)
+    return emit
+
+
+class RowMapping:
+    """
+    One compiled mapping over positional rows (SQLite tuples, XML records).
+
+    columns is the row layout the rules were compiled against, subject builds
+    the subject URI and triples(row) returns the row's triples. distinct names
+    a column whose repeats should be mapped only once (left to the caller).
+    """
+
+    def __init__(self, name, spec, prefixes, columns=None):
+        source = spec['source']
+        self.name = name
+        self.columns = list(columns or source.get('columns') or source['fields'])
+        self.distinct = source.get('distinct')
+        positions = {column: i for i, column in enumerate(self.columns)}
+        self.distinct_index = positions[self.distinct] if self.distinct else None
+
+        self.subject = compile_template(spec['subject'], prefixes, positions)
+        type_object = URIRef(expand(spec['class'], prefixes))
+
+        emitters = []
+        for rule in spec['properties']:
+            subject = compile_template(rule['subject'], prefixes, positions) if 'subject' in rule else None
+            if 'datatype' in rule:
+                emitters.append(_literal_rule(rule, prefixes, positions, subject))
+            elif 'object' in rule:
+                emitters.append(_link_rule(rule, prefixes, positions, subject))
+            else:
+                raise ValueError(f"{name}: rule for {rule['column']} needs a datatype or an object template")
+
+        row_subject = self.subject
+
+        def triples(row):
+            s = row_subject(row)
+            out = [(s, RDF.type, type_object)]
+            for emit in emitters:
+                triple = emit(row, s)
+                if triple is not None:
+                    out.append(triple)
+            return out
+        self.triples = triples
+
+
+def documentation(spec):
+    """The 'mappings' block of mapping_documentation.json, generated from the spec"""
+    docs = {}
+    for name, mapping in spec['mappings'].items():
+        source = mapping['source']
+        fields = source.get('fields', {})
+        doc_mappings = {}
+        relationships = []
+        for rule in mapping['properties']:
+            key = fields.get(rule['column'], rule['column'])
+            if 'datatype' in rule:
+                entry = f"{rule['predicate']} ({rule['datatype']})"
+                if 'transform' in rule:
+                    entry = f"{rule['predicate']} ({rule['datatype']}, {rule['transform']} of value)"
+            elif 'object_class' in rule:
+                entry = f"{rule['predicate']} -> {rule['object_class']}"
+            else:
+                entry = rule['predicate']
+            if 'subject' in rule:
+                entry += f" (from {rule.get('subject_class', rule['subject'])})"
+            doc_mappings[key] = f"{doc_mappings[key]}; {entry}" if key in doc_mappings else entry
+
+            if 'object' in rule or 'lookup' in rule:
+                subject_class = rule.get('subject_class', mapping['class'])
+                object_class = rule.get('object_class', rule.get('object', ''))
+                relationships.append(f"{subject_class.split(':')[-1]} -> {rule['predicate']} -> "
+                                     f"{object_class.split(':')[-1]}")
+
+        for field in template_fields(mapping['subject']):
+            doc_mappings.setdefault(fields.get(field, field), "URI identifier")
+
+        docs[name] = {
+            "source": mapping.get('description', source['file']),
+            "target_class": mapping['class'],
+            "mappings": doc_mappings,
+            "uri_pattern": mapping['subject'],
+        }
+        if relationships:
+            docs[name]["relationships"] = relationships
+    return docs
+
+
+SPEC = load_spec()
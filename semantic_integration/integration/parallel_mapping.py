@@ -0,0 +1,187 @@
+"""
+Parallel per-source mapping
+Maps each source, or each row range of a large source, in a process pool.
+Every task writes one N-Triples shard; the shards are then merged and deduplicated.
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from vocab import UNI
+from sinks import NTriplesSink
+from instructor_index import InstructorIndex
+from sqlite_mapper import TABLE_MAPPINGS, rowid_chunks, stream_table
+from xml_mapper import map_courses
+from csv_mapper import DEFAULT_CHUNK_SIZE, department_mapping, map_csv
+
+DEFAULT_CHUNK_ROWS = 250000
+
+
+def plan_tasks(sqlite_path, xml_path, csv_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Split the sources into independent tasks: rowid ranges of chunk_rows rows, the XML file, CSV row slices"""
+    tasks = []
+
+    conn = sqlite3.connect(sqlite_path)
+    for table in TABLE_MAPPINGS:
+        for low, high in rowid_chunks(conn, table, chunk_rows):
+            tasks.append(('sqlite', sqlite_path, (table, low, high)))
+    conn.close()
+
+    # courses.xml is streamed by a single task
+    tasks.append(('xml', xml_path, None))
+
+    with open(csv_path, encoding='utf-8') as f:
+        data_rows = sum(1 for _ in f) - 1
+    for first in range(0, data_rows, chunk_rows):
+        tasks.append(('csv', csv_path, (first, min(chunk_rows, data_rows - first))))
+
+    return tasks
+
+
+def run_task(task, shard_path, batch_size, csv_chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Map one task into its own shard. Cross-source links cannot be resolved
+    inside a worker, so the XML task returns its instructor index and CSV
+    tasks return the department heads they saw; the parent joins them.
+    """
+    kind, source, part = task
+    result = {'kind': kind, 'source': source, 'part': part, 'shard': shard_path}
+
+    with NTriplesSink(shard_path) as sink:
+        if kind == 'sqlite':
+            table, low, high = part
+            conn = sqlite3.connect(source)
+            mapping = TABLE_MAPPINGS[table]
+            result['stats'] = stream_table(conn, table, mapping.triples, sink, batch_size=batch_size,
+                                           rowid_range=(low, high), columns=mapping.columns)
+            conn.close()
+        elif kind == 'xml':
+            instructor_index = InstructorIndex()
+            result['stats'] = map_courses(source, sink, instructor_index, batch_size=batch_size)
+            result['instructor_index'] = instructor_index
+        elif kind == 'csv':
+            first_row, nrows = part
+            heads = []
+
+            def collect_heads(subjects, chunk):
+                heads.extend(zip(subjects, chunk['department_name'].tolist(),
+                                 chunk['head_of_department'].tolist()))
+                return []
+
+            mapping = department_mapping()
+            mapping.links = collect_heads
+            result['stats'] = map_csv(source, mapping, sink, chunk_size=csv_chunk_size,
+                                      first_row=first_row, nrows=nrows)
+            result['department_heads'] = heads
+        else:
+            raise ValueError(f"Unknown task kind: {kind}")
+
+    return result
+
+
+def resolve_department_heads(results, links_path):
+    """Write uni:headedBy links for every department head found in the instructor index"""
+    instructor_index = InstructorIndex()
+    for result in results:
+        if 'instructor_index' in result:
+            instructor_index.merge(result['instructor_index'])
+
+    ambiguous_heads = {}
+    linked = 0
+    with NTriplesSink(links_path) as sink:
+        for result in results:
+            triples = []
+            for dept_uri, dept_name, head_name in result.get('department_heads', []):
+                head_uri, candidates = instructor_index.resolve(head_name)
+                if head_uri is not None:
+                    triples.append((dept_uri, UNI.headedBy, head_uri))
+                elif candidates:
+                    ambiguous_heads[dept_name] = {
+                        'head_of_department': head_name,
+                        'candidates': [str(uri) for uri in candidates]
+                    }
+            sink.add(triples)
+            linked += len(triples)
+
+    return linked, ambiguous_heads
+
+
+def summarize(results):
+    """Fold per-task stats into the same per-source shape the sequential run reports"""
+    summary = {}
+    for result in results:
+        stats = result['stats']
+        key = result['part'][0] if result['kind'] == 'sqlite' else result['kind']
+        total = summary.setdefault(key, {'rows': 0, 'triples': 0, 'seconds': 0.0, 'tasks': 0})
+        total['rows'] += stats['rows']
+        total['triples'] += stats['triples']
+        total['seconds'] += stats['seconds']
+        total['tasks'] += 1
+        if 'instructors' in stats:
+            total['instructors'] = total.get('instructors', 0) + stats['instructors']
+
+    for total in summary.values():
+        total['seconds'] = round(total['seconds'], 4)
+        total['rows_per_sec'] = round(total['rows'] / total['seconds'], 1) if total['seconds'] > 0 else None
+    return summary
+
+
+def map_sources_parallel(sqlite_path, xml_path, csv_path, shard_dir, workers,
+                         chunk_rows=DEFAULT_CHUNK_ROWS, batch_size=10000,
+                         csv_chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run every mapping task in a process pool and resolve cross-source links"""
+    os.makedirs(shard_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(shard_dir, '*.nt')):
+        os.remove(stale)
+
+    tasks = plan_tasks(sqlite_path, xml_path, csv_path, chunk_rows)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_task, task, os.path.join(shard_dir, f"{i:05d}_{task[0]}.nt"),
+                        batch_size, csv_chunk_size)
+            for i, task in enumerate(tasks)
+        ]
+        results = [future.result() for future in futures]
+
+    links_path = os.path.join(shard_dir, 'links.nt')
+    linked, ambiguous_heads = resolve_department_heads(results, links_path)
+
+    return {
+        'tasks': len(tasks),
+        'workers': workers,
+        'seconds': round(time.perf_counter() - start, 4),
+        'shards': [result['shard'] for result in results] + [links_path],
+        'sources': summarize(results),
+        'head_links': linked,
+        'ambiguous_heads': ambiguous_heads,
+    }
+
+
+def merge_shards(shard_paths, output_path):
+    """
+    Concatenate shards into one N-Triples file, dropping duplicate lines.
+    Only a 16-byte digest per distinct triple is kept in memory.
+    """
+    seen = set()
+    written = 0
+    duplicates = 0
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for path in shard_paths:
+            with open(path, encoding='utf-8') as shard:
+                for line in shard:
+                    digest = hashlib.blake2b(line.encode('utf-8'), digest_size=16).digest()
+                    if digest in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(digest)
+                    out.write(line)
+                    written += 1
+
+    return written, duplicates
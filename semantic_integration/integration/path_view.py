@@ -0,0 +1,564 @@
+"""
+Materialized path views
+Flattens the graph paths declared in mappings/path_views.json (Student ->
+Enrollment -> Course -> Department) into indexed SQLite tables in
+output/path_views.sqlite. A view has one row per match of its core pattern;
+every other pattern is left-joined onto it as a column, holding either the
+variable it introduces or whether it holds. Terms are dictionary-encoded in
+a shared view_terms table, so the columns are integer ids. The integration
+step builds the tables, and an incremental run rewrites only the rows the
+patch touched. path_view_eval routes the basic graph patterns a view can
+answer to it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+
+from rdflib import BNode, Literal, RDF, URIRef, Variable
+from rdflib.paths import Path
+
+from graph_snapshot import _term_key
+from graph_version import current_graph_version
+
+PATH_VIEW_SPEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mappings', 'path_views.json')
+PATH_VIEW_PATH = 'output/path_views.sqlite'
+INSERT_BATCH = 10000
+
+_SEP = '\x1f'
+
+
+# ---------------------------------------------------------------------------- #
+# Term encoding
+# ---------------------------------------------------------------------------- #
+# Exact and reversible, so equality of ids is term equality
+
+def encode(term):
+    if isinstance(term, URIRef):
+        return f"U{term}"
+    if isinstance(term, BNode):
+        return f"B{term}"
+    return f"L{term.datatype or ''}{_SEP}{term.language or ''}{_SEP}{term}"
+
+
+def decode(text):
+    kind, value = text[0], text[1:]
+    if kind == 'U':
+        return URIRef(value)
+    if kind == 'B':
+        return BNode(value)
+    datatype, language, lexical = value.split(_SEP, 2)
+    return Literal(lexical, lang=language or None, datatype=URIRef(datatype) if datatype else None)
+
+
+def _is_variable(term):
+    return isinstance(term, (Variable, BNode))
+
+
+class TermIds:
+    """The view_terms dictionary while writing: existing ids are loaded, new terms appended"""
+
+    def __init__(self, conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS view_terms (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE)")
+        self.ids = dict(conn.execute("SELECT term, id FROM view_terms"))
+        self.added = []
+
+    def get(self, term):
+        return self.ids.get(encode(term))
+
+    def __call__(self, term):
+        text = encode(term)
+        term_id = self.ids.get(text)
+        if term_id is None:
+            term_id = self.ids[text] = len(self.ids) + 1
+            self.added.append((term_id, text))
+        return term_id
+
+    def preload(self, terms):
+        """Number terms in the snapshot's term order, so ordering by id orders by value"""
+        for term in sorted(terms, key=_term_key):
+            self(term)
+
+    def flush(self, conn):
+        conn.executemany("INSERT INTO view_terms VALUES (?, ?)", self.added)
+        self.added = []
+
+
+# ---------------------------------------------------------------------------- #
+# View definitions
+# ---------------------------------------------------------------------------- #
+class ViewPattern:
+    """
+    One pattern of a view. A value pattern introduces a new variable, read
+    from its anchor forward (anchor p new) or backward (new p anchor); a flag
+    pattern only records whether it holds for the row.
+    """
+
+    def __init__(self, s, p, o, new, anchor, column):
+        self.s, self.p, self.o = s, p, o
+        self.new = new
+        self.anchor = anchor
+        self.forward = anchor == s
+        self.column = column
+
+
+class PathView:
+    """A compiled view: its patterns, table columns and the variables rows hang off"""
+
+    def __init__(self, name, spec, prefixes):
+        self.name = name
+        self.description = spec.get('description', '')
+
+        def term(text):
+            if text.startswith('?'):
+                return Variable(text[1:])
+            if text == 'a':
+                return RDF.type
+            prefix, _, local = text.partition(':')
+            if prefix not in prefixes:
+                raise ValueError(f"{name}: unknown prefix in {text}")
+            return URIRef(prefixes[prefix] + local)
+
+        s, p, o = (term(text) for text in spec['core'])
+        if not (isinstance(s, Variable) and isinstance(o, Variable)):
+            raise ValueError(f"{name}: the core pattern must link two variables")
+        self.root = s
+        self.core = ViewPattern(s, p, o, o, s, str(o))
+        self.patterns = [self.core]
+        self.introduced_by = {s: None, o: self.core}
+        for triple in spec['patterns']:
+            s, p, o = (term(text) for text in triple)
+            if isinstance(o, Variable) and o not in self.introduced_by:
+                new, anchor = o, s
+            elif isinstance(s, Variable) and s not in self.introduced_by:
+                new, anchor = s, o
+            else:
+                new, anchor = None, s
+            if anchor not in self.introduced_by:
+                raise ValueError(f"{name}: {' '.join(triple)} does not hang off an earlier variable")
+            if new is None:
+                column = re.sub(r'\W+', '_', '_'.join(_local_name(t) for t in (s, p, o)))
+            else:
+                column = str(new)
+            pattern = ViewPattern(s, p, o, new, anchor, column)
+            self.patterns.append(pattern)
+            if new is not None:
+                self.introduced_by[new] = pattern
+
+        self.columns = [str(self.root)] + [pattern.column for pattern in self.patterns]
+        self.predicates = sorted({pattern.p for pattern in self.patterns})
+        self.node_variables = [var for var in self.introduced_by
+                               if any(pattern.anchor == var for pattern in self.patterns)]
+        self.indexes = list(dict.fromkeys([str(var) for var in self.node_variables] + spec.get('indexes', [])))
+        unknown = set(self.indexes) - set(self.columns)
+        if unknown:
+            raise ValueError(f"{name}: indexes on unknown columns {', '.join(sorted(unknown))}")
+
+    # -- building ------------------------------------------------------------- #
+    def create(self, conn):
+        conn.execute(f'DROP TABLE IF EXISTS "{self.name}"')
+        conn.execute(f'CREATE TABLE "{self.name}" ({", ".join(f"{_q(column)} INTEGER" for column in self.columns)})')
+        for column in self.indexes:
+            conn.execute(f'CREATE INDEX "{self.name}_{column}" ON "{self.name}" ({_q(column)})')
+
+    def rows(self, lookup, root, core):
+        """Table rows for one core match: the product of every pattern's values (NULL when none)"""
+        rows = [{self.root: root, self.core.new: core}]
+        for pattern in self.patterns[1:]:
+            expanded = []
+            for row in rows:
+                if pattern.new is None:
+                    s = row.get(pattern.s) if isinstance(pattern.s, Variable) else pattern.s
+                    o = row.get(pattern.o) if isinstance(pattern.o, Variable) else pattern.o
+                    held = s is not None and o is not None and lookup.holds(s, pattern.p, o)
+                    expanded.append(dict(row, **{pattern.column: True if held else None}))
+                    continue
+                anchor = row[pattern.anchor]
+                values = []
+                if anchor is not None:
+                    values = (lookup.objects(anchor, pattern.p) if pattern.forward
+                              else lookup.subjects(pattern.p, anchor))
+                for value in values or [None]:
+                    expanded.append(dict(row, **{pattern.new: value}))
+            rows = expanded
+        return rows
+
+    def insert(self, conn, lookup, term_ids, roots=None):
+        """Rows for every core match (or only those of the given roots); returns the row count"""
+        keys = [self.root] + [pattern.new if pattern.new is not None else pattern.column
+                              for pattern in self.patterns]
+        if roots is None:
+            cores = lookup.pairs(self.core.p)
+        else:
+            cores = ((root, core) for root in roots for core in lookup.objects(root, self.core.p))
+        sql = f'INSERT INTO "{self.name}" VALUES ({", ".join("?" * len(self.columns))})'
+        batch = []
+        count = 0
+        for root, core in cores:
+            # Flags are stored as 1, terms as their ids
+            batch.extend(tuple(None if row[key] is None else 1 if row[key] is True else term_ids(row[key])
+                               for key in keys)
+                         for row in self.rows(lookup, root, core))
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        conn.executemany(sql, batch)
+        return count + len(batch)
+
+    # -- incremental maintenance --------------------------------------------- #
+    def _roots_of(self, lookup, variable, nodes):
+        """Root nodes whose rows reach one of nodes in the position of variable"""
+        while variable != self.root and nodes:
+            pattern = self.introduced_by[variable]
+            if pattern.forward:
+                nodes = {parent for node in nodes for parent in lookup.subjects(pattern.p, node)}
+            else:
+                nodes = {parent for node in nodes for parent in lookup.objects(node, pattern.p)}
+            variable = pattern.anchor
+        return nodes
+
+    def affected_roots(self, conn, lookup, term_ids, nodes):
+        """
+        Roots whose rows may change when the triples of nodes changed: the
+        rows that mention a node now, and the roots that reach it in the
+        patched graph.
+        """
+        roots = set()
+        ids = [term_id for term_id in map(term_ids.get, nodes) if term_id is not None]
+        for variable in self.node_variables:
+            for chunk in _chunks(ids):
+                sql = (f'SELECT term FROM view_terms WHERE id IN (SELECT {_q(str(self.root))} FROM "{self.name}" '
+                       f'WHERE {_q(str(variable))} IN ({", ".join("?" * len(chunk))}))')
+                roots.update(decode(text) for text, in conn.execute(sql, chunk))
+            roots |= self._roots_of(lookup, variable, set(nodes))
+        return roots
+
+    def refresh(self, conn, lookup, term_ids, nodes):
+        """Rewrite the rows of the roots nodes affect; returns (roots, rows written)"""
+        roots = self.affected_roots(conn, lookup, term_ids, nodes)
+        ids = [term_id for term_id in map(term_ids.get, roots) if term_id is not None]
+        for chunk in _chunks(ids):
+            conn.execute(f'DELETE FROM "{self.name}" WHERE {_q(str(self.root))} IN '
+                         f'({", ".join("?" * len(chunk))})', chunk)
+        return len(roots), self.insert(conn, lookup, term_ids, roots)
+
+    # -- query matching ------------------------------------------------------- #
+    def match(self, triples):
+        """
+        Map a BGP onto the view: {query term: view variable} and the view
+        patterns used, or None. Every triple must land on its own view
+        pattern with a consistent, one-to-one variable mapping, the core
+        must be among them, and so must the pattern introducing every view
+        variable used, so the BGP asks exactly for rows of the view.
+        """
+        triples = list(triples)
+        if any(_is_variable(p) or isinstance(p, Path) for _, p, _ in triples):
+            return None
+
+        def bind(mapping, query_term, view_term):
+            if not isinstance(view_term, Variable):
+                return mapping if query_term == view_term else None
+            if query_term in mapping:
+                return mapping if mapping[query_term] == view_term else None
+            if view_term in mapping.values():
+                return None
+            return {**mapping, query_term: view_term}
+
+        def complete(mapping, used):
+            if 0 not in used:
+                return False
+            return all(variable == self.root or self.patterns.index(self.introduced_by[variable]) in used
+                       for variable in mapping.values())
+
+        def search(i, mapping, used):
+            if i == len(triples):
+                return (mapping, used) if complete(mapping, used) else None
+            s, p, o = triples[i]
+            for j, pattern in enumerate(self.patterns):
+                if j in used or pattern.p != p:
+                    continue
+                extended = bind(mapping, s, pattern.s)
+                if extended is not None:
+                    extended = bind(extended, o, pattern.o)
+                if extended is not None:
+                    found = search(i + 1, extended, used | {j})
+                    if found is not None:
+                        return found
+            return None
+
+        return search(0, {}, frozenset())
+
+    def select(self, mapping, used, bound, term_id):
+        """
+        (sql, parameters, query variables selected) for a match, or None when
+        a fixed term is not in the view at all. bound maps query variables
+        that already have a value to it; term_id looks up a term's id.
+        """
+        where = [f'{_q(self.patterns[j].column)} IS NOT NULL' for j in sorted(used) if j != 0]
+        parameters = []
+        columns = []
+        variables = []
+        for query_term, view_variable in mapping.items():
+            value = bound.get(query_term) if _is_variable(query_term) else query_term
+            if value is not None:
+                value_id = term_id(value)
+                if value_id is None:
+                    return None
+                where.append(f'{_q(str(view_variable))} = ?')
+                parameters.append(value_id)
+            else:
+                columns.append(_q(str(view_variable)))
+                variables.append(query_term)
+        condition = f" WHERE {' AND '.join(where)}" if where else ''
+        if not columns:
+            return f'SELECT 1 FROM "{self.name}"{condition} LIMIT 1', parameters, variables
+        # Distinct: a BGP solution is a distinct mapping, whatever other columns multiply rows
+        return (f'SELECT DISTINCT {", ".join(columns)} FROM "{self.name}"{condition} ORDER BY {", ".join(columns)}',
+                parameters, variables)
+
+
+def _local_name(term):
+    return term if isinstance(term, Variable) else re.split(r'[#/]', term)[-1]
+
+
+def _q(column):
+    return f'"{column}"'
+
+
+def _chunks(values, size=500):
+    """Slices under SQLite's bound parameter limit"""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def load_views(path=PATH_VIEW_SPEC):
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    return [PathView(name, view, spec['prefixes']) for name, view in spec['views'].items()]
+
+
+def spec_hash(path=PATH_VIEW_SPEC):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# ---------------------------------------------------------------------------- #
+# Graph lookups
+# ---------------------------------------------------------------------------- #
+class PredicateIndex:
+    """Forward and backward adjacency of the view predicates, read once for a full build"""
+
+    def __init__(self, graph, predicates):
+        self.forward = {}
+        self.backward = {}
+        for p in predicates:
+            forward = self.forward[p] = defaultdict(list)
+            backward = self.backward[p] = defaultdict(list)
+            for s, _, o in graph.triples((None, p, None)):
+                forward[s].append(o)
+                backward[o].append(s)
+
+    def terms(self):
+        return {node for index in self.forward.values() for s, objects in index.items() for node in (s, *objects)}
+
+    def objects(self, s, p):
+        return self.forward[p].get(s, ())
+
+    def subjects(self, p, o):
+        return self.backward[p].get(o, ())
+
+    def holds(self, s, p, o):
+        return o in self.forward[p].get(s, ())
+
+    def pairs(self, p):
+        for s, objects in self.forward[p].items():
+            for o in objects:
+                yield s, o
+
+
+class GraphLookup:
+    """The same lookups straight against the graph, for the few nodes a patch touches"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def objects(self, s, p):
+        return list(self.graph.objects(s, p))
+
+    def subjects(self, p, o):
+        return list(self.graph.subjects(p, o))
+
+    def holds(self, s, p, o):
+        return (s, p, o) in self.graph
+
+    def pairs(self, p):
+        return self.graph.subject_objects(p)
+
+
+# ---------------------------------------------------------------------------- #
+# Building and maintaining the view file
+# ---------------------------------------------------------------------------- #
+def _meta(conn):
+    return dict(conn.execute("SELECT key, value FROM view_meta"))
+
+
+def view_state(path=PATH_VIEW_PATH):
+    """{'graph_version', 'spec'} recorded in a view file, or None"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        return _meta(conn)
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+
+
+def write_views(graph, graph_version, path=PATH_VIEW_PATH, views=None, spec_path=PATH_VIEW_SPEC):
+    """Build every view from scratch into a new file; returns {view: {'rows'}}"""
+    views = load_views(spec_path) if views is None else views
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    term_ids = TermIds(conn)
+    indexes = [PredicateIndex(graph, view.predicates) for view in views]
+    term_ids.preload(set().union(*(index.terms() for index in indexes)))
+    stats = {}
+    for view, index in zip(views, indexes):
+        view.create(conn)
+        stats[view.name] = {'rows': view.insert(conn, index, term_ids)}
+    term_ids.flush(conn)
+    conn.execute("CREATE TABLE view_meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO view_meta VALUES (?, ?)",
+                     [('graph_version', graph_version), ('spec', spec_hash(spec_path))])
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    return stats
+
+
+def update_views(graph, nodes, graph_version, path=PATH_VIEW_PATH, views=None, spec_path=PATH_VIEW_SPEC):
+    """
+    Patch the views in place after an incremental run changed the triples of
+    nodes; returns {view: {'rows', 'refreshed_roots', 'rows_written'}}.
+    """
+    views = load_views(spec_path) if views is None else views
+    lookup = GraphLookup(graph)
+    conn = sqlite3.connect(path)
+    stats = {}
+    with conn:
+        term_ids = TermIds(conn)
+        for view in views:
+            roots, written = view.refresh(conn, lookup, term_ids, nodes)
+            rows, = conn.execute(f'SELECT COUNT(*) FROM "{view.name}"').fetchone()
+            stats[view.name] = {'rows': rows, 'refreshed_roots': roots, 'rows_written': written}
+        term_ids.flush(conn)
+        conn.execute("UPDATE view_meta SET value = ? WHERE key = 'graph_version'", (graph_version,))
+    conn.close()
+    return stats
+
+
+# ---------------------------------------------------------------------------- #
+# Reading
+# ---------------------------------------------------------------------------- #
+class ViewReader:
+    """
+    Read side of the view file: matches BGPs against the views and streams
+    the solutions of a match. One read-only connection per thread (and per
+    forked process); the term dictionary is read once and terms are decoded
+    on first use.
+    """
+
+    def __init__(self, path, views):
+        self.path = path
+        self.views = views
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._matches = {}
+        self._texts = None
+        self._ids = None
+        self._terms = {}
+
+    def _connection(self):
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def match(self, triples):
+        """(view, mapping, used patterns) for the first view answering the BGP, or None"""
+        key = tuple(triples)
+        if key not in self._matches:
+            found = None
+            for view in self.views:
+                matched = view.match(key)
+                if matched is not None:
+                    found = (view, *matched)
+                    break
+            self._matches[key] = found
+        return self._matches[key]
+
+    def _dictionary(self):
+        with self._lock:
+            if self._texts is None:
+                self._texts = dict(self._connection().execute("SELECT id, term FROM view_terms"))
+                self._ids = {text: term_id for term_id, text in self._texts.items()}
+        return self._texts
+
+    def term_id(self, term):
+        self._dictionary()
+        return self._ids.get(encode(term))
+
+    def _decode(self, term_id):
+        term = self._terms.get(term_id)
+        if term is None:
+            term = self._terms[term_id] = decode(self._texts[term_id])
+        return term
+
+    def solutions(self, match, bound):
+        """Lists of query variables and their decoded values, one per solution"""
+        view, mapping, used = match
+        self._dictionary()
+        select = view.select(mapping, used, bound, self.term_id)
+        if select is None:
+            return
+        sql, parameters, variables = select
+        cursor = self._connection().execute(sql, parameters)
+        if not variables:
+            if cursor.fetchone() is not None:
+                yield variables, []
+            return
+        decode_term = self._decode
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for row in rows:
+                yield variables, [decode_term(term_id) for term_id in row]
+
+
+def open_views(source_path, path=PATH_VIEW_PATH, spec_path=PATH_VIEW_SPEC):
+    """
+    (reader, None) when the view file was built for the graph source_path
+    holds now and from the current spec, else (None, reason).
+    """
+    state = view_state(path)
+    if state is None:
+        return None, f"no path views at {path}"
+    version, reason = current_graph_version(source_path)
+    if version is None:
+        return None, reason
+    if state.get('graph_version') != version:
+        return None, f"{path} was built for another graph version"
+    if state.get('spec') != spec_hash(spec_path):
+        return None, f"{os.path.basename(spec_path)} changed since {path} was built"
+    return ViewReader(path, load_views(spec_path)), None
@@ -0,0 +1,64 @@
+"""
+Routing basic graph patterns to the materialized path views
+Registered as an rdflib custom evaluation ahead of the columnar evaluator: a
+BGP over the routed graph that maps onto a path view (see path_view.match)
+is answered with one indexed SELECT DISTINCT on the view table instead of a
+chain of joins. Anything else declines and falls through to the next
+evaluator.
+"""
+
+from itertools import chain
+
+from rdflib.plugins.sparql import CUSTOM_EVALS
+from rdflib.plugins.sparql.sparql import FrozenBindings
+
+EVAL_NAME = 'path_view'
+
+_route = {}
+
+# Optional fn() called before the view is queried and before each solution;
+# it may raise to abandon the query (the SPARQL endpoint checks its timeout)
+row_guard = None
+
+
+def enable(graph, reader):
+    """Answer the BGPs of queries against graph from reader's views where they match"""
+    _route.update(graph=graph, reader=reader)
+    # rdflib tries custom evaluations in insertion order: views go first
+    others = {name: fn for name, fn in CUSTOM_EVALS.items() if name != EVAL_NAME}
+    CUSTOM_EVALS.clear()
+    CUSTOM_EVALS[EVAL_NAME] = evaluate_bgp
+    CUSTOM_EVALS.update(others)
+
+
+def disable():
+    CUSTOM_EVALS.pop(EVAL_NAME, None)
+    _route.clear()
+
+
+def active():
+    return 'reader' in _route
+
+
+def evaluate_bgp(ctx, part):
+    # Declining has to happen here, not inside the generator, for rdflib to fall back
+    if part.name != 'BGP' or not part.triples:
+        raise NotImplementedError
+    reader = _route.get('reader')
+    if reader is None or ctx.graph is not _route['graph']:
+        raise NotImplementedError
+    match = reader.match(part.triples)
+    if match is None:
+        raise NotImplementedError
+    return _solutions(ctx, reader, match)
+
+
+def _solutions(ctx, reader, match):
+    bound = {term: ctx[term] for term in match[1] if ctx[term] is not None}
+    base = list(ctx.solution().items())
+    if row_guard is not None:
+        row_guard()
+    for variables, values in reader.solutions(match, bound):
+        if row_guard is not None:
+            row_guard()
+        yield FrozenBindings(ctx, chain(base, zip(variables, values)))
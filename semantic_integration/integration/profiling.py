@@ -0,0 +1,136 @@
+"""
+Per-stage profiling for the integration pipeline
+Records wall time, CPU time, peak RSS, rows in and triples out for each stage,
+optionally with a cProfile dump per stage.
+"""
+
+import cProfile
+import json
+import os
+import resource
+import time
+
+RUN_REPORT_PATH = 'output/run_report.json'
+
+
+def reset_peak_rss():
+    """Reset the kernel's RSS high-water mark so the next reading covers one stage (Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(stage_scoped):
+    if stage_scoped:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    # Lifetime peak of the process; ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _child_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageProfiler:
+    """
+    Sequential stage timer.
+
+    start(name) / stop(rows=..., triples=...) bracket one stage; stages do not
+    nest. CPU time covers this process plus any worker processes reaped during
+    the stage. add() records a stage measured elsewhere (e.g. in a worker).
+    With dump_dir set, each stage also runs under cProfile and its stats are
+    written to <dump_dir>/<nn>_<stage>.prof (open with pstats or snakeviz).
+    """
+
+    def __init__(self, dump_dir=None):
+        self.dump_dir = dump_dir
+        self.stages = []
+        self._current = None
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    def start(self, name):
+        if self._current is not None:
+            raise RuntimeError(f"Stage {self._current['name']} is still running")
+        profile = None
+        if self.dump_dir:
+            profile = cProfile.Profile()
+        self._current = {
+            'name': name,
+            'stage_scoped_rss': reset_peak_rss(),
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'child_cpu': _child_cpu(),
+            'profile': profile,
+        }
+        if profile is not None:
+            profile.enable()
+
+    def stop(self, rows=None, triples=None):
+        current, self._current = self._current, None
+        if current['profile'] is not None:
+            current['profile'].disable()
+
+        wall = time.perf_counter() - current['wall']
+        record = {
+            'stage': current['name'],
+            'wall_seconds': round(wall, 4),
+            'cpu_seconds': round(time.process_time() - current['cpu'], 4),
+            'child_cpu_seconds': round(_child_cpu() - current['child_cpu'], 4),
+            'peak_rss_mb': peak_rss_mb(current['stage_scoped_rss']),
+            'rows_in': rows,
+            'triples_out': triples,
+            'triples_per_sec': round(triples / wall, 1) if triples and wall > 0 else None,
+        }
+        if current['profile'] is not None:
+            path = self.dump_path(current['name'])
+            current['profile'].dump_stats(path)
+            record['profile_dump'] = path
+        self.stages.append(record)
+        return record
+
+    def dump_path(self, name, ahead=0):
+        """Where the cProfile dump of the stage recorded `ahead` stages from now goes; None when dumps are off"""
+        if not self.dump_dir:
+            return None
+        return os.path.join(self.dump_dir, f"{len(self.stages) + ahead:02d}_{name}.prof")
+
+    def add(self, name, wall_seconds, cpu_seconds=None, peak_rss_mb=None, rows=None, triples=None,
+            profile_dump=None):
+        record = {
+            'stage': name,
+            'wall_seconds': round(wall_seconds, 4),
+            'cpu_seconds': round(cpu_seconds, 4) if cpu_seconds is not None else None,
+            'child_cpu_seconds': None,
+            'peak_rss_mb': peak_rss_mb,
+            'rows_in': rows,
+            'triples_out': triples,
+            'triples_per_sec': round(triples / wall_seconds, 1) if triples and wall_seconds > 0 else None,
+        }
+        if profile_dump:
+            record['profile_dump'] = profile_dump
+        self.stages.append(record)
+
+    def summary(self):
+        """Aligned text table of the recorded stages"""
+        lines = [f"   {'stage':24}{'wall s':>9}{'cpu s':>9}{'rss MB':>9}{'rows':>10}{'triples':>10}"]
+        for stage in self.stages:
+            cpu = (stage['cpu_seconds'] or 0) + (stage['child_cpu_seconds'] or 0)
+            lines.append(f"   {stage['stage']:24}{stage['wall_seconds']:9.3f}{cpu:9.3f}"
+                         f"{stage['peak_rss_mb'] or 0:9.1f}{stage['rows_in'] or 0:10,}"
+                         f"{stage['triples_out'] or 0:10,}")
+        return '\n'.join(lines)
+
+    def write_report(self, path=RUN_REPORT_PATH, **run_info):
+        report = dict(run_info, stages=self.stages,
+                      total_wall_seconds=round(sum(stage['wall_seconds'] for stage in self.stages), 4))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
@@ -3,221 +3,277 @@ Semantic Integration Framework
 Transforms heterogeneous data sources to RDF format using the university ontology
 """
 
-from rdflib import Graph, Namespace, Literal, URIRef, RDF, RDFS, OWL, XSD
+from rdflib import Graph, RDFS, OWL
+import argparse
 import sqlite3
-import xml.etree.ElementTree as ET
-import pandas as pd
+import sys
 import json
 from datetime import datetime
 
+from vocab import UNI, DATA
+from sinks import GraphSink
+from sqlite_mapper import DEFAULT_BATCH_SIZE, TABLE_MAPPINGS, stream_table
+from instructor_index import InstructorIndex
+from csv_mapper import DEFAULT_CHUNK_SIZE, department_mapping, map_csv
+from xml_mapper import map_courses
+from parallel_mapping import DEFAULT_CHUNK_ROWS, map_sources_parallel, merge_shards
+from incremental import load_manifest, save_manifest, plan_changes, has_changes, apply_plan
+from sqlite_store import SQLiteStore
+from serialization import serialize_all
+from graph_snapshot import SNAPSHOT_DIR, write_snapshot
+from graph_version import GRAPH_VERSION_PATH, current_graph_version, recorded_source, write_graph_version
+from graph_statistics import STATISTICS_PATH, write_statistics
+from path_view import PATH_VIEW_PATH, update_views, view_state, write_views, spec_hash
+from mapping_engine import SPEC, documentation
+from profiling import RUN_REPORT_PATH, StageProfiler
+
+SQLITE_SOURCE = 'data_sources/students.db'
+XML_SOURCE = 'data_sources/courses.xml'
+CSV_SOURCE = 'data_sources/departments.csv'
+ONTOLOGY_SOURCE = 'ontology/university_ontology.owl'
+SHARD_DIR = 'output/shards'
+INTEGRATED_NT = 'output/integrated_data.nt'
+DEFAULT_STORE_PATH = 'output/integrated_store.sqlite'
+
+parser = argparse.ArgumentParser(description="Map the university data sources to RDF")
+parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                    help="Rows fetched per cursor batch when streaming SQLite tables")
+parser.add_argument('--csv-chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help="Rows per typed chunk when mapping CSV sources")
+parser.add_argument('--workers', type=int, default=1,
+                    help="Map sources in a process pool of this size (1 = sequential)")
+parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                    help="Rows per parallel task when splitting large tables and CSV files")
+parser.add_argument('--incremental', action='store_true',
+                    help="Remap only sources changed since the last run and patch the previous graph")
+parser.add_argument('--store', choices=['memory', 'sqlite'], default='memory',
+                    help="Keep the integrated graph in memory or in an on-disk SQLite triple store")
+parser.add_argument('--store-path', default=DEFAULT_STORE_PATH,
+                    help="File backing --store sqlite")
+parser.add_argument('--serialize-workers', type=int, default=3,
+                    help="Processes converting the N-Triples dump to the other formats (1 = in-process)")
+parser.add_argument('--gzip', action='store_true',
+                    help="Write every serialization gzip-compressed (.gz)")
+parser.add_argument('--no-snapshot', action='store_true',
+                    help="Skip the memory-mappable binary snapshot the query engine starts from")
+parser.add_argument('--profile', action='store_true',
+                    help="Record wall/CPU time, peak RSS, rows and triples per stage into "
+                         "statistics.stages and output/run_report.json")
+parser.add_argument('--profile-dir',
+                    help="Also write a cProfile dump per stage to this directory (implies --profile)")
+args = parser.parse_args()
+if args.profile_dir:
+    args.profile = True
+if args.incremental and args.workers > 1:
+    parser.error("--incremental maps changed sources sequentially; drop --workers")
+if args.incremental and args.gzip:
+    parser.error("--incremental patches the plain N-Triples output; drop --gzip")
+
 print("="*70)
 print("SEMANTIC INTEGRATION FRAMEWORK")
 print("="*70)
 
-# Define namespaces
-UNI = Namespace("http://university.edu/ontology#")
-DATA = Namespace("http://university.edu/data#")
+profiler = StageProfiler(dump_dir=args.profile_dir)
+
+if args.incremental:
+    print("\n0. Checking sources against the integration manifest...")
+    incremental_sources = {'ontology': ONTOLOGY_SOURCE, 'sqlite': SQLITE_SOURCE,
+                           'xml': XML_SOURCE, 'csv': CSV_SOURCE}
+    previous_manifest = load_manifest()
+    plan = plan_changes(previous_manifest, incremental_sources, INTEGRATED_NT)
+    # The graph the patch starts from, so the path views can be patched along with it
+    previous_graph_version, _ = current_graph_version(recorded_source('output/integrated_data.ttl'))
+
+    if not has_changes(plan):
+        previous_manifest.update(files=plan['files'], tables=plan['tables'])
+        save_manifest(previous_manifest)
+        print("   ✓ No source changed since the last run; integrated graph is up to date")
+        sys.exit(0)
+
+    if plan['full']:
+        print(f"   ✓ Full rebuild ({plan['reason']})")
+    else:
+        changed = plan['remap'] + [f"{table} (+rows from rowid {rowid})"
+                                   for table, rowid in plan['append'].items()]
+        print(f"   ✓ Changed: {', '.join(changed)}")
 
 # Create RDF graph
-g = Graph()
+if args.store == 'sqlite':
+    store = SQLiteStore()
+    # An incremental patch continues from the previous store; anything else starts empty
+    patching_store = args.incremental and not plan['full']
+    if not patching_store:
+        store.destroy(args.store_path)
+    g = Graph(store=store)
+    g.open(args.store_path, create=True)
+else:
+    patching_store = False
+    g = Graph()
 g.bind("uni", UNI)
 g.bind("data", DATA)
 g.bind("owl", OWL)
 g.bind("rdfs", RDFS)
 
-print("\n1. Loading ontology...")
-# Load the ontology
-ontology_graph = Graph()
-ontology_graph.parse("ontology/university_ontology.owl", format="xml")
-print(f"   ✓ Loaded ontology with {len(ontology_graph)} triples")
-
-# Merge ontology into main graph
-g += ontology_graph
-
-# ============================================================================
-# MAPPING 1: SQLite Database -> RDF
-# ============================================================================
-print("\n2. Mapping SQLite Database (students.db) to RDF...")
-
-conn = sqlite3.connect('data_sources/students.db')
-cursor = conn.cursor()
-
-# Map Students table
-cursor.execute("SELECT * FROM Students")
-students = cursor.fetchall()
-student_count = 0
-
-for student in students:
-    student_id, first_name, last_name, email, dob, enroll_year, major, gpa = student
-    
-    # Create student URI
-    student_uri = DATA[f"student_{student_id}"]
-    
-    # Add type
-    g.add((student_uri, RDF.type, UNI.Student))
-    
-    # Add properties
-    g.add((student_uri, UNI.studentID, Literal(str(student_id), datatype=XSD.string)))
-    g.add((student_uri, UNI.firstName, Literal(first_name, datatype=XSD.string)))
-    g.add((student_uri, UNI.lastName, Literal(last_name, datatype=XSD.string)))
-    g.add((student_uri, UNI.email, Literal(email, datatype=XSD.string)))
-    g.add((student_uri, UNI.dateOfBirth, Literal(dob, datatype=XSD.date)))
-    g.add((student_uri, UNI.enrollmentYear, Literal(enroll_year, datatype=XSD.gYear)))
-    g.add((student_uri, UNI.gpa, Literal(gpa, datatype=XSD.decimal)))
-    
-    # Link to major department (will be created from CSV)
-    if major:
-        dept_uri = DATA[f"dept_{major.replace(' ', '_')}"]
-        g.add((student_uri, UNI.majorIn, dept_uri))
-    
-    student_count += 1
-
-print(f"   ✓ Mapped {student_count} students from Students table")
-
-# Map Enrollments table
-cursor.execute("SELECT * FROM Enrollments")
-enrollments = cursor.fetchall()
-enrollment_count = 0
-
-for enrollment in enrollments:
-    enroll_id, student_id, course_code, semester, grade, credits = enrollment
-    
-    # Create enrollment URI
-    enrollment_uri = DATA[f"enrollment_{enroll_id}"]
-    student_uri = DATA[f"student_{student_id}"]
-    course_uri = DATA[f"course_{course_code}"]
-    
-    # Add type
-    g.add((enrollment_uri, RDF.type, UNI.Enrollment))
-    
-    # Add properties
-    g.add((enrollment_uri, UNI.semester, Literal(semester, datatype=XSD.string)))
-    g.add((enrollment_uri, UNI.grade, Literal(grade, datatype=XSD.string)))
-    
-    # Add relationships
-    g.add((student_uri, UNI.hasEnrollment, enrollment_uri))
-    g.add((enrollment_uri, UNI.enrollmentFor, course_uri))
-    g.add((student_uri, UNI.enrolledIn, course_uri))
-    
-    enrollment_count += 1
-
-conn.close()
-print(f"   ✓ Mapped {enrollment_count} enrollments from Enrollments table")
-
-# ============================================================================
-# MAPPING 2: XML File -> RDF
-# ============================================================================
-print("\n3. Mapping XML File (courses.xml) to RDF...")
-
-tree = ET.parse('data_sources/courses.xml')
-root = tree.getroot()
-
-# Remove namespace for easier parsing
-for elem in root.iter():
-    if '}' in elem.tag:
-        elem.tag = elem.tag.split('}', 1)[1]
-
-courses = root.findall('Course')
-course_count = 0
-instructor_count = 0
-instructor_ids = set()
-
-for course in courses:
-    course_code = course.get('courseCode')
-    course_name = course.find('CourseName').text
-    department = course.find('Department').text
-    credits = int(course.find('Credits').text)
-    instructor_elem = course.find('Instructor')
-    instructor_id = instructor_elem.get('instructorID')
-    instructor_name = instructor_elem.text
-    
-    # Create course URI
-    course_uri = DATA[f"course_{course_code}"]
-    
-    # Add type
-    g.add((course_uri, RDF.type, UNI.Course))
-    
-    # Add properties
-    g.add((course_uri, UNI.courseCode, Literal(course_code, datatype=XSD.string)))
-    g.add((course_uri, UNI.courseName, Literal(course_name, datatype=XSD.string)))
-    g.add((course_uri, UNI.credits, Literal(credits, datatype=XSD.integer)))
-    
-    # Link to department
-    dept_uri = DATA[f"dept_{department.replace(' ', '_')}"]
-    g.add((course_uri, UNI.offeredBy, dept_uri))
-    
-    # Create instructor if not exists
-    if instructor_id not in instructor_ids:
-        instructor_uri = DATA[f"instructor_{instructor_id}"]
-        g.add((instructor_uri, RDF.type, UNI.Instructor))
-        g.add((instructor_uri, UNI.instructorID, Literal(instructor_id, datatype=XSD.string)))
-        
-        # Parse instructor name
-        name_parts = instructor_name.replace('Dr. ', '').split(' ')
-        if len(name_parts) >= 2:
-            g.add((instructor_uri, UNI.firstName, Literal(name_parts[0], datatype=XSD.string)))
-            g.add((instructor_uri, UNI.lastName, Literal(' '.join(name_parts[1:]), datatype=XSD.string)))
-        
-        instructor_ids.add(instructor_id)
-        instructor_count += 1
+if args.incremental and not plan['full']:
+    print("\n1. Loading previous integrated graph...")
+    profiler.start('load_previous_graph')
+    if patching_store and len(g) > 0:
+        print(f"   ✓ Opened {args.store_path} with {len(g):,} triples to patch")
     else:
-        instructor_uri = DATA[f"instructor_{instructor_id}"]
-    
-    # Link instructor to course
-    g.add((instructor_uri, UNI.teaches, course_uri))
-    
-    course_count += 1
-
-print(f"   ✓ Mapped {course_count} courses from XML file")
-print(f"   ✓ Mapped {instructor_count} instructors from XML file")
-
-# ============================================================================
-# MAPPING 3: CSV File -> RDF
-# ============================================================================
-print("\n4. Mapping CSV File (departments.csv) to RDF...")
-
-df = pd.read_csv('data_sources/departments.csv')
-dept_count = 0
-
-for _, row in df.iterrows():
-    dept_id = row['department_id']
-    dept_name = row['department_name']
-    building = row['building']
-    head_name = row['head_of_department']
-    faculty_count = int(row['faculty_count'])
-    established_year = int(row['established_year'])
-    budget = int(row['budget'])
-    
-    # Create department URI
-    dept_uri = DATA[f"dept_{dept_name.replace(' ', '_')}"]
-    
-    # Add type
-    g.add((dept_uri, RDF.type, UNI.Department))
-    
-    # Add properties
-    g.add((dept_uri, UNI.departmentID, Literal(dept_id, datatype=XSD.string)))
-    g.add((dept_uri, UNI.departmentName, Literal(dept_name, datatype=XSD.string)))
-    g.add((dept_uri, UNI.building, Literal(building, datatype=XSD.string)))
-    g.add((dept_uri, UNI.facultyCount, Literal(faculty_count, datatype=XSD.integer)))
-    g.add((dept_uri, UNI.establishedYear, Literal(established_year, datatype=XSD.gYear)))
-    g.add((dept_uri, UNI.budget, Literal(budget, datatype=XSD.integer)))
-    
-    # Try to link department head to existing instructor
-    head_name_clean = head_name.replace('Dr. ', '')
-    # Search for matching instructor by last name
-    last_name = head_name_clean.split(' ')[-1]
-    
-    for instructor_id in instructor_ids:
-        instructor_uri = DATA[f"instructor_{instructor_id}"]
-        # Check if this instructor's last name matches
-        for _, _, ln_literal in g.triples((instructor_uri, UNI.lastName, None)):
-            if str(ln_literal) == last_name:
-                g.add((dept_uri, UNI.headedBy, instructor_uri))
-                break
-    
-    dept_count += 1
-
-print(f"   ✓ Mapped {dept_count} departments from CSV file")
+        g.parse(INTEGRATED_NT, format="nt")
+        print(f"   ✓ Loaded {len(g):,} triples to patch")
+    profiler.stop(triples=len(g))
+else:
+    print("\n1. Loading ontology...")
+    profiler.start('ontology')
+    # Load the ontology
+    ontology_graph = Graph()
+    ontology_graph.parse(ONTOLOGY_SOURCE, format="xml")
+    print(f"   ✓ Loaded ontology with {len(ontology_graph)} triples")
+
+    # Merge ontology into main graph
+    g += ontology_graph
+    profiler.stop(triples=len(ontology_graph))
+
+if args.incremental:
+    # ========================================================================
+    # INCREMENTAL MAPPING: retract and remap only the changed sources
+    # ========================================================================
+    print("\n2-4. Remapping changed sources...")
+
+    profiler.start('incremental_patch')
+    patch = apply_plan(g, plan, previous_manifest, incremental_sources,
+                       args.batch_size, args.csv_chunk_size)
+    unit_stats = patch['stats']
+    profiler.stop(triples=len(g))
+    table_stats = {table: unit_stats[table] for table in ('Students', 'Enrollments')}
+    xml_stats = unit_stats['courses']
+    csv_stats = unit_stats['departments']
+    ambiguous_heads = patch['ambiguous_heads']
+
+    student_count = table_stats['Students']['rows']
+    enrollment_count = table_stats['Enrollments']['rows']
+    course_count = xml_stats['rows']
+    instructor_count = xml_stats['instructors']
+    dept_count = csv_stats['rows']
+
+    print(f"   ✓ Remapped {', '.join(patch['units'])} in {patch['seconds']}s")
+    print(f"   ✓ Retracted {patch['retracted']} old triples; graph now has {len(g):,}")
+    for dept_name, issue in ambiguous_heads.items():
+        print(f"   ⚠ Ambiguous head for {dept_name}: {issue['head_of_department']} matches "
+              f"{len(issue['candidates'])} instructors, headedBy not linked")
+elif args.workers > 1:
+    # ========================================================================
+    # PARALLEL MAPPING: every source (or row range) -> its own N-Triples shard
+    # ========================================================================
+    print(f"\n2-4. Mapping SQLite, XML and CSV sources in parallel ({args.workers} workers)...")
+
+    profiler.start('parallel_mapping')
+    parallel = map_sources_parallel(SQLITE_SOURCE, XML_SOURCE, CSV_SOURCE, SHARD_DIR, args.workers,
+                                    chunk_rows=args.chunk_rows, batch_size=args.batch_size,
+                                    csv_chunk_size=args.csv_chunk_size)
+    sources = parallel['sources']
+    profiler.stop(rows=sum(source['rows'] for source in sources.values()),
+                  triples=sum(source['triples'] for source in sources.values()) + parallel['head_links'])
+
+    profiler.start('merge_shards')
+    merged_path = f"{SHARD_DIR}/merged.nt"
+    written, duplicates = merge_shards(parallel['shards'], merged_path)
+    g.parse(merged_path, format="nt")
+    profiler.stop(rows=written + duplicates, triples=written)
+
+    empty = {'rows': 0, 'triples': 0, 'seconds': 0.0, 'rows_per_sec': None}
+    table_stats = {table: sources.get(table, empty) for table in ('Students', 'Enrollments')}
+    xml_stats = sources.get('xml', dict(empty, instructors=0))
+    csv_stats = sources.get('csv', empty)
+    ambiguous_heads = parallel['ambiguous_heads']
+
+    student_count = table_stats['Students']['rows']
+    enrollment_count = table_stats['Enrollments']['rows']
+    course_count = xml_stats['rows']
+    instructor_count = xml_stats['instructors']
+    dept_count = csv_stats['rows']
+
+    print(f"   ✓ Ran {parallel['tasks']} mapping tasks in {parallel['seconds']}s")
+    print(f"   ✓ Mapped {student_count} students, {enrollment_count} enrollments, "
+          f"{course_count} courses, {instructor_count} instructors, {dept_count} departments")
+    print(f"   ✓ Resolved {parallel['head_links']} headedBy links across shards")
+    print(f"   ✓ Merged {len(parallel['shards'])} shards: {written} triples "
+          f"({duplicates} duplicates dropped)")
+    for dept_name, issue in ambiguous_heads.items():
+        print(f"   ⚠ Ambiguous head for {dept_name}: {issue['head_of_department']} matches "
+              f"{len(issue['candidates'])} instructors, headedBy not linked")
+else:
+    # ============================================================================
+    # MAPPING 1: SQLite Database -> RDF
+    # ============================================================================
+    print("\n2. Mapping SQLite Database (students.db) to RDF...")
+
+    profiler.start('sqlite')
+    conn = sqlite3.connect(SQLITE_SOURCE)
+    sink = GraphSink(g)
+
+    # Stream both tables batch by batch through the mappings compiled from the spec
+    table_stats = {}
+    for table, mapping in TABLE_MAPPINGS.items():
+        table_stats[table] = stream_table(conn, table, mapping.triples, sink, batch_size=args.batch_size,
+                                          columns=mapping.columns)
+
+    conn.close()
+    profiler.stop(rows=sum(stats['rows'] for stats in table_stats.values()),
+                  triples=sum(stats['triples'] for stats in table_stats.values()))
+
+    student_count = table_stats['Students']['rows']
+    enrollment_count = table_stats['Enrollments']['rows']
+    print(f"   ✓ Mapped {student_count} students from Students table "
+          f"({table_stats['Students']['rows_per_sec']} rows/sec)")
+    print(f"   ✓ Mapped {enrollment_count} enrollments from Enrollments table "
+          f"({table_stats['Enrollments']['rows_per_sec']} rows/sec)")
+
+    # ============================================================================
+    # MAPPING 2: XML File -> RDF
+    # ============================================================================
+    print("\n3. Mapping XML File (courses.xml) to RDF...")
+
+    profiler.start('xml')
+    instructor_index = InstructorIndex()
+
+    # iterparse: each <Course> is mapped on its end event and then cleared
+    xml_stats = map_courses(XML_SOURCE, sink, instructor_index,
+                            batch_size=args.batch_size)
+    profiler.stop(rows=xml_stats['rows'], triples=xml_stats['triples'])
+    course_count = xml_stats['rows']
+    instructor_count = xml_stats['instructors']
+
+    print(f"   ✓ Mapped {course_count} courses from XML file")
+    print(f"   ✓ Mapped {instructor_count} instructors from XML file")
+
+    # ============================================================================
+    # MAPPING 3: CSV File -> RDF
+    # ============================================================================
+    print("\n4. Mapping CSV File (departments.csv) to RDF...")
+
+    profiler.start('csv')
+    ambiguous_heads = {}
+
+    # Columnar mapping: typed chunks, URIs and Literals built column by column
+    csv_stats = map_csv(CSV_SOURCE,
+                        department_mapping(instructor_index, ambiguous_heads),
+                        sink, chunk_size=args.csv_chunk_size)
+    dept_count = csv_stats['rows']
+    profiler.stop(rows=csv_stats['rows'], triples=csv_stats['triples'])
+
+    print(f"   ✓ Mapped {dept_count} departments from CSV file")
+    for dept_name, issue in ambiguous_heads.items():
+        print(f"   ⚠ Ambiguous head for {dept_name}: {issue['head_of_department']} matches "
+              f"{len(issue['candidates'])} instructors, headedBy not linked")
+
+# All mapping writes land in one transaction (a no-op for the in-memory store)
+profiler.start('commit')
+g.commit()
+profiler.stop(triples=len(g))
+if args.store == 'sqlite':
+    print(f"\n   ✓ Committed {len(g):,} triples to {args.store_path}")
 
 # ============================================================================
 # Save integrated RDF data
@@ -229,95 +285,111 @@ output_formats = {
     'turtle': 'output/integrated_data.ttl',
     'xml': 'output/integrated_data.rdf',
     'n3': 'output/integrated_data.n3',
-    'nt': 'output/integrated_data.nt'
+    'nt': INTEGRATED_NT
 }
 
-for format_name, filepath in output_formats.items():
-    g.serialize(destination=filepath, format=format_name)
-    print(f"   ✓ Saved {filepath}")
+# N-Triples is streamed once; turtle/xml/n3 are converted from it in parallel
+serialization_stats = serialize_all(g, output_formats, workers=args.serialize_workers,
+                                    compress=args.gzip, profiler=profiler)
+for format_name, timing in serialization_stats.items():
+    print(f"   ✓ Saved {timing['path']} ({timing['seconds']}s, {timing['bytes']:,} bytes)")
+
+# Content hash of the graph: cached query results are keyed on it, so writing
+# a new version invalidates them
+profiler.start('graph_version')
+graph_version = write_graph_version(g, serialization_stats['turtle']['path'], GRAPH_VERSION_PATH)
+profiler.stop(triples=graph_version['triples'])
+print(f"   ✓ Saved {GRAPH_VERSION_PATH} (version {graph_version['version'][:12]})")
+
+# Cardinalities and data-verified implications for the query planner, tied
+# to the graph version so stale counts are never used
+profiler.start('statistics')
+graph_statistics = write_statistics(g, graph_version['version'], STATISTICS_PATH)
+profiler.stop(triples=graph_statistics['triples'])
+print(f"   ✓ Saved {STATISTICS_PATH} ({len(graph_statistics['predicates'])} predicates, "
+      f"{len(graph_statistics['classes'])} classes)")
+
+# Flattened Student -> Enrollment -> Course -> Department rows for the query
+# side; a patch rewrites only the rows of the resources it touched, provided
+# the views were built from the graph it started from
+profiler.start('path_views')
+views_state = view_state(PATH_VIEW_PATH)
+if args.incremental and not plan['full'] and views_state is not None \
+        and views_state.get('graph_version') == previous_graph_version \
+        and views_state.get('spec') == spec_hash():
+    view_stats = update_views(g, patch['changed_nodes'], graph_version['version'], PATH_VIEW_PATH)
+    view_rows = sum(stats['rows'] for stats in view_stats.values())
+    profiler.stop(rows=view_rows)
+    refreshed = sum(stats['refreshed_roots'] for stats in view_stats.values())
+    print(f"   ✓ Patched {PATH_VIEW_PATH} ({len(patch['changed_nodes'])} changed resources, "
+          f"{refreshed} view roots refreshed, {view_rows:,} rows)")
+else:
+    view_stats = write_views(g, graph_version['version'], PATH_VIEW_PATH)
+    view_rows = sum(stats['rows'] for stats in view_stats.values())
+    profiler.stop(rows=view_rows)
+    print(f"   ✓ Saved {PATH_VIEW_PATH} ({len(view_stats)} view(s), {view_rows:,} rows)")
+
+# Binary snapshot of the Turtle output: dictionary-encoded terms + id triples,
+# which sparql_queries.py memory-maps instead of parsing Turtle
+if not args.no_snapshot:
+    profiler.start('snapshot')
+    snapshot_meta = write_snapshot(g, serialization_stats['turtle']['path'], SNAPSHOT_DIR)
+    profiler.stop(rows=snapshot_meta['triples'], triples=snapshot_meta['triples'])
+    print(f"   ✓ Saved {SNAPSHOT_DIR}/ ({snapshot_meta['terms']:,} terms, "
+          f"{snapshot_meta['triples']:,} triples)")
 
 # ============================================================================
 # Generate mapping documentation
 # ============================================================================
 print("\n6. Creating mapping documentation...")
 
+# The mapping section is generated from mappings/mapping_spec.json, the same
+# spec the mappers were compiled from, so the documentation cannot drift
 mapping_doc = {
-    "mappings": {
-        "Students_table_to_RDF": {
-            "source": "students.db - Students table",
-            "target_class": "uni:Student",
-            "mappings": {
-                "student_id": "uni:studentID (xsd:string)",
-                "first_name": "uni:firstName (xsd:string)",
-                "last_name": "uni:lastName (xsd:string)",
-                "email": "uni:email (xsd:string)",
-                "date_of_birth": "uni:dateOfBirth (xsd:date)",
-                "enrollment_year": "uni:enrollmentYear (xsd:gYear)",
-                "gpa": "uni:gpa (xsd:decimal)",
-                "major": "uni:majorIn -> uni:Department"
-            },
-            "uri_pattern": "data:student_{student_id}"
-        },
-        "Enrollments_table_to_RDF": {
-            "source": "students.db - Enrollments table",
-            "target_class": "uni:Enrollment",
-            "mappings": {
-                "enrollment_id": "URI identifier",
-                "student_id": "uni:hasEnrollment (from Student)",
-                "course_code": "uni:enrollmentFor -> uni:Course",
-                "semester": "uni:semester (xsd:string)",
-                "grade": "uni:grade (xsd:string)"
-            },
-            "uri_pattern": "data:enrollment_{enrollment_id}",
-            "relationships": [
-                "Student -> uni:hasEnrollment -> Enrollment",
-                "Enrollment -> uni:enrollmentFor -> Course",
-                "Student -> uni:enrolledIn -> Course"
-            ]
-        },
-        "Courses_XML_to_RDF": {
-            "source": "courses.xml - Course elements",
-            "target_class": "uni:Course",
-            "mappings": {
-                "@courseCode": "uni:courseCode (xsd:string)",
-                "CourseName": "uni:courseName (xsd:string)",
-                "Department": "uni:offeredBy -> uni:Department",
-                "Credits": "uni:credits (xsd:integer)",
-                "Instructor/@instructorID": "Creates uni:Instructor",
-                "Instructor/text()": "Instructor name (firstName, lastName)"
-            },
-            "uri_pattern": "data:course_{courseCode}"
-        },
-        "Departments_CSV_to_RDF": {
-            "source": "departments.csv",
-            "target_class": "uni:Department",
-            "mappings": {
-                "department_id": "uni:departmentID (xsd:string)",
-                "department_name": "uni:departmentName (xsd:string)",
-                "building": "uni:building (xsd:string)",
-                "faculty_count": "uni:facultyCount (xsd:integer)",
-                "established_year": "uni:establishedYear (xsd:gYear)",
-                "budget": "uni:budget (xsd:integer)",
-                "head_of_department": "uni:headedBy -> uni:Instructor"
-            },
-            "uri_pattern": "data:dept_{department_name}"
-        }
-    },
+    "mappings": documentation(SPEC),
     "statistics": {
         "total_triples": len(g),
         "students": student_count,
         "enrollments": enrollment_count,
         "courses": course_count,
         "instructors": instructor_count,
-        "departments": dept_count
+        "departments": dept_count,
+        "sqlite_throughput": table_stats,
+        "xml_throughput": xml_stats,
+        "csv_throughput": csv_stats,
+        "serialization": serialization_stats,
+        "ambiguous_department_heads": ambiguous_heads
     }
 }
+if args.profile:
+    mapping_doc["statistics"]["stages"] = profiler.stages
 
 with open('mappings/mapping_documentation.json', 'w', encoding='utf-8') as f:
     json.dump(mapping_doc, f, indent=2)
 
 print(f"   ✓ Created mapping_documentation.json")
 
+if args.profile:
+    profiler.write_report(
+        RUN_REPORT_PATH,
+        timestamp=datetime.now().isoformat(),
+        mode='incremental' if args.incremental else 'parallel' if args.workers > 1 else 'sequential',
+        arguments=vars(args),
+        total_triples=len(g),
+    )
+    print(f"   ✓ Wrote per-stage profile to {RUN_REPORT_PATH}")
+    print(profiler.summary())
+
+if args.incremental:
+    save_manifest({
+        'updated': datetime.now().isoformat(),
+        'files': plan['files'],
+        'tables': plan['tables'],
+        'stats': unit_stats,
+        'ambiguous_heads': ambiguous_heads
+    })
+    print("   ✓ Updated output/integration_manifest.json")
+
 # ============================================================================
 # Summary
 # ============================================================================
@@ -332,10 +404,13 @@ print(f"  - Courses: {course_count}")
 print(f"  - Instructors: {instructor_count}")
 print(f"  - Departments: {dept_count}")
 print(f"\nOutput Files:")
-print(f"  - Turtle format: output/integrated_data.ttl")
-print(f"  - RDF/XML format: output/integrated_data.rdf")
-print(f"  - N3 format: output/integrated_data.n3")
-print(f"  - N-Triples format: output/integrated_data.nt")
+print(f"  - Turtle format: {serialization_stats['turtle']['path']}")
+print(f"  - RDF/XML format: {serialization_stats['xml']['path']}")
+print(f"  - N3 format: {serialization_stats['n3']['path']}")
+print(f"  - N-Triples format: {serialization_stats['nt']['path']}")
 print(f"\nMapping Documentation: mappings/mapping_documentation.json")
 print("\n✓ Semantic integration complete!")
 print("="*70)
+
+if args.store == 'sqlite':
+    g.close(commit_pending_transaction=True)
@@ -0,0 +1,121 @@
+"""
+Multi-format serialization of the integrated graph
+N-Triples is streamed once; the sorted/grouped formats are produced from that
+dump in parallel worker processes, optionally gzip-compressed.
+"""
+
+import cProfile
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import Graph
+from rdflib.plugins.serializers.nt import _nt_row
+
+from profiling import peak_rss_mb, reset_peak_rss
+
+WRITE_BATCH = 10000
+
+
+def _open_output(path, compress):
+    return gzip.open(path, 'wb') if compress else open(path, 'wb')
+
+
+def _open_input(path, compressed):
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+
+def output_path(path, compress):
+    return path + '.gz' if compress else path
+
+
+def write_ntriples(graph, path, compress=False):
+    """Stream the graph to N-Triples without building the document in memory"""
+    count = 0
+    batch = []
+    with _open_output(path, compress) as f:
+        for triple in graph:
+            batch.append(_nt_row(triple))
+            if len(batch) >= WRITE_BATCH:
+                f.write(''.join(batch).encode('utf-8'))
+                count += len(batch)
+                batch = []
+        if batch:
+            f.write(''.join(batch).encode('utf-8'))
+            count += len(batch)
+    return count
+
+
+def convert_ntriples(nt_path, format_name, path, namespaces, compress=False, profile_path=None):
+    """Worker: parse the N-Triples dump and serialize it in another format"""
+    profile = cProfile.Profile() if profile_path else None
+    stage_scoped_rss = reset_peak_rss()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    if profile is not None:
+        profile.enable()
+    graph = Graph()
+    for prefix, namespace in namespaces:
+        graph.bind(prefix, namespace)
+    with _open_input(nt_path, compress) as f:
+        graph.parse(f, format='nt')
+    with _open_output(path, compress) as f:
+        graph.serialize(destination=f, format=format_name, encoding='utf-8')
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(profile_path)
+    return {'format': format_name, 'path': path, 'seconds': time.perf_counter() - start,
+            'cpu_seconds': time.process_time() - cpu_start, 'peak_rss_mb': peak_rss_mb(stage_scoped_rss),
+            'triples': len(graph), 'profile_dump': profile_path}
+
+
+def serialize_all(graph, output_formats, workers=1, compress=False, profiler=None):
+    """
+    Write every format in output_formats ({format: path}). 'nt' is always
+    written first as a stream; with workers > 1 the other formats are
+    converted from it in a process pool, otherwise serialized in-process.
+    A StageProfiler, when given, gets one serialize_<format> stage per format.
+    Returns {format: {'path', 'seconds', 'bytes'}}.
+    """
+    timings = {}
+    nt_path = output_path(output_formats.get('nt', 'output/integrated_data.nt'), compress)
+
+    if profiler is not None:
+        profiler.start('serialize_nt')
+    start = time.perf_counter()
+    triples = write_ntriples(graph, nt_path, compress)
+    timings['nt'] = {'path': nt_path, 'seconds': time.perf_counter() - start, 'triples': triples}
+    if profiler is not None:
+        profiler.stop(rows=triples, triples=triples)
+
+    others = {fmt: output_path(path, compress) for fmt, path in output_formats.items() if fmt != 'nt'}
+
+    if workers > 1 and others:
+        namespaces = [(prefix, str(namespace)) for prefix, namespace in graph.namespaces()]
+        with ProcessPoolExecutor(max_workers=min(workers, len(others))) as pool:
+            futures = [pool.submit(convert_ntriples, nt_path, fmt, path, namespaces, compress,
+                                   profiler.dump_path(f"serialize_{fmt}", i) if profiler is not None else None)
+                       for i, (fmt, path) in enumerate(others.items())]
+            for future in futures:
+                result = future.result()
+                timings[result['format']] = {'path': result['path'], 'seconds': result['seconds']}
+                if profiler is not None:
+                    profiler.add(f"serialize_{result['format']}", result['seconds'], result['cpu_seconds'],
+                                 result['peak_rss_mb'], rows=result['triples'], triples=result['triples'],
+                                 profile_dump=result['profile_dump'])
+    else:
+        for format_name, path in others.items():
+            if profiler is not None:
+                profiler.start(f"serialize_{format_name}")
+            start = time.perf_counter()
+            with _open_output(path, compress) as f:
+                graph.serialize(destination=f, format=format_name, encoding='utf-8')
+            timings[format_name] = {'path': path, 'seconds': time.perf_counter() - start}
+            if profiler is not None:
+                profiler.stop(rows=triples, triples=triples)
+
+    for timing in timings.values():
+        timing['seconds'] = round(timing['seconds'], 4)
+        timing['bytes'] = os.path.getsize(timing['path'])
+    return timings
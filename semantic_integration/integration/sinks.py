@@ -0,0 +1,62 @@
+"""
+Triple sinks
+Targets the source mappers push triple batches into
+"""
+
+from rdflib import Literal
+from rdflib.plugins.serializers.nt import _nt_row
+
+
+class GraphSink:
+    """Bulk-loads triple batches into an rdflib graph with a single addN call"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def add(self, triples):
+        graph = self.graph
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+
+
+class NTriplesSink:
+    """Writes triple batches to an N-Triples file, one line per triple"""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def add(self, triples):
+        self.file.write(''.join(_nt_row(triple) for triple in triples))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TeeSink:
+    """Forwards every batch to several sinks, e.g. the graph and a source shard"""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def add(self, triples):
+        for sink in self.sinks:
+            sink.add(triples)
+
+
+class NodeSink:
+    """Records the resources (subjects and non-literal objects) of every batch, not the triples"""
+
+    def __init__(self, nodes=None):
+        self.nodes = set() if nodes is None else nodes
+
+    def add(self, triples):
+        for s, _, o in triples:
+            self.nodes.add(s)
+            if not isinstance(o, Literal):
+                self.nodes.add(o)
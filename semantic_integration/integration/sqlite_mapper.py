@@ -0,0 +1,86 @@
+"""
+Streaming SQLite -> RDF mapper
+Walks table cursors in fetchmany batches and pushes triples to a sink in bulk
+"""
+
+import time
+
+from mapping_engine import SPEC, RowMapping
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def compile_tables(spec=SPEC):
+    """Compiled RowMapping per SQLite table in the mapping spec, keyed by table name"""
+    return {
+        mapping['source']['table']: RowMapping(name, mapping, spec['prefixes'])
+        for name, mapping in spec['mappings'].items()
+        if mapping['source']['type'] == 'sqlite'
+    }
+
+
+TABLE_MAPPINGS = compile_tables()
+
+# Row mappers for the two university tables; rows follow the spec's column order
+student_triples = TABLE_MAPPINGS['Students'].triples
+enrollment_triples = TABLE_MAPPINGS['Enrollments'].triples
+
+
+def rowid_chunks(conn, table, chunk_rows):
+    """
+    (first, last) rowid ranges holding up to chunk_rows rows each, in rowid
+    order. Boundaries are found by stepping through the rowids themselves, so
+    sparse keys (an INTEGER PRIMARY KEY is the rowid) give no empty ranges.
+    """
+    chunks = []
+    first, = conn.execute(f"SELECT MIN(rowid) FROM {table}").fetchone()
+    while first is not None:
+        last = conn.execute(f"SELECT rowid FROM {table} WHERE rowid >= ? ORDER BY rowid LIMIT 1 OFFSET ?",
+                            (first, chunk_rows - 1)).fetchone()
+        if last is None:
+            last = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()
+            chunks.append((first, last[0]))
+            break
+        chunks.append((first, last[0]))
+        first, = conn.execute(f"SELECT MIN(rowid) FROM {table} WHERE rowid > ?", last).fetchone()
+    return chunks
+
+
+def stream_table(conn, table, row_mapper, sink, batch_size=DEFAULT_BATCH_SIZE, rowid_range=None,
+                 columns=None):
+    """
+    Map a whole table without materializing it: only one fetchmany batch and
+    its triples are alive at a time. rowid_range=(first, last) restricts the
+    scan to one chunk of the table and columns fixes the row layout the mapper
+    expects (default: every column). Returns row/triple counts and throughput.
+    """
+    select = ', '.join(columns) if columns else '*'
+    cursor = conn.cursor()
+    if rowid_range is None:
+        cursor.execute(f"SELECT {select} FROM {table}")
+    else:
+        cursor.execute(f"SELECT {select} FROM {table} WHERE rowid BETWEEN ? AND ?", rowid_range)
+
+    rows = 0
+    triples = 0
+    start = time.perf_counter()
+
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        out = [triple for row in batch for triple in row_mapper(row)]
+        sink.add(out)
+        rows += len(batch)
+        triples += len(out)
+
+    cursor.close()
+    seconds = time.perf_counter() - start
+
+    return {
+        'table': table,
+        'rows': rows,
+        'triples': triples,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None
+    }
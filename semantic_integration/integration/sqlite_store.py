@@ -0,0 +1,262 @@
+"""
+Disk-backed rdflib store
+Dictionary-encodes terms into an SQLite file and keeps SPO/POS/OSP indexes,
+so the integrated graph can outgrow RAM and be reopened without parsing.
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.store import Store, VALID_STORE, NO_STORE
+
+TERM_CACHE_SIZE = 500000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+"""
+
+
+def _term_key(term):
+    if isinstance(term, Literal):
+        return ('L', str(term), str(term.datatype or ''), term.language or '')
+    if isinstance(term, BNode):
+        return ('B', str(term), '', '')
+    return ('U', str(term), '', '')
+
+
+class _ThreadConnection:
+    """
+    One thread's connection to the store file. Only the thread-local slot
+    holds it, so it is closed when its thread ends; close() may also come
+    from the thread closing the store, hence check_same_thread=False.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    __del__ = close
+
+
+def _make_term(kind, value, datatype, lang):
+    if kind == 'L':
+        return Literal(value, datatype=URIRef(datatype) if datatype else None, lang=lang or None)
+    if kind == 'B':
+        return BNode(value)
+    return URIRef(value)
+
+
+class SQLiteStore(Store):
+    """
+    Triple store in a single SQLite file (the configuration string is the path).
+
+    Writes go into one SQLite transaction until commit(); rollback() discards
+    them. Not context aware: every triple belongs to the default graph.
+
+    SQLite connections cannot be shared between threads, so each thread gets
+    its own connection on first use (e.g. the endpoint's request threads).
+    A thread sees another thread's writes only once they are committed.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self._path = None
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._ids = {}
+        self._terms = {}
+        super().__init__(configuration, identifier)
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle
+    # ------------------------------------------------------------------ #
+    @property
+    def conn(self):
+        """The calling thread's connection (None while the store is closed)"""
+        if self._path is None:
+            return None
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = _ThreadConnection(self._path)
+            self._connections.add(connection)
+        return connection.conn
+
+    def open(self, configuration, create=False):
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+        self._path = configuration
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self._path is None:
+            return
+        if commit_pending_transaction:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        for connection in list(self._connections):
+            connection.close()
+        self._connections = weakref.WeakSet()
+        self._local = threading.local()
+        self._path = None
+
+    def destroy(self, configuration):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(configuration + suffix):
+                os.remove(configuration + suffix)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+        # Ids handed out inside the transaction no longer exist
+        self._ids.clear()
+        self._terms.clear()
+
+    # ------------------------------------------------------------------ #
+    # Term dictionary
+    # ------------------------------------------------------------------ #
+    def _cache(self, term, term_id):
+        if len(self._ids) >= TERM_CACHE_SIZE:
+            self._ids.clear()
+            self._terms.clear()
+        self._ids[term] = term_id
+        self._terms[term_id] = term
+
+    def _encode(self, term):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            key = _term_key(term)
+            cursor = self.conn.execute("INSERT OR IGNORE INTO terms (kind, value, datatype, lang) "
+                                       "VALUES (?, ?, ?, ?)", key)
+            if cursor.rowcount:
+                term_id = cursor.lastrowid
+            else:
+                term_id = self.conn.execute("SELECT id FROM terms WHERE kind = ? AND value = ? "
+                                            "AND datatype = ? AND lang = ?", key).fetchone()[0]
+            self._cache(term, term_id)
+        return term_id
+
+    def _lookup(self, term):
+        """Id of an existing term, or None when the term was never stored"""
+        term_id = self._ids.get(term)
+        if term_id is None:
+            row = self.conn.execute("SELECT id FROM terms WHERE kind = ? AND value = ? "
+                                    "AND datatype = ? AND lang = ?", _term_key(term)).fetchone()
+            if row is None:
+                return None
+            term_id = row[0]
+            self._cache(term, term_id)
+        return term_id
+
+    def _decode(self, term_id):
+        term = self._terms.get(term_id)
+        if term is None:
+            row = self.conn.execute("SELECT kind, value, datatype, lang FROM terms WHERE id = ?",
+                                    (term_id,)).fetchone()
+            term = _make_term(*row)
+            self._cache(term, term_id)
+        return term
+
+    # ------------------------------------------------------------------ #
+    # Triples
+    # ------------------------------------------------------------------ #
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        self.conn.execute("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)",
+                          tuple(self._encode(term) for term in triple))
+
+    def addN(self, quads):
+        encode = self._encode
+        self.conn.executemany("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)",
+                              ((encode(s), encode(p), encode(o)) for s, p, o, _ in quads))
+
+    def _where(self, triple_pattern):
+        """SQL filter for a pattern; None when a bound term is not in the store"""
+        clauses, params = [], []
+        for column, term in zip('spo', triple_pattern):
+            if term is None:
+                continue
+            term_id = self._lookup(term)
+            if term_id is None:
+                return None, None
+            clauses.append(f"{column} = ?")
+            params.append(term_id)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def remove(self, triple_pattern, context=None):
+        where, params = self._where(triple_pattern)
+        if where is None:
+            return
+        self.conn.execute(f"DELETE FROM triples{where}", params)
+
+    def triples(self, triple_pattern, context=None):
+        where, params = self._where(triple_pattern)
+        if where is None:
+            return
+        decode = self._decode
+        for s, p, o in self.conn.execute(f"SELECT s, p, o FROM triples{where}", params):
+            yield (decode(s), decode(p), decode(o)), iter(())
+
+    def __len__(self, context=None):
+        return self.conn.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    # ------------------------------------------------------------------ #
+    # Namespaces
+    # ------------------------------------------------------------------ #
+    def bind(self, prefix, namespace, override=True):
+        if not override and self.namespace(prefix) is not None:
+            return
+        if override:
+            self.conn.execute("DELETE FROM namespaces WHERE uri = ?", (str(namespace),))
+        self.conn.execute("INSERT OR REPLACE INTO namespaces VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespace(self, prefix):
+        row = self.conn.execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace):
+        row = self.conn.execute("SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        for prefix, uri in self.conn.execute("SELECT prefix, uri FROM namespaces").fetchall():
+            yield prefix, URIRef(uri)
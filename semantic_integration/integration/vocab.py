@@ -0,0 +1,15 @@
+"""
+Shared vocabulary for the integration framework
+Namespaces and URI conventions used by every source mapper
+"""
+
+from rdflib import Namespace
+
+# Define namespaces
+UNI = Namespace("http://university.edu/ontology#")
+DATA = Namespace("http://university.edu/data#")
+
+
+def dept_uri(department_name):
+    """Department URIs are keyed by name so every source links to the same node"""
+    return DATA[f"dept_{department_name.replace(' ', '_')}"]
@@ -0,0 +1,47 @@
+"""
+Concurrent batch execution
+Runs independent jobs (named queries, the validation pass) in forked worker
+processes. The graph is handed over by fork, not by pickling: workers see the
+parent's graph copy-on-write, and a snapshot-backed graph is the same
+memory-mapped arrays in every process. Only job names go to the workers and
+only JSON-shaped results come back, in the order the jobs were given.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Set in the parent just before the pool forks; read by the workers
+_SHARED = {}
+
+
+def _run_job(name):
+    start = time.perf_counter()
+    result = _SHARED['jobs'][name](_SHARED['graph'])
+    return result, time.perf_counter() - start
+
+
+def run_batch(graph, jobs, workers=1):
+    """
+    Run jobs (an ordered name -> fn(graph) mapping) and return
+    ({name: result} in job order, {name: seconds}). workers <= 1 runs them
+    inline; otherwise each job runs in one of `workers` forked processes.
+    """
+    names = list(jobs)
+    if workers <= 1 or len(names) <= 1:
+        outcomes = []
+        for name in names:
+            start = time.perf_counter()
+            outcomes.append((jobs[name](graph), time.perf_counter() - start))
+    else:
+        _SHARED.update(graph=graph, jobs=jobs)
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(names)),
+                                     mp_context=multiprocessing.get_context('fork')) as pool:
+                # chunksize=1: query costs vary a lot, so hand them out one at a time
+                outcomes = list(pool.map(_run_job, names, chunksize=1))
+        finally:
+            _SHARED.clear()
+    results = {name: result for name, (result, _) in zip(names, outcomes)}
+    seconds = {name: elapsed for name, (_, elapsed) in zip(names, outcomes)}
+    return results, seconds
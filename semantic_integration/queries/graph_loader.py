@@ -0,0 +1,104 @@
+"""
+Graph loading for the query side
+Opens the integrated graph from the binary snapshot, the Turtle output or the
+SQLite triple store, with the command-line options every query entry point
+shares.
+"""
+
+import gzip
+import os
+import sys
+
+from rdflib import Graph
+from rdflib.store import VALID_STORE
+
+# Shared modules live next to the integration script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'integration'))
+
+from sqlite_store import SQLiteStore  # noqa: E402
+from graph_snapshot import SNAPSHOT_DIR, SnapshotStore, snapshot_status  # noqa: E402
+import columnar_eval  # noqa: E402
+import path_view_eval  # noqa: E402
+from path_view import PATH_VIEW_PATH, open_views  # noqa: E402
+from graph_version import recorded_source  # noqa: E402
+from query_registry import UNI, DATA  # noqa: E402
+
+TURTLE_SOURCE = 'output/integrated_data.ttl'
+DEFAULT_STORE_PATH = 'output/integrated_store.sqlite'
+
+
+def turtle_source():
+    """
+    The Turtle output of the last integration run: TURTLE_SOURCE, or
+    TURTLE_SOURCE + '.gz' after semantic_integration.py --gzip. The graph
+    version, statistics, snapshot and path views are all recorded against it.
+    """
+    return recorded_source(TURTLE_SOURCE)
+
+
+def add_store_arguments(parser):
+    parser.add_argument('--store', choices=['snapshot', 'memory', 'sqlite'], default='snapshot',
+                        help="Memory-map the binary snapshot (falls back to Turtle when stale), parse the "
+                             "Turtle output into memory, or open the on-disk SQLite triple store")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR,
+                        help="Directory written by semantic_integration.py next to the Turtle output")
+    parser.add_argument('--no-columnar-bgp', action='store_true',
+                        help="Evaluate snapshot BGPs triple by triple instead of with vectorized joins")
+    parser.add_argument('--store-path', default=DEFAULT_STORE_PATH,
+                        help="File written by semantic_integration.py --store sqlite")
+    parser.add_argument('--no-path-views', action='store_true',
+                        help="Evaluate every BGP against the graph instead of answering those matching "
+                             "a materialized path view from output/path_views.sqlite")
+
+
+def open_graph(store='snapshot', snapshot_dir=SNAPSHOT_DIR, store_path=DEFAULT_STORE_PATH, columnar=True,
+               graph_class=Graph, path_views=True):
+    """
+    (graph, source description, warnings). A stale or missing snapshot falls
+    back to parsing Turtle and stale or missing path views are not routed
+    to, each with the reason as a warning; a missing SQLite store raises
+    FileNotFoundError.
+    """
+    g = None
+    warnings = []
+    turtle_path = turtle_source()
+    if store == 'sqlite':
+        # Opened in place: no parse step
+        g = graph_class(store=SQLiteStore())
+        if g.open(store_path) != VALID_STORE:
+            raise FileNotFoundError(
+                f"No triple store at {store_path}; run semantic_integration.py --store sqlite first")
+        source = store_path
+    elif store == 'snapshot':
+        snapshot_meta, stale_reason = snapshot_status(turtle_path, snapshot_dir)
+        if snapshot_meta is not None:
+            # Memory-mapped: no parse step, terms are decoded on first use
+            g = graph_class(store=SnapshotStore())
+            g.open(snapshot_dir)
+            source = f"{snapshot_dir}/ (snapshot)"
+            if columnar:
+                # Basic graph patterns become range lookups + hash joins on term ids
+                columnar_eval.enable()
+        else:
+            warnings.append(f"Snapshot not used ({stale_reason}); parsing Turtle instead")
+    if g is None:
+        g = graph_class()
+        if turtle_path.endswith('.gz'):
+            with gzip.open(turtle_path, 'rb') as f:
+                g.parse(f, format="turtle")
+        else:
+            g.parse(turtle_path, format="turtle")
+        source = turtle_path
+
+    # Bind namespaces for prettier output
+    g.bind("uni", UNI)
+    g.bind("data", DATA)
+
+    if path_views:
+        # BGPs matching a view become one indexed SELECT on its flattened rows
+        reader, reason = open_views(turtle_path, PATH_VIEW_PATH)
+        if reader is not None:
+            path_view_eval.enable(g, reader)
+        else:
+            warnings.append(f"Path views not used ({reason})")
+    return g, source, warnings
@@ -0,0 +1,235 @@
+"""
+Statistics-driven query planning
+Rewrites the basic graph patterns of a prepared query before evaluation,
+using the cardinalities in output/graph_statistics.json:
+
+- patterns the data is known to imply are dropped: `?s a uni:Student` when
+  another pattern gives ?s a predicate only students have, or
+  `?s uni:enrolledIn ?c` when the query also walks
+  `?s uni:hasEnrollment/uni:enrollmentFor ?c`;
+- the remaining patterns are ordered greedily, most selective first, each
+  step preferring patterns joined to what is already bound.
+
+Both rewrites preserve the solutions; only the order in which rdflib
+produces them (and so the order of ORDER BY ties) can change. The report
+queries break every tie in their ORDER BY, so their results do not.
+"""
+
+from rdflib import BNode, RDF, URIRef, Variable
+from rdflib.paths import Path
+from rdflib.plugins.sparql.parserutils import CompValue
+
+from graph_loader import turtle_source
+from graph_statistics import STATISTICS_PATH, load_statistics
+
+
+def _is_variable(term):
+    return isinstance(term, (Variable, BNode))
+
+
+def _variables(triple):
+    return {term for term in triple if _is_variable(term)}
+
+
+def format_triple(triple, namespace_manager=None):
+    return ' '.join(term.n3(namespace_manager) for term in triple)
+
+
+class BGPPlan:
+    """
+    The rewrite of one basic graph pattern: its triples in algebra order,
+    the chosen steps as (triple, estimated matches per input row, estimated
+    rows after the step), and the dropped triples with the patterns implying
+    them.
+    """
+
+    def __init__(self, original, steps, dropped):
+        self.original = list(original)
+        self.steps = steps
+        self.dropped = dropped
+
+    @property
+    def triples(self):
+        return [triple for triple, _, _ in self.steps]
+
+    def as_dict(self, namespace_manager=None):
+        return {
+            'original': [format_triple(triple, namespace_manager) for triple in self.original],
+            'order': [{'pattern': format_triple(triple, namespace_manager), 'matches': round(matches, 3),
+                       'rows': round(rows, 3)}
+                      for triple, matches, rows in self.steps],
+            'dropped': [{'pattern': format_triple(triple, namespace_manager),
+                         'implied_by': [format_triple(other, namespace_manager) for other in implied_by]}
+                        for triple, implied_by in self.dropped],
+        }
+
+    def explain(self, namespace_manager=None):
+        """EXPLAIN-style text lines"""
+        lines = ["  algebra order:"]
+        lines += [f"    {i}. {format_triple(triple, namespace_manager)}"
+                  for i, triple in enumerate(self.original, 1)]
+        lines.append(f"  chosen order:{'est. matches':>52}{'est. rows':>12}")
+        for i, (triple, matches, rows) in enumerate(self.steps, 1):
+            pattern = f"    {i}. {format_triple(triple, namespace_manager)}"
+            lines.append(f"{pattern:<66}{matches:>12.2f}{rows:>12.1f}")
+        for triple, implied_by in self.dropped:
+            lines.append(f"  dropped: {format_triple(triple, namespace_manager)}")
+            lines.append(f"    implied by {' . '.join(format_triple(t, namespace_manager) for t in implied_by)}")
+        return lines
+
+
+class QueryPlanner:
+    """Rewrites prepared queries from one graph version's statistics"""
+
+    def __init__(self, statistics):
+        self.graph_version = statistics['graph_version']
+        self.total = statistics['triples']
+        self.subjects = statistics['subjects']
+        self.objects = statistics['objects']
+        self.typed_subjects = statistics['typed_subjects']
+        self.predicates = {}
+        for iri, entry in statistics['predicates'].items():
+            self.predicates[URIRef(iri)] = dict(
+                entry,
+                subject_classes={URIRef(cls) for cls in entry['subject_classes']},
+                object_classes={URIRef(cls) for cls in entry['object_classes']})
+        self.classes = {URIRef(iri): count for iri, count in statistics['classes'].items()}
+        # Only chains the data was checked to satisfy
+        self.chains = [(tuple(URIRef(p) for p in chain['chain']), URIRef(chain['implies']))
+                       for chain in statistics['property_chains'] if chain['holds']]
+
+    def estimate(self, triple, bound=()):
+        """Expected matches of a pattern for one input row, given the variables already bound"""
+        s, p, o = triple
+        s_bound = not _is_variable(s) or s in bound
+        o_bound = not _is_variable(o) or o in bound
+        if _is_variable(p) or isinstance(p, Path):
+            triples, subjects, objects = self.total, self.subjects, self.objects
+        elif p == RDF.type and not _is_variable(o):
+            instances = self.classes.get(o, 0)
+            return instances / max(self.typed_subjects, 1) if s_bound else float(instances)
+        elif p in self.predicates:
+            entry = self.predicates[p]
+            triples, subjects, objects = entry['triples'], entry['subjects'], entry['objects']
+        else:
+            return 0.0  # the graph has no such predicate: nothing matches
+        matches = float(triples)
+        if s_bound:
+            matches /= max(subjects, 1)
+        if o_bound:
+            matches /= max(objects, 1)
+        return matches
+
+    def _implied_by_chain(self, triple, others):
+        """The two patterns among others walking a chain whose shortcut is triple, or None"""
+        s, p, o = triple
+        for (first, second), shortcut in self.chains:
+            if p != shortcut:
+                continue
+            for head in others:
+                if head[1] != first or head[0] != s:
+                    continue
+                for tail in others:
+                    if tail[1] == second and tail[0] == head[2] and tail[2] == o:
+                        return [head, tail]
+        return None
+
+    def _implied_by_type(self, triple, others):
+        """A pattern among others only instances of triple's class can match, or None"""
+        s, p, o = triple
+        if p != RDF.type or _is_variable(o):
+            return None
+        for other in others:
+            entry = self.predicates.get(other[1]) if other[1] != RDF.type else None
+            if entry is None:
+                continue
+            if (other[0] == s and o in entry['subject_classes']) or \
+                    (other[2] == s and o in entry['object_classes']):
+                return [other]
+        return None
+
+    def prune(self, triples):
+        """
+        (kept triples, [(dropped triple, implying triples)]), dropping one
+        pattern at a time. Shortcuts go first, so a type pattern is never
+        justified by a pattern dropped after it.
+        """
+        kept = list(triples)
+        dropped = []
+        for implied_by in (self._implied_by_chain, self._implied_by_type):
+            changed = True
+            while changed:
+                changed = False
+                for i, triple in enumerate(kept):
+                    implying = implied_by(triple, kept[:i] + kept[i + 1:])
+                    if implying is not None:
+                        dropped.append((kept.pop(i), implying))
+                        changed = True
+                        break
+        return kept, dropped
+
+    def order(self, triples, bound=()):
+        """
+        Greedy join order: at each step the pattern with the fewest expected
+        matches among those sharing a variable with what is bound (or with
+        no variables at all), any pattern only when none is connected.
+        """
+        bound = set(bound)
+        remaining = list(triples)
+        steps = []
+        rows = 1.0
+        while remaining:
+            connected = [t for t in remaining if not _variables(t) or _variables(t) & bound]
+            candidates = connected or remaining
+            # min() keeps the algebra order among equal estimates
+            triple = min(candidates, key=lambda t: self.estimate(t, bound))
+            remaining.remove(triple)
+            matches = self.estimate(triple, bound)
+            rows *= matches
+            steps.append((triple, matches, rows))
+            bound |= _variables(triple)
+        return steps
+
+    def plan(self, triples, bound=()):
+        kept, dropped = self.prune(triples)
+        return BGPPlan(triples, self.order(kept, bound), dropped)
+
+    def rewrite(self, query, bound=()):
+        """
+        Replace every BGP of a prepared query's algebra with its plan, in
+        place, and return the plans. bound: variables bound before
+        evaluation (query parameters).
+        """
+        plans = []
+
+        def visit(node, bound):
+            if isinstance(node, CompValue):
+                if node.name == 'BGP' and node.triples:
+                    plan = self.plan(node.triples, bound)
+                    node['triples'] = plan.triples
+                    plans.append(plan)
+                elif node.name == 'LeftJoin':
+                    # OPTIONAL: the right side runs with the left side's solutions bound
+                    visit(node.p1, bound)
+                    visit(node.p2, bound | set(getattr(node.p1, '_vars', ())))
+                    visit(node.expr, bound)
+                    return
+                for value in node.values():
+                    visit(value, bound)
+            elif isinstance(node, (list, tuple)):
+                for value in node:
+                    visit(value, bound)
+
+        visit(query.algebra, set(bound))
+        return plans
+
+
+def load_planner(source_path=None, path=STATISTICS_PATH):
+    """
+    (planner, None), or (None, reason) when there are no current statistics
+    for source_path (default: the Turtle output of the last integration run)
+    """
+    statistics, reason = load_statistics(source_path or turtle_source(), path)
+    if statistics is None:
+        return None, reason
+    return QueryPlanner(statistics), None
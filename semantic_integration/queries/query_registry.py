@@ -0,0 +1,546 @@
+"""
+Prepared-query registry
+Every query the engine runs, registered by name and prepared once with bound
+namespaces. The translated algebra is cached on disk keyed by a hash of the
+query text, so repeated runs and long-lived processes skip parsing entirely.
+With a result cache attached, converted results are reused for as long as the
+graph version does not change. With a planner attached, every prepared query
+is rewritten from the graph statistics (see query_planner).
+"""
+
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+import time
+from collections import OrderedDict
+from functools import partial
+from types import MethodType
+
+import rdflib
+from rdflib import Literal, Namespace, Variable, XSD
+from rdflib.query import ResultRow
+from rdflib.plugins.sparql import operators, prepareQuery
+from rdflib.plugins.sparql.evaluate import evalQuery
+from rdflib.plugins.sparql.parserutils import CompValue, Expr
+from rdflib.plugins.sparql.sparql import Prologue, Query
+
+from batch_execution import run_batch
+
+UNI = Namespace("http://university.edu/ontology#")
+DATA = Namespace("http://university.edu/data#")
+
+NAMESPACES = {'uni': UNI, 'data': DATA, 'xsd': XSD}
+CACHE_DIR = 'queries/.query_cache'
+
+
+class QueryParameter:
+    """A named input of a query, bound to one of its variables through initBindings"""
+
+    def __init__(self, name, variable, datatype=None, default=None, description=''):
+        self.name = name
+        self.variable = Variable(variable)
+        self.datatype = datatype
+        self.default = default
+        self.description = description
+
+    def bind(self, value):
+        return Literal(value, datatype=self.datatype)
+
+
+class NamedQuery:
+    """
+    A registered query: name, description, SPARQL text, an optional row ->
+    record converter and the parameters it accepts.
+    """
+
+    def __init__(self, name, description, text, to_record=None, parameters=()):
+        self.name = name
+        self.description = description
+        self.text = text
+        self.to_record = to_record
+        self.parameters = list(parameters)
+
+    def bindings(self, values=None):
+        """initBindings for parameter values by name; parameters not given keep their default"""
+        values = values or {}
+        known = {parameter.name: parameter for parameter in self.parameters}
+        unknown = set(values) - set(known)
+        if unknown:
+            raise ValueError(f"{self.name} has no parameter {', '.join(sorted(unknown))}")
+        bindings = {}
+        for name, parameter in known.items():
+            if name in values:
+                bindings[parameter.variable] = parameter.bind(values[name])
+            elif parameter.default is not None:
+                bindings[parameter.variable] = parameter.default
+        return bindings
+
+
+# ---------------------------------------------------------------------------- #
+# Algebra pickling
+# ---------------------------------------------------------------------------- #
+# CompValue is an OrderedDict whose __init__ needs a name and whose __getattr__
+# answers None for anything missing, so the default pickle protocol breaks on
+# it. These reducers rebuild nodes field by field; Expr keeps its evaluation
+# function as the plain module-level function and is re-bound on load.
+
+def _new_node(cls):
+    node = OrderedDict.__new__(cls)
+    OrderedDict.__init__(node)
+    return node
+
+
+def _set_node_attrs(node, attrs):
+    evalfn = attrs.pop('_evalfn', None)
+    node.__dict__.update(attrs)
+    if isinstance(node, Expr):
+        node.__dict__['_evalfn'] = MethodType(evalfn, node) if evalfn is not None else None
+
+
+def _true_filter():
+    return operators.TrueFilter
+
+
+def _reduce_node(node):
+    if node is operators.TrueFilter:
+        return _true_filter, ()
+    attrs = dict(node.__dict__)
+    attrs.pop('ctx', None)
+    if attrs.get('_evalfn') is not None:
+        attrs['_evalfn'] = attrs['_evalfn'].__func__
+    return _new_node, (type(node),), attrs, None, iter(list(OrderedDict.items(node))), _set_node_attrs
+
+
+_DISPATCH = copyreg.dispatch_table.copy()
+_DISPATCH[CompValue] = _reduce_node
+_DISPATCH[Expr] = _reduce_node
+
+
+def dump_query(query):
+    """Serialize a prepared Query (prologue namespaces + algebra) to bytes"""
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = _DISPATCH
+    pickler.dump({
+        'base': query.prologue.base,
+        'namespaces': [(prefix, str(uri)) for prefix, uri in query.prologue.namespace_manager.namespaces()],
+        'algebra': query.algebra,
+    })
+    return buffer.getvalue()
+
+
+def load_query(data):
+    state = pickle.loads(data)
+    prologue = Prologue()
+    prologue.base = state['base']
+    for prefix, uri in state['namespaces']:
+        prologue.namespace_manager.bind(prefix, uri, replace=True)
+    return Query(prologue, state['algebra'])
+
+
+# ---------------------------------------------------------------------------- #
+# Registry
+# ---------------------------------------------------------------------------- #
+class QueryRegistry:
+    """
+    Named queries, prepared lazily and at most once per process.
+
+    prepare() looks in memory, then in cache_dir, and only then parses and
+    translates the text. run() executes a prepared query and materializes the
+    rows. result() returns converted records in the query_results.json shape,
+    from result_cache when one is attached. Per-query parse/load and execution
+    times accumulate in timings; the plans of rewritten queries are in plans.
+    """
+
+    def __init__(self, queries=(), cache_dir=CACHE_DIR, namespaces=NAMESPACES, result_cache=None,
+                 planner=None):
+        self.queries = OrderedDict()
+        self.cache_dir = cache_dir
+        self.namespaces = namespaces
+        self.result_cache = result_cache
+        self.planner = planner
+        self.timings = {}
+        self.plans = {}
+        self._prepared = {}
+        for query in queries:
+            self.register(query)
+
+    def register(self, query):
+        self.queries[query.name] = query
+        self._prepared.pop(query.name, None)
+        return query
+
+    def __getitem__(self, name):
+        return self.queries[name]
+
+    def __iter__(self):
+        return iter(self.queries.values())
+
+    def cache_key(self, text):
+        """Hash of the text, the bound namespaces and the rdflib version that built the algebra"""
+        digest = hashlib.sha256()
+        digest.update(rdflib.__version__.encode('utf-8'))
+        for prefix, uri in sorted(self.namespaces.items()):
+            digest.update(f"\0{prefix}={uri}".encode('utf-8'))
+        digest.update(b'\0' + text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _cache_path(self, text):
+        return os.path.join(self.cache_dir, f"{self.cache_key(text)}.pickle")
+
+    def _timing(self, name):
+        return self.timings.setdefault(name, {'source': None, 'parse_seconds': 0.0,
+                                              'execute_seconds': 0.0, 'executions': 0,
+                                              'result_cache_hits': 0})
+
+    def prepare(self, name):
+        prepared = self._prepared.get(name)
+        if prepared is not None:
+            return prepared
+
+        text = self.queries[name].text
+        timing = self._timing(name)
+        start = time.perf_counter()
+        path = self._cache_path(text) if self.cache_dir else None
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    prepared = load_query(f.read())
+                timing['source'] = 'disk cache'
+            except Exception:
+                prepared = None  # stale or unreadable entry: reparse and overwrite
+
+        if prepared is None:
+            prepared = prepareQuery(text, initNs=self.namespaces)
+            timing['source'] = 'parsed'
+            if path:
+                self._store(path, prepared)
+
+        if self.planner is not None:
+            # After caching: the on-disk algebra stays as written, plans follow the statistics
+            bound = {parameter.variable for parameter in self.queries[name].parameters
+                     if parameter.default is not None}
+            self.plans[name] = self.planner.rewrite(prepared, bound)
+
+        timing['parse_seconds'] += time.perf_counter() - start
+        self._prepared[name] = prepared
+        return prepared
+
+    def _store(self, path, prepared):
+        try:
+            data = dump_query(prepared)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return  # algebra with an unpicklable node: keep it in memory only
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _bindings(self, name, init_bindings):
+        # Parameter defaults apply unless the caller binds the variable itself
+        return dict(self.queries[name].bindings(), **(init_bindings or {}))
+
+    def run(self, graph, name, init_bindings=None):
+        """Execute a registered query and return its rows as a list"""
+        prepared = self.prepare(name)
+        timing = self._timing(name)
+        start = time.perf_counter()
+        rows = list(graph.query(prepared, initBindings=self._bindings(name, init_bindings)))
+        timing['execute_seconds'] += time.perf_counter() - start
+        timing['executions'] += 1
+        return rows
+
+    def records(self, graph, name, init_bindings=None):
+        """Rows of a query converted with its to_record"""
+        to_record = self.queries[name].to_record
+        return [to_record(row) for row in self.run(graph, name, init_bindings)]
+
+    def iter_records(self, graph, name, init_bindings=None):
+        """
+        Records of a SELECT query, converted one solution at a time. Unlike
+        run(), nothing is collected: rdflib's Result keeps every row it has
+        yielded, so the algebra is evaluated directly. Operators that need all
+        solutions (ORDER BY, GROUP BY) still buffer inside rdflib.
+        """
+        prepared = self.prepare(name)
+        to_record = self.queries[name].to_record
+        timing = self._timing(name)
+        start = time.perf_counter()
+        result = evalQuery(graph, prepared, self._bindings(name, init_bindings))
+        variables = result['vars_']
+        for bindings in result['bindings']:
+            if bindings:  # like Result: an empty solution is not a row
+                yield to_record(ResultRow(bindings, variables))
+        timing['execute_seconds'] += time.perf_counter() - start
+        timing['executions'] += 1
+
+    def compute(self, graph, name, init_bindings=None):
+        """{'description', 'count', 'results'} for a query, as stored in query_results.json"""
+        records = self.records(graph, name, init_bindings)
+        return {'description': self.queries[name].description, 'count': len(records), 'results': records}
+
+    def _cached(self, name, key):
+        if key is None:
+            return None
+        start = time.perf_counter()
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            timing = self._timing(name)
+            timing['source'] = 'result cache'
+            timing['execute_seconds'] += time.perf_counter() - start
+            timing['result_cache_hits'] += 1
+        return cached
+
+    def _query_hash(self, name):
+        # Every report query orders its rows totally, so a plan cannot change
+        # the result and planned and unplanned runs share cache entries
+        return self.cache_key(self.queries[name].text)
+
+    def _result_key(self, name, init_bindings=None):
+        if self.result_cache is None:
+            return None
+        return self.result_cache.key(self._query_hash(name), self._bindings(name, init_bindings))
+
+    def result(self, graph, name, init_bindings=None):
+        """
+        compute() through the result cache: a hit skips parsing, evaluation
+        and row conversion.
+        """
+        key = self._result_key(name, init_bindings)
+        cached = self._cached(name, key)
+        if cached is not None:
+            return cached
+        result = self.compute(graph, name, init_bindings)
+        if key is not None:
+            self.result_cache.put(key, name, result)
+        return result
+
+    def results(self, graph, names, workers=1, jobs=None):
+        """
+        Results of several queries, in the order of names, evaluated
+        concurrently by `workers` forked processes sharing the graph (see
+        batch_execution). jobs adds non-SPARQL work run alongside, as
+        name -> (hash of what it computes, fn(graph)); its results are cached
+        the same way. Cache lookups and writes stay in this process.
+        """
+        jobs = jobs or {}
+        keys = {}
+        pending = OrderedDict()
+        results = OrderedDict()
+        for name in names:
+            if name in jobs:
+                content_hash, function = jobs[name]
+                keys[name] = self.result_cache.key(content_hash) if self.result_cache is not None else None
+            else:
+                keys[name] = self._result_key(name)
+                function = partial(self._evaluate, name=name)
+            results[name] = self._cached(name, keys[name])
+            if results[name] is None:
+                pending[name] = function
+
+        # Prepared before the fork, so workers inherit the algebra instead of parsing
+        for name in pending:
+            if name in self.queries:
+                self.prepare(name)
+
+        computed, seconds = run_batch(graph, pending, workers)
+        for name, result in computed.items():
+            timing = self._timing(name)
+            timing['source'] = timing['source'] or 'evaluated'
+            timing['execute_seconds'] += seconds[name]
+            timing['executions'] += 1
+            if keys[name] is not None:
+                self.result_cache.put(keys[name], name, result)
+            results[name] = result
+        return results
+
+    def _evaluate(self, graph, name):
+        # Batch job: run_batch measures the time, so nothing accumulates here
+        rows = graph.query(self.prepare(name), initBindings=self._bindings(name, None))
+        records = [self.queries[name].to_record(row) for row in rows]
+        return {'description': self.queries[name].description, 'count': len(records), 'results': records}
+
+    def timing_report(self):
+        return {
+            name: {
+                'source': timing['source'],
+                'parse_ms': round(timing['parse_seconds'] * 1000, 3),
+                'execute_ms': round(timing['execute_seconds'] * 1000, 3),
+                'executions': timing['executions'],
+                'result_cache_hits': timing['result_cache_hits'],
+            }
+            for name, timing in self.timings.items()
+        }
+
+
+# ---------------------------------------------------------------------------- #
+# The university queries
+# ---------------------------------------------------------------------------- #
+QUERIES = [
+    NamedQuery('query1', 'Students with majors and GPAs', """
+PREFIX uni: <http://university.edu/ontology#>
+PREFIX data: <http://university.edu/data#>
+
+SELECT ?studentID ?firstName ?lastName ?gpa ?deptName
+WHERE {
+    ?student a uni:Student ;
+             uni:studentID ?studentID ;
+             uni:firstName ?firstName ;
+             uni:lastName ?lastName ;
+             uni:gpa ?gpa ;
+             uni:majorIn ?dept .
+    ?dept uni:departmentName ?deptName .
+}
+ORDER BY DESC(?gpa) ?studentID
+""", lambda row: {
+        'studentID': str(row.studentID),
+        'name': f"{row.firstName} {row.lastName}",
+        'gpa': float(row.gpa),
+        'major': str(row.deptName)
+    }),
+
+    NamedQuery('query2', 'Courses taught by instructors', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?instructorID ?firstName ?lastName ?courseCode ?courseName
+WHERE {
+    ?instructor a uni:Instructor ;
+                uni:instructorID ?instructorID ;
+                uni:firstName ?firstName ;
+                uni:lastName ?lastName ;
+                uni:teaches ?course .
+    ?course uni:courseCode ?courseCode ;
+            uni:courseName ?courseName .
+}
+ORDER BY ?lastName ?courseCode ?instructorID
+""", lambda row: {
+        'instructorID': str(row.instructorID),
+        'instructor': f"{row.firstName} {row.lastName}",
+        'courseCode': str(row.courseCode),
+        'courseName': str(row.courseName)
+    }),
+
+    NamedQuery('query3', 'Student enrollments with grades', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?studentID ?firstName ?lastName ?courseCode ?courseName ?semester ?grade
+WHERE {
+    ?student a uni:Student ;
+             uni:studentID ?studentID ;
+             uni:firstName ?firstName ;
+             uni:lastName ?lastName ;
+             uni:hasEnrollment ?enrollment .
+    ?enrollment uni:enrollmentFor ?course ;
+                uni:semester ?semester ;
+                uni:grade ?grade .
+    ?course uni:courseCode ?courseCode ;
+            uni:courseName ?courseName .
+}
+ORDER BY ?lastName ?semester ?studentID ?courseCode ?grade
+""", lambda row: {
+        'studentID': str(row.studentID),
+        'student': f"{row.firstName} {row.lastName}",
+        'course': f"{row.courseCode}: {row.courseName}",
+        'semester': str(row.semester),
+        'grade': str(row.grade)
+    }),
+
+    NamedQuery('query4', 'Department statistics', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?deptName ?building ?facultyCount ?budget (COUNT(?course) AS ?courseCount)
+WHERE {
+    ?dept a uni:Department ;
+          uni:departmentName ?deptName ;
+          uni:building ?building ;
+          uni:facultyCount ?facultyCount ;
+          uni:budget ?budget .
+    OPTIONAL { ?course uni:offeredBy ?dept . }
+}
+GROUP BY ?deptName ?building ?facultyCount ?budget
+ORDER BY DESC(?budget) ?deptName
+""", lambda row: {
+        'department': str(row.deptName),
+        'building': str(row.building),
+        'faculty_count': int(row.facultyCount),
+        'budget': int(row.budget),
+        'course_count': int(row.courseCount)
+    }),
+
+    NamedQuery('query5', 'Computer Science students enrollments', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?firstName ?lastName ?gpa ?courseCode ?grade
+WHERE {
+    ?student a uni:Student ;
+             uni:firstName ?firstName ;
+             uni:lastName ?lastName ;
+             uni:gpa ?gpa ;
+             uni:majorIn ?dept ;
+             uni:enrolledIn ?course .
+    ?dept uni:departmentName ?deptName .
+    ?course uni:courseCode ?courseCode .
+    ?student uni:hasEnrollment ?enrollment .
+    ?enrollment uni:enrollmentFor ?course ;
+                uni:grade ?grade .
+}
+ORDER BY ?lastName ?firstName ?courseCode ?grade ?gpa
+""", lambda row: {
+        'student': f"{row.firstName} {row.lastName}",
+        'gpa': float(row.gpa),
+        'course': str(row.courseCode),
+        'grade': str(row.grade)
+    }, parameters=[
+        # The report binds the untyped literal the query always used; values
+        # passed in are typed like the mapped department names
+        QueryParameter('department', 'deptName', XSD.string, default=Literal("Computer Science"),
+                       description="Department name, e.g. Computer Science"),
+    ]),
+
+    NamedQuery('query6', '4-credit courses', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?courseCode ?courseName ?deptName ?instructorFirst ?instructorLast
+WHERE {
+    ?course a uni:Course ;
+            uni:courseCode ?courseCode ;
+            uni:courseName ?courseName ;
+            uni:credits 4 ;
+            uni:offeredBy ?dept .
+    ?dept uni:departmentName ?deptName .
+    ?instructor uni:teaches ?course ;
+                uni:firstName ?instructorFirst ;
+                uni:lastName ?instructorLast .
+}
+ORDER BY ?courseCode ?instructorLast ?instructorFirst
+""", lambda row: {
+        'courseCode': str(row.courseCode),
+        'courseName': str(row.courseName),
+        'department': str(row.deptName),
+        'instructor': f"{row.instructorFirst} {row.instructorLast}"
+    }),
+
+    NamedQuery('cross_validation', 'Course codes in enrollments match course catalog', """
+PREFIX uni: <http://university.edu/ontology#>
+
+SELECT ?courseCode (COUNT(?enrollment) AS ?enrollmentCount)
+WHERE {
+    ?enrollment a uni:Enrollment ;
+                uni:enrollmentFor ?course .
+    ?course uni:courseCode ?courseCode .
+}
+GROUP BY ?courseCode
+ORDER BY ?courseCode
+""", lambda row: {
+        'courseCode': str(row.courseCode),
+        'enrollmentCount': int(row.enrollmentCount)
+    }),
+]
+
+
+def default_registry(cache_dir=CACHE_DIR, result_cache=None, planner=None):
+    return QueryRegistry(QUERIES, cache_dir=cache_dir, result_cache=result_cache, planner=planner)
@@ -0,0 +1,122 @@
+"""
+Query result cache
+Converted results of registered queries, stored on disk in the same shape as
+the entries of query_results.json and keyed by (query hash, graph version).
+A hit skips both evaluation and row conversion. The cache is bounded in bytes
+and evicts least recently used entries first.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+RESULT_CACHE_DIR = 'queries/.result_cache'
+DEFAULT_MAX_BYTES = 64 * 2 ** 20
+
+
+class ResultCache:
+    """
+    LRU cache of query results for one graph version.
+
+    Entries live in <directory>/<key>.json; index.json tracks each entry's
+    graph version, size and last use. Entries written for any other graph
+    version can never hit again and are dropped when the cache is opened.
+    """
+
+    def __init__(self, graph_version, directory=RESULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.graph_version = graph_version
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, 'index.json')
+        self._index = self._load_index()
+        stale = [key for key, entry in self._index.items() if entry['graph_version'] != graph_version]
+        for key in stale:
+            self._drop(key)
+        self._evict()  # the size limit may have been lowered since the last run
+        self._save_index()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _drop(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def key(self, query_hash, init_bindings=None):
+        """Entry key: the query hash, any initial bindings and the graph version"""
+        digest = hashlib.sha256(f"{query_hash}\0{self.graph_version}".encode('utf-8'))
+        for name, value in sorted((str(name), value.n3()) for name, value in (init_bindings or {}).items()):
+            digest.update(f"\0{name}={value}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """The cached result, or None on a miss"""
+        entry = self._index.get(key)
+        if entry is not None:
+            try:
+                with open(self._path(key), encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                self._drop(key)  # unreadable entry: recompute and overwrite
+            else:
+                entry['last_used'] = time.time()
+                self._save_index()
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key, query_name, result):
+        data = json.dumps(result, indent=2).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return  # would evict everything else and still not fit
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self._index[key] = {
+            'query': query_name,
+            'graph_version': self.graph_version,
+            'bytes': len(data),
+            'last_used': time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def _evict(self):
+        total = sum(entry['bytes'] for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['bytes']
+            self._drop(key)
+
+    def stats(self):
+        return {
+            'graph_version': self.graph_version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._index),
+            'bytes': sum(entry['bytes'] for entry in self._index.values()),
+            'max_bytes': self.max_bytes,
+        }
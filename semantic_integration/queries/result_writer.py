@@ -0,0 +1,171 @@
+"""
+Streaming query result writer
+Writes each query's records to its own NDJSON file (optionally CSV and
+Parquet as well) as they are produced, and lists the files in a small
+index.json manifest. Nothing is accumulated: memory stays flat whatever the
+result size.
+"""
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+FORMATS = ('ndjson', 'csv', 'parquet')
+PARQUET_BATCH_ROWS = 10000
+
+
+class _NdjsonFile:
+    def __init__(self, path):
+        self._f = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write('\n')
+
+    def close(self):
+        self._f.close()
+
+
+class _CsvFile:
+    """Header from the first record's keys; every record of a query has the same keys"""
+
+    def __init__(self, path):
+        self._f = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._f, fieldnames=list(record))
+            self._writer.writeheader()
+        self._writer.writerow(record)
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetFile:
+    """
+    Buffers PARQUET_BATCH_ROWS records per row group; the schema comes from the
+    first group. A column with no value in it yet (an OPTIONAL variable) is
+    typed null until a later group has values for it, which retypes it.
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from error
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._writer = None
+        self._buffer = []
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            table = self._pa.Table.from_pylist(self._buffer)
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        else:
+            self._widen_nulls()
+            table = self._pa.Table.from_pylist(self._buffer, schema=self._writer.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _widen_nulls(self):
+        """Give null-typed columns the type of the buffer's values, rewriting the groups written so far"""
+        schema = self._writer.schema
+        for index, field in enumerate(schema):
+            if self._pa.types.is_null(field.type):
+                values = [record.get(field.name) for record in self._buffer]
+                if any(value is not None for value in values):
+                    schema = schema.set(index, field.with_type(self._pa.array(values).type))
+        if schema.equals(self._writer.schema):
+            return
+        self._writer.close()
+        written = f"{self._path}.{os.getpid()}.tmp"
+        os.replace(self._path, written)
+        self._writer = self._pq.ParquetWriter(self._path, schema)
+        # One row group at a time, so memory stays at one group
+        source = self._pq.ParquetFile(written)
+        for group in range(source.num_row_groups):
+            self._writer.write_table(source.read_row_group(group).cast(schema))
+        source.close()
+        os.remove(written)
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            # No rows: an empty file still marks the query as run
+            self._pq.write_table(self._pa.table({}), self._path)
+
+
+_WRITERS = {'ndjson': _NdjsonFile, 'csv': _CsvFile, 'parquet': _ParquetFile}
+_EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'csv', 'parquet': 'parquet'}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ResultWriter:
+    """
+    One file per query and format under directory.
+
+    write_query() consumes a record iterator once, fanning each record out to
+    every format, and returns the query's manifest entry; write_index() saves
+    the manifest. NDJSON is always written.
+    """
+
+    def __init__(self, directory, formats=('ndjson',)):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown result formats: {', '.join(sorted(unknown))}")
+        self.directory = directory
+        self.formats = ['ndjson'] + [name for name in FORMATS if name in formats and name != 'ndjson']
+        self.queries = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write_query(self, name, description, records):
+        paths = {fmt: os.path.join(self.directory, f"{name}.{_EXTENSIONS[fmt]}") for fmt in self.formats}
+        files = [_WRITERS[fmt](path) for fmt, path in paths.items()]
+        count = 0
+        start = time.perf_counter()
+        try:
+            for record in records:
+                for f in files:
+                    f.write(record)
+                count += 1
+        finally:
+            for f in files:
+                f.close()
+        entry = {
+            'description': description,
+            'count': count,
+            'seconds': round(time.perf_counter() - start, 4),
+            'files': {fmt: {'path': path, 'bytes': os.path.getsize(path)} for fmt, path in paths.items()},
+        }
+        self.queries[name] = entry
+        return entry
+
+    def write_index(self, **info):
+        path = os.path.join(self.directory, 'index.json')
+        index = dict(info, generated=datetime.now().isoformat(), formats=self.formats, queries=self.queries)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        return path
@@ -0,0 +1,521 @@
+"""
+Local SPARQL endpoint
+A long-lived process that keeps the integrated graph loaded and answers
+SPARQL 1.1 protocol queries over HTTP on localhost, plus the report queries
+as named, parameterized endpoints. Results are paged through server-side
+cursors; every page runs under a timeout and a row limit.
+
+    GET  /sparql?query=...                      SPARQL protocol (also POST, form or
+                                                application/sparql-query body)
+    GET  /queries                               named queries and their parameters
+    GET  /queries/<name>?<param>=...&limit=N    one named query, as records
+    GET  /sparql?cursor=ID, /queries/<name>?cursor=ID   the next page
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import rdflib.plugins.sparql
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.evaluate import _fillTemplate, evalPart, evalQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import QueryContext
+
+from graph_loader import add_store_arguments, open_graph
+from query_planner import load_planner
+import columnar_eval
+import path_view_eval
+from query_registry import CACHE_DIR, NAMESPACES, QUERIES, QueryRegistry
+
+SPARQL_JSON = 'application/sparql-results+json'
+
+# Queries arrive from outside: never fetch FROM <url> graphs over the network
+rdflib.plugins.sparql.SPARQL_LOAD_GRAPHS = False
+
+# rdflib's SPARQL grammar (pyparsing) keeps parse state on shared objects, so
+# two threads parsing at once corrupt each other's parse: one at a time
+_parse_lock = threading.Lock()
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class RequestError(Exception):
+    """Answered with status and message instead of a result"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------------------------------------- #
+# Timeouts
+# ---------------------------------------------------------------------------- #
+# rdflib evaluation cannot be interrupted from outside, so each request thread
+# sets a deadline that is checked on every triple-pattern lookup and every
+# row produced. The columnar evaluator joins whole patterns at once, so it
+# checks before each join instead, and refuses joins that would not fit. BGPs
+# answered from a path view never reach the graph, so the view's rows are
+# checked as they are read.
+_deadline = threading.local()
+
+
+def check_deadline():
+    deadline = getattr(_deadline, 'at', None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise QueryTimeout()
+
+
+def checked(rows):
+    """rows, checking the deadline before each one"""
+    for row in rows:
+        check_deadline()
+        yield row
+
+
+class DeadlineGraph(Graph):
+    """Graph whose pattern lookups honour the calling thread's deadline"""
+
+    def triples(self, triple):
+        check_deadline()
+        yield from super().triples(triple)
+
+
+class LimitedGraph(Graph):
+    """CONSTRUCT/DESCRIBE result graph that ends the query once it holds more than limit triples"""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def add(self, triple):
+        super().add(triple)
+        if len(self) > self.limit:
+            raise RequestError(413, f"Result passed the limit of {self.limit:,} triples")
+        return self
+
+
+# ---------------------------------------------------------------------------- #
+# Cursors
+# ---------------------------------------------------------------------------- #
+class Cursor:
+    """A query's remaining rows; pages are taken under the cursor's lock"""
+
+    def __init__(self, rows, head):
+        self.id = uuid.uuid4().hex
+        self.rows = iter(rows)
+        self.head = head
+        self.offset = 0
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def page(self, size):
+        """(rows, more): up to size rows, and whether any remain (one row is read ahead)"""
+        rows = list(itertools.islice(self.rows, size + 1))
+        more = len(rows) > size
+        if more:
+            self.rows = itertools.chain([rows.pop()], self.rows)
+        self.offset += len(rows)
+        self.last_used = time.monotonic()
+        return rows, more
+
+
+class CursorTable:
+    """Open cursors, dropped after ttl seconds unused or when more than capacity are open"""
+
+    def __init__(self, capacity, ttl):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, cursor):
+        with self._lock:
+            self._expire()
+            self._cursors[cursor.id] = cursor
+            while len(self._cursors) > self.capacity:
+                self._cursors.popitem(last=False)
+
+    def get(self, cursor_id):
+        with self._lock:
+            self._expire()
+            cursor = self._cursors.get(cursor_id)
+            if cursor is not None:
+                self._cursors.move_to_end(cursor_id)
+            return cursor
+
+    def discard(self, cursor_id):
+        with self._lock:
+            self._cursors.pop(cursor_id, None)
+
+    def _expire(self):
+        now = time.monotonic()
+        for cursor_id in [cursor_id for cursor_id, cursor in self._cursors.items()
+                          if now - cursor.last_used > self.ttl]:
+            del self._cursors[cursor_id]
+
+    def __len__(self):
+        return len(self._cursors)
+
+
+# ---------------------------------------------------------------------------- #
+# Result encoding
+# ---------------------------------------------------------------------------- #
+def term_json(term):
+    """One RDF term in the SPARQL 1.1 JSON results format"""
+    if isinstance(term, URIRef):
+        return {'type': 'uri', 'value': str(term)}
+    if isinstance(term, BNode):
+        return {'type': 'bnode', 'value': str(term)}
+    value = {'type': 'literal', 'value': str(term)}
+    if isinstance(term, Literal):
+        if term.language:
+            value['xml:lang'] = term.language
+        elif term.datatype:
+            value['datatype'] = str(term.datatype)
+    return value
+
+
+def _uses_service(node):
+    if isinstance(node, CompValue):
+        return node.name == 'ServiceGraphPattern' or any(_uses_service(value) for value in node.values())
+    if isinstance(node, (list, tuple)):
+        return any(_uses_service(value) for value in node)
+    return False
+
+
+# ---------------------------------------------------------------------------- #
+# Endpoint
+# ---------------------------------------------------------------------------- #
+class SparqlEndpoint:
+    """
+    Request handling without the HTTP layer: each method returns
+    (status, content type, body). The graph is read-only and shared by every
+    request thread.
+    """
+
+    def __init__(self, graph, cache_dir=CACHE_DIR, timeout=30.0, page_size=1000, max_page_size=10000,
+                 max_construct_triples=100000, max_join_rows=5000000, max_concurrent=8, max_cursors=100,
+                 cursor_ttl=300.0, planner=None):
+        self.graph = graph
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.max_construct_triples = max_construct_triples
+        self.max_join_rows = max_join_rows
+        self.planner = planner
+        self.cursors = CursorTable(max_cursors, cursor_ttl)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.queries = OrderedDict((query.name, query) for query in QUERIES)
+        columnar_eval.join_guard = self._check_join
+        path_view_eval.row_guard = check_deadline
+
+    def _check_join(self, rows):
+        check_deadline()
+        if getattr(_deadline, 'at', None) is not None and rows > self.max_join_rows:
+            raise RequestError(413, f"Query needs a join of {rows:,} rows; the limit is {self.max_join_rows:,}")
+
+    def _registry(self):
+        # Prepared algebra is not safe to evaluate from two threads at once
+        # (expressions keep the current context on the node), so every request
+        # gets its own copy, loaded from the on-disk algebra cache
+        return QueryRegistry(QUERIES, cache_dir=self.cache_dir, planner=self.planner)
+
+    def _graph_result(self, prepared):
+        """
+        A CONSTRUCT or DESCRIBE result, built as rdflib's evalQuery builds it
+        but into a LimitedGraph, so an oversized result stops the query
+        instead of being built in full first.
+        """
+        query = prepared.algebra
+        ctx = QueryContext(self.graph, datasetClause=query.datasetClause)
+        ctx.prologue = prepared.prologue
+        graph = LimitedGraph(self.max_construct_triples)
+        if query.name == 'ConstructQuery':
+            template = query.template or query.p.p.triples  # CONSTRUCT WHERE
+            for solution in evalPart(ctx, query.p):
+                for triple in _fillTemplate(template, solution):
+                    graph.add(triple)
+            return graph
+
+        for prefix, namespace in self.graph.namespaces():
+            graph.bind(prefix, namespace)
+        resources = {term for term in query.PV if isinstance(term, URIRef)}
+        if query.p is not None:
+            for solution in evalPart(ctx, query.p):
+                resources.update(solution.values())
+        for resource in resources:
+            self.graph.cbd(resource, target_graph=graph)
+        return graph
+
+    def _page_size(self, params):
+        try:
+            size = int(params.get('limit', self.page_size))
+        except ValueError:
+            raise RequestError(400, "limit must be an integer")
+        if size < 1:
+            raise RequestError(400, "limit must be positive")
+        return min(size, self.max_page_size)
+
+    def _run(self, work):
+        """Run work() in a request slot under the timeout"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RequestError(503, "Too many concurrent queries, retry later")
+        _deadline.at = time.monotonic() + self.timeout
+        try:
+            return work()
+        except QueryTimeout:
+            raise RequestError(503, f"Query exceeded the {self.timeout:g}s timeout")
+        finally:
+            _deadline.at = None
+            self._slots.release()
+
+    def _page(self, cursor, size):
+        with cursor.lock:
+            try:
+                rows, more = self._run(lambda: cursor.page(size))
+            except RequestError:
+                self.cursors.discard(cursor.id)  # the row generator died with the timeout
+                raise
+        if more:
+            self.cursors.add(cursor)
+        else:
+            self.cursors.discard(cursor.id)
+        page = {'offset': cursor.offset - len(rows), 'rows': len(rows),
+                'next_cursor': cursor.id if more else None}
+        return rows, page
+
+    def _continue(self, params, kind):
+        cursor = self.cursors.get(params['cursor'])
+        if cursor is None or cursor.head['kind'] != kind:
+            raise RequestError(404, "Unknown or expired cursor")
+        return cursor
+
+    # -- SPARQL protocol ------------------------------------------------------ #
+    def sparql(self, params):
+        size = self._page_size(params)
+        if 'cursor' in params:
+            cursor = self._continue(params, 'sparql')
+        else:
+            text = params.get('query')
+            if not text:
+                raise RequestError(400, "Missing query parameter")
+            try:
+                with _parse_lock:
+                    prepared = prepareQuery(text, initNs=NAMESPACES)
+            except Exception as error:
+                raise RequestError(400, f"Malformed query: {error}")
+            if _uses_service(prepared.algebra):
+                raise RequestError(400, "SERVICE is not allowed on this endpoint")
+            if self.planner is not None:
+                self.planner.rewrite(prepared)
+
+            if prepared.algebra.name in ('ConstructQuery', 'DescribeQuery'):
+                graph = self._run(lambda: self._graph_result(prepared))
+                return 200, 'text/turtle', graph.serialize(format='turtle').encode('utf-8')
+
+            result = self._run(lambda: evalQuery(self.graph, prepared))
+            if result['type_'] == 'ASK':
+                return 200, SPARQL_JSON, {'head': {}, 'boolean': bool(result['askAnswer'])}
+
+            variables = list(result['vars_'])
+            cursor = Cursor(checked(bindings for bindings in result['bindings'] if bindings),
+                            {'kind': 'sparql', 'vars': variables})
+
+        rows, page = self._page(cursor, size)
+        variables = cursor.head['vars']
+        return 200, SPARQL_JSON, {
+            'head': {'vars': [str(variable) for variable in variables]},
+            'results': {'bindings': [
+                {str(variable): term_json(row[variable]) for variable in variables if row.get(variable) is not None}
+                for row in rows
+            ]},
+            'page': page,
+        }
+
+    # -- Named queries -------------------------------------------------------- #
+    def catalogue(self):
+        return 200, 'application/json', {'queries': [{
+            'name': query.name,
+            'description': query.description,
+            'path': f"/queries/{query.name}",
+            'parameters': [{
+                'name': parameter.name,
+                'description': parameter.description,
+                'datatype': str(parameter.datatype) if parameter.datatype else None,
+            } for parameter in query.parameters],
+        } for query in self.queries.values()]}
+
+    def named(self, name, params):
+        query = self.queries.get(name)
+        if query is None:
+            raise RequestError(404, f"No named query {name}")
+        size = self._page_size(params)
+        if 'cursor' in params:
+            cursor = self._continue(params, name)
+        else:
+            values = {key: value for key, value in params.items() if key not in ('limit', 'cursor')}
+            try:
+                bindings = query.bindings(values)
+            except ValueError as error:
+                raise RequestError(400, str(error))
+            registry = self._registry()
+            with _parse_lock:  # parses only if the algebra cache misses
+                registry.prepare(name)
+            cursor = Cursor(checked(registry.iter_records(self.graph, name, bindings)),
+                            {'kind': name, 'parameters': values})
+
+        rows, page = self._page(cursor, size)
+        return 200, 'application/json', {
+            'query': name,
+            'description': query.description,
+            'parameters': cursor.head['parameters'],
+            'results': rows,
+            'page': page,
+        }
+
+
+class EndpointHandler(BaseHTTPRequestHandler):
+    server_version = 'UniversitySPARQL/1.0'
+    endpoint = None
+    max_request_bytes = 65536
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self._dispatch(url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.max_request_bytes:
+            return self._send(413, 'application/json', {'error': f"Request body over {self.max_request_bytes} bytes"})
+        body = self.rfile.read(length).decode('utf-8')
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip()
+        params = parse_qs(url.query)
+        if content_type == 'application/sparql-query':
+            params['query'] = [body]
+        elif content_type == 'application/x-www-form-urlencoded':
+            params.update(parse_qs(body))
+        else:
+            return self._send(415, 'application/json', {'error': f"Unsupported content type {content_type!r}"})
+        self._dispatch(url.path, params)
+
+    def _dispatch(self, path, params):
+        if len(self.path) > self.max_request_bytes:
+            return self._send(414, 'application/json', {'error': "Request URI too long"})
+        params = {key: values[-1] for key, values in params.items()}
+        try:
+            if path == '/sparql':
+                status, content_type, body = self.endpoint.sparql(params)
+            elif path == '/queries':
+                status, content_type, body = self.endpoint.catalogue()
+            elif path.startswith('/queries/'):
+                status, content_type, body = self.endpoint.named(path[len('/queries/'):], params)
+            else:
+                raise RequestError(404, f"No route for {path}")
+        except RequestError as error:
+            status, content_type, body = error.status, 'application/json', {'error': str(error)}
+        self._send(status, content_type, body)
+
+    def _send(self, status, content_type, body):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the integrated RDF data over the SPARQL 1.1 protocol")
+    add_store_arguments(parser)
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Interface to bind; the endpoint is meant for localhost")
+    parser.add_argument('--port', type=int, default=8890)
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help="Seconds a query (or one page of it) may run")
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help="Rows per page when the request sets no limit")
+    parser.add_argument('--max-page-size', type=int, default=10000,
+                        help="Upper bound on a request's limit")
+    parser.add_argument('--max-construct-triples', type=int, default=100000,
+                        help="Largest CONSTRUCT/DESCRIBE result returned")
+    parser.add_argument('--max-join-rows', type=int, default=5000000,
+                        help="Largest intermediate join the snapshot's columnar evaluator may build")
+    parser.add_argument('--max-request-bytes', type=int, default=65536,
+                        help="Largest accepted query string or POST body")
+    parser.add_argument('--max-concurrent', type=int, default=8,
+                        help="Queries evaluated at once; further requests wait up to the timeout")
+    parser.add_argument('--cursor-ttl', type=float, default=300.0,
+                        help="Seconds an unread cursor is kept")
+    parser.add_argument('--query-cache', default=CACHE_DIR,
+                        help="Directory caching the compiled query algebra")
+    parser.add_argument('--no-planner', action='store_true',
+                        help="Do not reorder or prune triple patterns from the graph statistics")
+    parser.add_argument('--quiet', action='store_true', help="Do not log requests")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("SPARQL ENDPOINT")
+    print("=" * 70)
+
+    load_start = time.perf_counter()
+    try:
+        graph, source, load_warnings = open_graph(args.store, args.snapshot_dir, args.store_path,
+                                                  columnar=not args.no_columnar_bgp, graph_class=DeadlineGraph,
+                                                  path_views=not args.no_path_views)
+    except FileNotFoundError as error:
+        sys.exit(str(error))
+    for load_warning in load_warnings:
+        print(f"   ⚠ {load_warning}")
+    print(f"   ✓ Loaded {len(graph):,} triples from {source} in {time.perf_counter() - load_start:.3f}s")
+
+    planner = None
+    if not args.no_planner:
+        planner, planner_reason = load_planner()
+        if planner is None:
+            print(f"   ⚠ Query planner not used ({planner_reason})")
+
+    endpoint = SparqlEndpoint(graph, cache_dir=args.query_cache, timeout=args.timeout,
+                              page_size=args.page_size, max_page_size=args.max_page_size,
+                              max_construct_triples=args.max_construct_triples, max_join_rows=args.max_join_rows,
+                              max_concurrent=args.max_concurrent, cursor_ttl=args.cursor_ttl, planner=planner)
+    # Fill the algebra cache once so request threads only load it
+    registry = endpoint._registry()
+    for name in endpoint.queries:
+        registry.prepare(name)
+
+    EndpointHandler.endpoint = endpoint
+    EndpointHandler.max_request_bytes = args.max_request_bytes
+    EndpointHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), EndpointHandler)
+    server.daemon_threads = True
+    print(f"   ✓ Serving http://{args.host}:{server.server_port}/sparql "
+          f"and {len(endpoint.queries)} named queries under /queries")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n   ✓ Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
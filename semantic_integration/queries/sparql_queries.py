@@ -3,28 +3,124 @@ SPARQL Query Engine and Validation
 Query the integrated RDF data and validate semantic consistency
 """
 
-from rdflib import Graph, Namespace
-from rdflib.plugins.sparql import prepareQuery
+import argparse
 import json
+import sys
+import time
 from datetime import datetime
 
+from graph_loader import add_store_arguments, open_graph, turtle_source
+from graph_version import current_graph_version
+import path_view_eval
+from path_view import open_views
+from query_planner import load_planner
+from query_registry import CACHE_DIR, default_registry
+from result_cache import DEFAULT_MAX_BYTES, RESULT_CACHE_DIR, ResultCache
+from result_writer import FORMATS, ResultWriter, parquet_available
+from validation_engine import ShapeValidator, conforming, legacy_results, load_shapes
+
+parser = argparse.ArgumentParser(description="Query and validate the integrated RDF data")
+add_store_arguments(parser)
+parser.add_argument('--query-cache', default=CACHE_DIR,
+                    help="Directory caching the compiled query algebra between runs")
+parser.add_argument('--no-query-cache', action='store_true',
+                    help="Parse every query from its text, ignoring the on-disk cache")
+parser.add_argument('--result-cache', default=RESULT_CACHE_DIR,
+                    help="Directory caching converted query results per graph version")
+parser.add_argument('--result-cache-mb', type=float, default=DEFAULT_MAX_BYTES / 2 ** 20,
+                    help="Size limit of the result cache; least recently used entries are evicted")
+parser.add_argument('--no-result-cache', action='store_true',
+                    help="Evaluate every query, ignoring cached results")
+parser.add_argument('--workers', type=int, default=1,
+                    help="Evaluate the queries and the validation pass concurrently in this many "
+                         "forked processes sharing the loaded graph")
+parser.add_argument('--stream-results', nargs='?', const='queries/results', default=None, metavar='DIR',
+                    help="Stream each query's rows to DIR/<query>.ndjson with an index.json manifest "
+                         "instead of collecting them into query_results.json (default DIR: queries/results)")
+parser.add_argument('--result-formats', nargs='+', choices=FORMATS, default=['ndjson'],
+                    help="Formats written by --stream-results besides NDJSON (parquet needs pyarrow)")
+parser.add_argument('--no-planner', action='store_true',
+                    help="Evaluate triple patterns in rdflib's order instead of reordering and pruning "
+                         "them from output/graph_statistics.json")
+parser.add_argument('--explain', action='store_true',
+                    help="Print each query's pattern order and dropped patterns, then exit without "
+                         "evaluating anything")
+args = parser.parse_args()
+if 'parquet' in args.result_formats and not parquet_available():
+    parser.error("--result-formats parquet needs pyarrow (pip install pyarrow)")
+
 print("="*70)
 print("SPARQL QUERY ENGINE AND VALIDATION")
 print("="*70)
 
-# Define namespaces
-UNI = Namespace("http://university.edu/ontology#")
-DATA = Namespace("http://university.edu/data#")
-
 # Load integrated RDF data
 print("\n1. Loading integrated RDF data...")
-g = Graph()
-g.parse("output/integrated_data.ttl", format="turtle")
-print(f"   ✓ Loaded {len(g):,} triples")
 
-# Bind namespaces for prettier output
-g.bind("uni", UNI)
-g.bind("data", DATA)
+# Results are cached per graph version, which the integration step writes
+# next to the Turtle output; a new version makes every older entry unreachable
+result_cache = None
+if not args.no_result_cache:
+    graph_version, version_reason = current_graph_version(turtle_source())
+    if graph_version is not None:
+        result_cache = ResultCache(graph_version, args.result_cache, int(args.result_cache_mb * 2 ** 20))
+    else:
+        print(f"   ⚠ Result cache not used ({version_reason})")
+
+# Triple patterns are reordered by selectivity, and patterns the data implies
+# dropped, using statistics counted on this graph version by the integration step
+planner = None
+planner_reason = "--no-planner"
+if not args.no_planner:
+    planner, planner_reason = load_planner()
+    if planner is None:
+        print(f"   ⚠ Query planner not used ({planner_reason})")
+
+# Every query and validation is registered by name and prepared once
+registry = default_registry(cache_dir=None if args.no_query_cache else args.query_cache,
+                            result_cache=result_cache, planner=planner)
+
+if args.explain:
+    if planner is None:
+        sys.exit(f"Nothing to explain: no query planner ({planner_reason})")
+    views = open_views(turtle_source())[0] if not args.no_path_views else None
+    for query in registry:
+        namespace_manager = registry.prepare(query.name).prologue.namespace_manager
+        print(f"\n{query.name}: {query.description}")
+        for i, plan in enumerate(registry.plans[query.name], 1):
+            print(f" BGP {i} (estimated {plan.steps[-1][2]:,.1f} rows)")
+            for line in plan.explain(namespace_manager):
+                print(line)
+            match = views.match(plan.triples) if views is not None else None
+            if match is not None:
+                print(f"  answered by path view {match[0].name}")
+    sys.exit(0)
+
+load_start = time.perf_counter()
+try:
+    g, source, load_warnings = open_graph(args.store, args.snapshot_dir, args.store_path,
+                                          columnar=not args.no_columnar_bgp, path_views=not args.no_path_views)
+except FileNotFoundError as error:
+    sys.exit(str(error))
+for load_warning in load_warnings:
+    print(f"   ⚠ {load_warning}")
+load_seconds = time.perf_counter() - load_start
+print(f"   ✓ Loaded {len(g):,} triples from {source} in {load_seconds:.3f}s")
+
+# ============================================================================
+# Evaluate every query and the validation pass as one batch
+# ============================================================================
+# The jobs are independent, so with --workers > 1 they run concurrently in
+# forked processes that share the loaded graph; results come back in order.
+# Every shape in ontology/validation_shapes.json is checked in one pass over
+# the instances of its class, and the report is cached like a query result.
+validator = ShapeValidator(load_shapes())
+REPORT_QUERIES = ['query1', 'query2', 'query3', 'query4', 'query5', 'query6']
+# Streamed queries are written row by row below instead of being collected here
+BATCH = ([] if args.stream_results else REPORT_QUERIES) + ['validation_report', 'cross_validation']
+batch_start = time.perf_counter()
+batch = registry.results(g, BATCH, workers=args.workers,
+                         jobs={'validation_report': (validator.cache_key(), validator.validate)})
+batch_seconds = time.perf_counter() - batch_start
 
 # ============================================================================
 # SPARQL QUERIES
@@ -34,265 +130,91 @@ print("="*70)
 
 query_results = {}
 
-# Query 1: List all students with their majors and GPAs
-print("\nQuery 1: List all students with their majors and GPAs")
-print("-"*70)
-
-query1 = """
-PREFIX uni: <http://university.edu/ontology#>
-PREFIX data: <http://university.edu/data#>
-
-SELECT ?studentID ?firstName ?lastName ?gpa ?deptName
-WHERE {
-    ?student a uni:Student ;
-             uni:studentID ?studentID ;
-             uni:firstName ?firstName ;
-             uni:lastName ?lastName ;
-             uni:gpa ?gpa ;
-             uni:majorIn ?dept .
-    ?dept uni:departmentName ?deptName .
-}
-ORDER BY DESC(?gpa)
-"""
-
-results1 = g.query(query1)
-query1_data = []
-
-for row in results1:
-    print(f"Student: {row.firstName} {row.lastName} (ID: {row.studentID})")
-    print(f"  Major: {row.deptName}, GPA: {row.gpa}")
-    query1_data.append({
-        'studentID': str(row.studentID),
-        'name': f"{row.firstName} {row.lastName}",
-        'gpa': float(row.gpa),
-        'major': str(row.deptName)
-    })
-
-query_results['query1'] = {
-    'description': 'Students with majors and GPAs',
-    'count': len(query1_data),
-    'results': query1_data
-}
-
-# Query 2: Find all courses taught by each instructor
-print("\n" + "="*70)
-print("\nQuery 2: Find all courses taught by each instructor")
-print("-"*70)
-
-query2 = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?instructorID ?firstName ?lastName ?courseCode ?courseName
-WHERE {
-    ?instructor a uni:Instructor ;
-                uni:instructorID ?instructorID ;
-                uni:firstName ?firstName ;
-                uni:lastName ?lastName ;
-                uni:teaches ?course .
-    ?course uni:courseCode ?courseCode ;
-            uni:courseName ?courseName .
-}
-ORDER BY ?lastName ?courseCode
-"""
-
-results2 = g.query(query2)
-query2_data = []
-current_instructor = None
-
-for row in results2:
-    instructor_name = f"{row.firstName} {row.lastName} ({row.instructorID})"
-    if instructor_name != current_instructor:
-        if current_instructor:
-            print()
-        print(f"\nInstructor: {instructor_name}")
-        current_instructor = instructor_name
-    
-    print(f"  - {row.courseCode}: {row.courseName}")
-    query2_data.append({
-        'instructorID': str(row.instructorID),
-        'instructor': f"{row.firstName} {row.lastName}",
-        'courseCode': str(row.courseCode),
-        'courseName': str(row.courseName)
-    })
-
-query_results['query2'] = {
-    'description': 'Courses taught by instructors',
-    'count': len(query2_data),
-    'results': query2_data
-}
-
-# Query 3: Student enrollment details with grades
-print("\n" + "="*70)
-print("\nQuery 3: Student enrollment details with grades")
-print("-"*70)
-
-query3 = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?studentID ?firstName ?lastName ?courseCode ?courseName ?semester ?grade
-WHERE {
-    ?student a uni:Student ;
-             uni:studentID ?studentID ;
-             uni:firstName ?firstName ;
-             uni:lastName ?lastName ;
-             uni:hasEnrollment ?enrollment .
-    ?enrollment uni:enrollmentFor ?course ;
-                uni:semester ?semester ;
-                uni:grade ?grade .
-    ?course uni:courseCode ?courseCode ;
-            uni:courseName ?courseName .
-}
-ORDER BY ?lastName ?semester
-"""
-
-results3 = g.query(query3)
-query3_data = []
-
-for row in results3:
-    print(f"{row.firstName} {row.lastName}: {row.courseCode} - {row.semester} - Grade: {row.grade}")
-    query3_data.append({
-        'studentID': str(row.studentID),
-        'student': f"{row.firstName} {row.lastName}",
-        'course': f"{row.courseCode}: {row.courseName}",
-        'semester': str(row.semester),
-        'grade': str(row.grade)
-    })
-
-query_results['query3'] = {
-    'description': 'Student enrollments with grades',
-    'count': len(query3_data),
-    'results': query3_data
-}
-
-# Query 4: Department information with courses and budgets
-print("\n" + "="*70)
-print("\nQuery 4: Department information with courses and budgets")
-print("-"*70)
-
-query4 = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?deptName ?building ?facultyCount ?budget (COUNT(?course) AS ?courseCount)
-WHERE {
-    ?dept a uni:Department ;
-          uni:departmentName ?deptName ;
-          uni:building ?building ;
-          uni:facultyCount ?facultyCount ;
-          uni:budget ?budget .
-    OPTIONAL { ?course uni:offeredBy ?dept . }
-}
-GROUP BY ?deptName ?building ?facultyCount ?budget
-ORDER BY DESC(?budget)
-"""
-
-results4 = g.query(query4)
-query4_data = []
-
-for row in results4:
-    print(f"\nDepartment: {row.deptName}")
-    print(f"  Building: {row.building}")
-    print(f"  Faculty Count: {row.facultyCount}")
-    print(f"  Budget: ${int(row.budget):,}")
-    print(f"  Courses Offered: {row.courseCount}")
-    query4_data.append({
-        'department': str(row.deptName),
-        'building': str(row.building),
-        'faculty_count': int(row.facultyCount),
-        'budget': int(row.budget),
-        'course_count': int(row.courseCount)
-    })
-
-query_results['query4'] = {
-    'description': 'Department statistics',
-    'count': len(query4_data),
-    'results': query4_data
-}
-
-# Query 5: Computer Science students and their enrollments
-print("\n" + "="*70)
-print("\nQuery 5: Computer Science students and their enrollments")
-print("-"*70)
-
-query5 = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?firstName ?lastName ?gpa ?courseCode ?grade
-WHERE {
-    ?student a uni:Student ;
-             uni:firstName ?firstName ;
-             uni:lastName ?lastName ;
-             uni:gpa ?gpa ;
-             uni:majorIn ?dept ;
-             uni:enrolledIn ?course .
-    ?dept uni:departmentName "Computer Science" .
-    ?course uni:courseCode ?courseCode .
-    ?student uni:hasEnrollment ?enrollment .
-    ?enrollment uni:enrollmentFor ?course ;
-                uni:grade ?grade .
-}
-ORDER BY ?lastName
-"""
-
-results5 = g.query(query5)
-query5_data = []
-
-for row in results5:
-    print(f"{row.firstName} {row.lastName} (GPA: {row.gpa}): {row.courseCode} - {row.grade}")
-    query5_data.append({
-        'student': f"{row.firstName} {row.lastName}",
-        'gpa': float(row.gpa),
-        'course': str(row.courseCode),
-        'grade': str(row.grade)
-    })
-
-query_results['query5'] = {
-    'description': 'Computer Science students enrollments',
-    'count': len(query5_data),
-    'results': query5_data
-}
-
-# Query 6: Courses with high credit hours (4 credits)
-print("\n" + "="*70)
-print("\nQuery 6: Courses with 4 credit hours")
-print("-"*70)
-
-query6 = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?courseCode ?courseName ?deptName ?instructorFirst ?instructorLast
-WHERE {
-    ?course a uni:Course ;
-            uni:courseCode ?courseCode ;
-            uni:courseName ?courseName ;
-            uni:credits 4 ;
-            uni:offeredBy ?dept .
-    ?dept uni:departmentName ?deptName .
-    ?instructor uni:teaches ?course ;
-                uni:firstName ?instructorFirst ;
-                uni:lastName ?instructorLast .
-}
-ORDER BY ?courseCode
-"""
-
-results6 = g.query(query6)
-query6_data = []
-
-for row in results6:
-    print(f"{row.courseCode}: {row.courseName}")
-    print(f"  Department: {row.deptName}")
-    print(f"  Instructor: {row.instructorFirst} {row.instructorLast}")
-    query6_data.append({
-        'courseCode': str(row.courseCode),
-        'courseName': str(row.courseName),
-        'department': str(row.deptName),
-        'instructor': f"{row.instructorFirst} {row.instructorLast}"
-    })
-
-query_results['query6'] = {
-    'description': '4-credit courses',
-    'count': len(query6_data),
-    'results': query6_data
-}
+if args.stream_results:
+    # Each query's records go straight to its files as they are produced;
+    # query_results.json only points at them
+    writer = ResultWriter(args.stream_results, args.result_formats)
+    for name in REPORT_QUERIES:
+        entry = writer.write_query(name, registry[name].description, registry.iter_records(g, name))
+        query_results[name] = {key: entry[key] for key in ('description', 'count', 'files')}
+        print(f"{registry[name].description}: {entry['count']:,} rows -> "
+              f"{', '.join(file['path'] for file in entry['files'].values())}")
+    index_path = writer.write_index(graph_source=source, total_triples=len(g))
+    print(f"   ✓ Wrote result manifest {index_path}")
+else:
+    # Query 1: List all students with their majors and GPAs
+    print("\nQuery 1: List all students with their majors and GPAs")
+    print("-"*70)
+
+    query_results['query1'] = batch['query1']
+
+    for record in query_results['query1']['results']:
+        print(f"Student: {record['name']} (ID: {record['studentID']})")
+        print(f"  Major: {record['major']}, GPA: {record['gpa']}")
+
+    # Query 2: Find all courses taught by each instructor
+    print("\n" + "="*70)
+    print("\nQuery 2: Find all courses taught by each instructor")
+    print("-"*70)
+
+    query_results['query2'] = batch['query2']
+    current_instructor = None
+
+    for record in query_results['query2']['results']:
+        instructor_name = f"{record['instructor']} ({record['instructorID']})"
+        if instructor_name != current_instructor:
+            if current_instructor:
+                print()
+            print(f"\nInstructor: {instructor_name}")
+            current_instructor = instructor_name
+
+        print(f"  - {record['courseCode']}: {record['courseName']}")
+
+    # Query 3: Student enrollment details with grades
+    print("\n" + "="*70)
+    print("\nQuery 3: Student enrollment details with grades")
+    print("-"*70)
+
+    query_results['query3'] = batch['query3']
+
+    for record in query_results['query3']['results']:
+        print(f"{record['student']}: {record['course']} - {record['semester']} - Grade: {record['grade']}")
+
+    # Query 4: Department information with courses and budgets
+    print("\n" + "="*70)
+    print("\nQuery 4: Department information with courses and budgets")
+    print("-"*70)
+
+    query_results['query4'] = batch['query4']
+
+    for record in query_results['query4']['results']:
+        print(f"\nDepartment: {record['department']}")
+        print(f"  Building: {record['building']}")
+        print(f"  Faculty Count: {record['faculty_count']}")
+        print(f"  Budget: ${record['budget']:,}")
+        print(f"  Courses Offered: {record['course_count']}")
+
+    # Query 5: Computer Science students and their enrollments
+    print("\n" + "="*70)
+    print("\nQuery 5: Computer Science students and their enrollments")
+    print("-"*70)
+
+    query_results['query5'] = batch['query5']
+
+    for record in query_results['query5']['results']:
+        print(f"{record['student']} (GPA: {record['gpa']}): {record['course']} - {record['grade']}")
+
+    # Query 6: Courses with high credit hours (4 credits)
+    print("\n" + "="*70)
+    print("\nQuery 6: Courses with 4 credit hours")
+    print("-"*70)
+
+    query_results['query6'] = batch['query6']
+
+    for record in query_results['query6']['results']:
+        print(f"{record['courseCode']}: {record['courseName']}")
+        print(f"  Department: {record['department']}")
+        print(f"  Instructor: {record['instructor']}")
 
 # ============================================================================
 # VALIDATION
@@ -301,134 +223,62 @@ print("\n" + "="*70)
 print("\n3. Semantic Consistency Validation")
 print("="*70)
 
-validation_results = {}
+validation_report = batch['validation_report']
+validation_results = legacy_results(validation_report)
+
+
+def check_mark(count, total):
+    return f"{count}/{total} ✓" if count == total else f"{count}/{total} ✗"
+
 
 # Validation 1: Check all students have required properties
 print("\nValidation 1: All students have required properties")
 print("-"*70)
 
-val1_query = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT (COUNT(?student) AS ?totalStudents)
-       (COUNT(?sid) AS ?withStudentID)
-       (COUNT(?fn) AS ?withFirstName)
-       (COUNT(?ln) AS ?withLastName)
-       (COUNT(?email) AS ?withEmail)
-       (COUNT(?gpa) AS ?withGPA)
-WHERE {
-    ?student a uni:Student .
-    OPTIONAL { ?student uni:studentID ?sid . }
-    OPTIONAL { ?student uni:firstName ?fn . }
-    OPTIONAL { ?student uni:lastName ?ln . }
-    OPTIONAL { ?student uni:email ?email . }
-    OPTIONAL { ?student uni:gpa ?gpa . }
-}
-"""
-
-val1_results = g.query(val1_query)
-for row in val1_results:
-    total = int(row.totalStudents)
-    print(f"Total Students: {total}")
-    print(f"  With Student ID: {row.withStudentID}/{total} ✓" if int(row.withStudentID) == total else f"  With Student ID: {row.withStudentID}/{total} ✗")
-    print(f"  With First Name: {row.withFirstName}/{total} ✓" if int(row.withFirstName) == total else f"  With First Name: {row.withFirstName}/{total} ✗")
-    print(f"  With Last Name: {row.withLastName}/{total} ✓" if int(row.withLastName) == total else f"  With Last Name: {row.withLastName}/{total} ✗")
-    print(f"  With Email: {row.withEmail}/{total} ✓" if int(row.withEmail) == total else f"  With Email: {row.withEmail}/{total} ✗")
-    print(f"  With GPA: {row.withGPA}/{total} ✓" if int(row.withGPA) == total else f"  With GPA: {row.withGPA}/{total} ✗")
-    
-    validation_results['students_completeness'] = {
-        'total': total,
-        'complete': int(row.withStudentID) == total and int(row.withFirstName) == total,
-        'missing_properties': total - min(int(row.withStudentID), int(row.withFirstName), int(row.withLastName))
-    }
+total = validation_report['shapes']['Student']['focus_nodes']
+print(f"Total Students: {total}")
+print(f"  With Student ID: {check_mark(conforming(validation_report, 'Student', 'uni:studentID'), total)}")
+print(f"  With First Name: {check_mark(conforming(validation_report, 'Student', 'uni:firstName'), total)}")
+print(f"  With Last Name: {check_mark(conforming(validation_report, 'Student', 'uni:lastName'), total)}")
+print(f"  With Email: {check_mark(conforming(validation_report, 'Student', 'uni:email'), total)}")
+print(f"  With GPA: {check_mark(conforming(validation_report, 'Student', 'uni:gpa'), total)}")
 
 # Validation 2: Check referential integrity (enrollments reference existing courses and students)
 print("\nValidation 2: Referential integrity of enrollments")
 print("-"*70)
 
-val2_query = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT (COUNT(DISTINCT ?enrollment) AS ?totalEnrollments)
-       (COUNT(DISTINCT ?student) AS ?linkedStudents)
-       (COUNT(DISTINCT ?course) AS ?linkedCourses)
-WHERE {
-    ?enrollment a uni:Enrollment .
-    ?student uni:hasEnrollment ?enrollment .
-    ?enrollment uni:enrollmentFor ?course .
-}
-"""
-
-val2_results = g.query(val2_query)
-for row in val2_results:
-    print(f"Total Enrollments: {row.totalEnrollments}")
-    print(f"  Linked to Students: {row.linkedStudents} ✓")
-    print(f"  Linked to Courses: {row.linkedCourses} ✓")
-    
-    validation_results['enrollment_integrity'] = {
-        'total_enrollments': int(row.totalEnrollments),
-        'all_linked': True
-    }
+total_enrollments = validation_report['shapes']['Enrollment']['focus_nodes']
+print(f"Total Enrollments: {total_enrollments}")
+print(f"  Linked to Students: "
+      f"{check_mark(conforming(validation_report, 'Enrollment', '^uni:hasEnrollment', ('min_count', 'class')), total_enrollments)}")
+print(f"  Linked to Courses: "
+      f"{check_mark(conforming(validation_report, 'Enrollment', 'uni:enrollmentFor', ('min_count', 'class')), total_enrollments)}")
 
 # Validation 3: Check that all courses have instructors
 print("\nValidation 3: All courses have assigned instructors")
 print("-"*70)
 
-val3_query = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT (COUNT(?course) AS ?totalCourses)
-       (COUNT(?instructor) AS ?withInstructors)
-WHERE {
-    ?course a uni:Course .
-    OPTIONAL { ?instructor uni:teaches ?course . }
-}
-"""
-
-val3_results = g.query(val3_query)
-for row in val3_results:
-    total_courses = int(row.totalCourses)
-    with_inst = int(row.withInstructors)
-    print(f"Total Courses: {total_courses}")
-    print(f"  With Instructors: {with_inst}/{total_courses} ✓" if with_inst == total_courses else f"  With Instructors: {with_inst}/{total_courses} ✗")
-    
-    validation_results['courses_with_instructors'] = {
-        'total': total_courses,
-        'with_instructors': with_inst,
-        'complete': with_inst == total_courses
-    }
+courses = validation_results['courses_with_instructors']
+print(f"Total Courses: {courses['total']}")
+print(f"  With Instructors: {check_mark(courses['with_instructors'], courses['total'])}")
 
 # Validation 4: Verify data type consistency
 print("\nValidation 4: Data type consistency")
 print("-"*70)
 
-val4_query = """
-PREFIX uni: <http://university.edu/ontology#>
-PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-
-SELECT ?student ?gpa
-WHERE {
-    ?student a uni:Student ;
-             uni:gpa ?gpa .
-    FILTER (datatype(?gpa) = xsd:decimal)
-    FILTER (?gpa >= 0.0 && ?gpa <= 4.0)
-}
-"""
-
-val4_results = g.query(val4_query)
-valid_gpas = len(list(val4_results))
-
-# Get total students
-total_students_query = "SELECT (COUNT(?s) AS ?count) WHERE { ?s a <http://university.edu/ontology#Student> . }"
-total_students = int(list(g.query(total_students_query))[0][0])
+datatypes = validation_results['datatype_consistency']
+print(f"Students with valid GPA (0.0-4.0, decimal type): "
+      f"{check_mark(datatypes['valid_gpas'], datatypes['total_students'])}")
 
-print(f"Students with valid GPA (0.0-4.0, decimal type): {valid_gpas}/{total_students} ✓")
-
-validation_results['datatype_consistency'] = {
-    'valid_gpas': valid_gpas,
-    'total_students': total_students,
-    'all_valid': valid_gpas == total_students
-}
+# Offending nodes, across every shape
+print(f"\nShapes checked:")
+for name, shape_report in validation_report['shapes'].items():
+    print(f"  {name:12} {shape_report['focus_nodes']:>6} nodes  "
+          f"{'conforms ✓' if shape_report['conforms'] else str(shape_report['offending_nodes']) + ' offending ✗'}")
+for violation in validation_report['violations'][:20]:
+    print(f"  ✗ {violation['focus_node']}: {violation['message']}")
+if len(validation_report['violations']) > 20:
+    print(f"  ... {len(validation_report['violations']) - 20} more in queries/query_results.json")
 
 # ============================================================================
 # CROSS-SOURCE VALIDATION
@@ -441,23 +291,9 @@ print("="*70)
 print("\nCross-Validation: Course codes in enrollments match course catalog")
 print("-"*70)
 
-cross_val_query = """
-PREFIX uni: <http://university.edu/ontology#>
-
-SELECT ?courseCode (COUNT(?enrollment) AS ?enrollmentCount)
-WHERE {
-    ?enrollment a uni:Enrollment ;
-                uni:enrollmentFor ?course .
-    ?course uni:courseCode ?courseCode .
-}
-GROUP BY ?courseCode
-ORDER BY ?courseCode
-"""
-
-cross_val_results = g.query(cross_val_query)
 print("Course codes found in both enrollments and course catalog:")
-for row in cross_val_results:
-    print(f"  {row.courseCode}: {row.enrollmentCount} enrollments ✓")
+for row in batch['cross_validation']['results']:
+    print(f"  {row['courseCode']}: {row['enrollmentCount']} enrollments ✓")
 
 # ============================================================================
 # Save Results
@@ -465,15 +301,39 @@ for row in cross_val_results:
 print("\n" + "="*70)
 print("\n5. Saving query and validation results...")
 
+# ============================================================================
+# Parse vs execution time
+# ============================================================================
+query_timings = registry.timing_report()
+print("\nQuery timings (parse = parse + algebra translation, or cache load):")
+print(f"  {'query':18}{'source':>13}{'parse ms':>11}{'execute ms':>12}")
+for name, timing in query_timings.items():
+    print(f"  {name:18}{timing['source']:>13}{timing['parse_ms']:11.2f}{timing['execute_ms']:12.2f}")
+if result_cache is not None:
+    cache_stats = result_cache.stats()
+    print(f"  Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+          f"{cache_stats['entries']} entries ({cache_stats['bytes']:,} bytes) "
+          f"for graph version {cache_stats['graph_version'][:12]}")
+print(f"  Batch of {len(BATCH)} jobs on {args.workers} worker(s): {batch_seconds:.3f}s end to end")
+
 output_data = {
     'timestamp': datetime.now().isoformat(),
     'statistics': {
         'total_triples': len(g),
+        'graph_source': source,
+        'load_seconds': round(load_seconds, 4),
         'total_queries_executed': len(query_results),
-        'total_validations': len(validation_results)
+        'total_validations': len(validation_results),
+        'workers': args.workers,
+        'batch_seconds': round(batch_seconds, 4),
+        'query_timings': query_timings,
+        'result_cache': result_cache.stats() if result_cache is not None else None,
+        'query_planner': 'graph statistics' if planner is not None else f"not used ({planner_reason})",
+        'path_views': 'routed' if path_view_eval.active() else 'not used'
     },
     'query_results': query_results,
-    'validation_results': validation_results
+    'validation_results': validation_results,
+    'validation_report': validation_report
 }
 
 with open('queries/query_results.json', 'w', encoding='utf-8') as f:
@@ -481,11 +341,12 @@ with open('queries/query_results.json', 'w', encoding='utf-8') as f:
 
 print("   ✓ Saved queries/query_results.json")
 
-# Save individual query results
-for i, (key, data) in enumerate(query_results.items(), 1):
-    with open(f'queries/query_{i}_results.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-    print(f"   ✓ Saved queries/query_{i}_results.json")
+# Save individual query results (streamed results already have their own files)
+if not args.stream_results:
+    for i, (key, data) in enumerate(query_results.items(), 1):
+        with open(f'queries/query_{i}_results.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"   ✓ Saved queries/query_{i}_results.json")
 
 # ============================================================================
 # Summary
@@ -498,13 +359,15 @@ all_valid = all([
     validation_results.get('students_completeness', {}).get('complete', False),
     validation_results.get('enrollment_integrity', {}).get('all_linked', False),
     validation_results.get('courses_with_instructors', {}).get('complete', False),
-    validation_results.get('datatype_consistency', {}).get('all_valid', False)
+    validation_results.get('datatype_consistency', {}).get('all_valid', False),
+    validation_report['conforms']
 ])
 
 print(f"\n✓ All students have complete required properties: {validation_results['students_completeness']['complete']}")
 print(f"✓ All enrollments maintain referential integrity: {validation_results['enrollment_integrity']['all_linked']}")
 print(f"✓ All courses have assigned instructors: {validation_results['courses_with_instructors']['complete']}")
 print(f"✓ All GPA values are valid decimals (0.0-4.0): {validation_results['datatype_consistency']['all_valid']}")
+print(f"✓ All nodes conform to the validation shapes: {validation_report['conforms']}")
 
 print(f"\n{'='*70}")
 print(f"Overall Semantic Consistency: {'VALID ✓' if all_valid else 'ISSUES DETECTED ✗'}")
@@ -0,0 +1,204 @@
+"""
+Shape-driven validation engine
+Checks the integrated graph against the declarative shapes in
+ontology/validation_shapes.json: required properties per class, referential
+targets, datatypes and value ranges. Every check on a class runs in one pass
+over its instances, and the report names the offending nodes, not just counts.
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from rdflib import Literal, RDF, URIRef
+
+SHAPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ontology', 'validation_shapes.json')
+
+
+def load_shapes(path=SHAPES_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def expand(curie, prefixes):
+    """'uni:Student' -> URIRef"""
+    prefix, _, local = curie.partition(':')
+    if prefix not in prefixes:
+        raise ValueError(f"Unknown prefix in validation shapes: {curie}")
+    return URIRef(prefixes[prefix] + local)
+
+
+class PropertyRule:
+    """
+    The constraints on one property path of a shape. A path starting with '^'
+    is followed backwards (the focus node is the object).
+    """
+
+    def __init__(self, spec, prefixes):
+        self.path = spec['path']
+        self.inverse = self.path.startswith('^')
+        self.predicate = expand(self.path.lstrip('^'), prefixes)
+        self.min_count = spec.get('min_count')
+        self.datatype = expand(spec['datatype'], prefixes) if 'datatype' in spec else None
+        self.target_class = expand(spec['class'], prefixes) if 'class' in spec else None
+        self.min_inclusive = spec.get('min_inclusive')
+        self.max_inclusive = spec.get('max_inclusive')
+
+    def constraints(self):
+        """Names of the constraints this rule checks, in report order"""
+        names = [('min_count', self.min_count), ('datatype', self.datatype), ('class', self.target_class),
+                 ('min_inclusive', self.min_inclusive), ('max_inclusive', self.max_inclusive)]
+        return [name for name, value in names if value is not None]
+
+    def check(self, values, types_of):
+        """(constraint, value, message) for every violation among a focus node's values"""
+        if self.min_count is not None and len(values) < self.min_count:
+            yield 'min_count', None, f"{len(values)} value(s) for {self.path}, at least {self.min_count} required"
+        for value in values:
+            if self.datatype is not None:
+                datatype = value.datatype if isinstance(value, Literal) else None
+                if datatype != self.datatype:
+                    yield 'datatype', value, f"{self.path} has datatype {datatype}, expected {self.datatype}"
+                    continue  # a range check on an ill-typed value says nothing new
+            if self.target_class is not None and self.target_class not in types_of(value):
+                yield 'class', value, f"{self.path} target {value} is not a {self.target_class}"
+            if self.min_inclusive is not None or self.max_inclusive is not None:
+                number = value.toPython() if isinstance(value, Literal) else value
+                try:
+                    if self.min_inclusive is not None and number < self.min_inclusive:
+                        yield 'min_inclusive', value, f"{self.path} = {value} < {self.min_inclusive}"
+                    if self.max_inclusive is not None and number > self.max_inclusive:
+                        yield 'max_inclusive', value, f"{self.path} = {value} > {self.max_inclusive}"
+                except TypeError:
+                    yield 'min_inclusive', value, f"{self.path} = {value} is not a number"
+
+
+class Shape:
+    def __init__(self, name, spec, prefixes):
+        self.name = name
+        self.description = spec.get('description', '')
+        self.target_class = expand(spec['target_class'], prefixes)
+        self.target_curie = spec['target_class']
+        self.rules = [PropertyRule(rule, prefixes) for rule in spec['properties']]
+        self.forward = {rule.predicate for rule in self.rules if not rule.inverse}
+        self.backward = {rule.predicate for rule in self.rules if rule.inverse}
+
+
+class ShapeValidator:
+    """
+    Validates a graph against compiled shapes.
+
+    For each shape the instances of its target class are visited once: one
+    lookup gathers all of a node's outgoing values for the constrained
+    predicates, and one more its incoming values when a rule has an inverse
+    path. Type lookups of referenced nodes are memoized across shapes.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.shapes = [Shape(name, shape, spec['prefixes']) for name, shape in spec['shapes'].items()]
+
+    def cache_key(self):
+        """Hash of the shapes, for caching reports alongside query results"""
+        return hashlib.sha256(json.dumps(self.spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def validate(self, graph):
+        types = {}
+
+        def types_of(node):
+            if node not in types:
+                types[node] = set(graph.objects(node, RDF.type))
+            return types[node]
+
+        report = {'conforms': True, 'shapes': {}, 'violations': []}
+        for shape in self.shapes:
+            focus_nodes = set(graph.subjects(RDF.type, shape.target_class))
+            offending = {(rule.path, name): set() for rule in shape.rules for name in rule.constraints()}
+
+            for node in focus_nodes:
+                values = defaultdict(list)
+                if shape.forward:
+                    for predicate, value in graph.predicate_objects(node):
+                        if predicate in shape.forward:
+                            values[predicate].append(value)
+                incoming = defaultdict(list)
+                if shape.backward:
+                    for value, predicate in graph.subject_predicates(node):
+                        if predicate in shape.backward:
+                            incoming[predicate].append(value)
+
+                for rule in shape.rules:
+                    rule_values = (incoming if rule.inverse else values).get(rule.predicate, [])
+                    for constraint, value, message in rule.check(rule_values, types_of):
+                        offending[(rule.path, constraint)].add(node)
+                        report['violations'].append({
+                            'shape': shape.name,
+                            'focus_node': str(node),
+                            'path': rule.path,
+                            'constraint': constraint,
+                            'value': str(value) if value is not None else None,
+                            'message': message,
+                        })
+
+            constraints = [{
+                'path': path,
+                'constraint': constraint,
+                'conforming': len(focus_nodes) - len(nodes),
+                'offending_nodes': sorted(str(node) for node in nodes),
+            } for (path, constraint), nodes in offending.items()]
+            conforms = not any(nodes for nodes in offending.values())
+            report['shapes'][shape.name] = {
+                'description': shape.description,
+                'target_class': shape.target_curie,
+                'focus_nodes': len(focus_nodes),
+                'conforms': conforms,
+                'offending_nodes': len(set().union(*offending.values())),
+                'constraints': constraints,
+            }
+            report['conforms'] = report['conforms'] and conforms
+        report['violations'].sort(key=lambda v: (v['shape'], v['focus_node'], v['path'], v['constraint']))
+        return report
+
+
+def conforming(report, shape, path, constraints=('min_count',)):
+    """Focus nodes of a shape that pass every listed constraint on path"""
+    shape_report = report['shapes'][shape]
+    offending = set()
+    for record in shape_report['constraints']:
+        if record['path'] == path and record['constraint'] in constraints:
+            offending.update(record['offending_nodes'])
+    return shape_report['focus_nodes'] - len(offending)
+
+
+def legacy_results(report):
+    """The validation_results block of query_results.json, derived from a report"""
+    students = report['shapes']['Student']['focus_nodes']
+    with_id = conforming(report, 'Student', 'uni:studentID')
+    with_first = conforming(report, 'Student', 'uni:firstName')
+    with_last = conforming(report, 'Student', 'uni:lastName')
+    courses = report['shapes']['Course']['focus_nodes']
+    with_instructors = conforming(report, 'Course', '^uni:teaches')
+    valid_gpas = conforming(report, 'Student', 'uni:gpa',
+                            ('min_count', 'datatype', 'min_inclusive', 'max_inclusive'))
+    return {
+        'students_completeness': {
+            'total': students,
+            'complete': with_id == students and with_first == students,
+            'missing_properties': students - min(with_id, with_first, with_last)
+        },
+        'enrollment_integrity': {
+            'total_enrollments': report['shapes']['Enrollment']['focus_nodes'],
+            'all_linked': report['shapes']['Enrollment']['conforms']
+        },
+        'courses_with_instructors': {
+            'total': courses,
+            'with_instructors': with_instructors,
+            'complete': with_instructors == courses
+        },
+        'datatype_consistency': {
+            'valid_gpas': valid_gpas,
+            'total_students': students,
+            'all_valid': valid_gpas == students
+        }
+    }
@@ -0,0 +1,55 @@
+"""
+Query-side loading after semantic_integration.py --gzip: the graph version
+and snapshot are recorded against output/integrated_data.ttl.gz, and a plain
+.ttl left over from an earlier run must not be served instead.
+"""
+
+import gzip
+import os
+import sys
+
+from rdflib import Graph, Literal, URIRef
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import columnar_eval  # noqa: E402
+from graph_loader import TURTLE_SOURCE, open_graph, turtle_source  # noqa: E402
+from graph_snapshot import write_snapshot  # noqa: E402
+from graph_version import GRAPH_VERSION_PATH, write_graph_version  # noqa: E402
+
+BUILDING = URIRef('http://university.edu/ontology#building')
+DEPARTMENT = URIRef('http://university.edu/data#dept_CS')
+
+
+def integrate(building, compress):
+    """What the integration step leaves in output/ for a one-triple graph"""
+    graph = Graph()
+    graph.add((DEPARTMENT, BUILDING, Literal(building)))
+    data = graph.serialize(format='turtle').encode('utf-8')
+    path = TURTLE_SOURCE + '.gz' if compress else TURTLE_SOURCE
+    with (gzip.open(path, 'wb') if compress else open(path, 'wb')) as f:
+        f.write(data)
+    write_graph_version(graph, path, GRAPH_VERSION_PATH)
+    write_snapshot(graph, path)
+
+
+def buildings(store):
+    graph, _, warnings = open_graph(store, path_views=False)
+    try:
+        return {str(o) for o in graph.objects(DEPARTMENT, BUILDING)}, warnings
+    finally:
+        columnar_eval.disable()
+
+
+def test_gzip_output_is_served(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('output')
+    integrate('Tech Center', compress=False)
+    integrate('Tech Tower', compress=True)
+
+    assert turtle_source() == TURTLE_SOURCE + '.gz'
+    assert buildings('snapshot') == ({'Tech Tower'}, [])
+    os.remove(TURTLE_SOURCE)
+    assert buildings('memory') == ({'Tech Tower'}, [])
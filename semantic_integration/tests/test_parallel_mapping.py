@@ -0,0 +1,29 @@
+"""
+Row-range planning of the parallel mapping over tables with sparse rowids.
+"""
+
+import os
+import sqlite3
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+
+from sqlite_mapper import rowid_chunks  # noqa: E402
+
+
+def test_sparse_rowids_give_full_chunks():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE Students (student_id INTEGER PRIMARY KEY, name TEXT)")
+    ids = [1, 2, 999, 1000, 5000, 5001, 5002, 10 ** 9]
+    conn.executemany("INSERT INTO Students VALUES (?, 'x')", [(i,) for i in ids])
+
+    chunks = rowid_chunks(conn, 'Students', 3)
+    assert chunks == [(1, 999), (1000, 5001), (5002, 10 ** 9)]
+    covered = [rowid for low, high in chunks
+               for rowid, in conn.execute("SELECT rowid FROM Students WHERE rowid BETWEEN ? AND ?", (low, high))]
+    assert covered == ids
+    assert rowid_chunks(conn, 'Students', 8) == [(1, 10 ** 9)]
+
+    conn.execute("DELETE FROM Students")
+    assert rowid_chunks(conn, 'Students', 3) == []
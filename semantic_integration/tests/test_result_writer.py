@@ -0,0 +1,30 @@
+"""
+Parquet result files whose columns are all null in the first row group, as
+an OPTIONAL variable can be, and only get values later.
+"""
+
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import result_writer  # noqa: E402
+from result_writer import ResultWriter  # noqa: E402
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def test_null_column_widened_by_later_group(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_writer, 'PARQUET_BATCH_ROWS', 2)
+    records = [{'a': 1, 'b': None}, {'a': 2, 'b': None}, {'a': 3, 'b': 'x'},
+               {'a': 4, 'b': None}, {'a': 5, 'b': 'y'}]
+    writer = ResultWriter(str(tmp_path), formats=('parquet',))
+    entry = writer.write_query('optional', 'OPTIONAL projection', iter(records))
+
+    path = entry['files']['parquet']['path']
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+    assert pq.read_table(path).to_pylist() == records
+    assert sorted(os.listdir(tmp_path)) == ['optional.ndjson', 'optional.parquet']
@@ -0,0 +1,141 @@
+"""
+SPARQL endpoint over each graph store, served by a real ThreadingHTTPServer
+so every request is evaluated on its own thread, as in production.
+"""
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import pytest
+from rdflib import Graph, Literal, Namespace, URIRef
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'integration'))
+sys.path.insert(0, os.path.join(HERE, '..', 'queries'))
+
+import columnar_eval  # noqa: E402
+import path_view_eval  # noqa: E402
+from graph_snapshot import SnapshotStore, write_snapshot  # noqa: E402
+from path_view import ViewReader, load_views, write_views  # noqa: E402
+from sparql_endpoint import DeadlineGraph, EndpointHandler, RequestError, SparqlEndpoint  # noqa: E402
+from sqlite_store import SQLiteStore  # noqa: E402
+
+PREDICATE = URIRef('urn:test:value')
+TRIPLES = [(URIRef(f'urn:test:s{i}'), PREDICATE, Literal(i)) for i in range(25)]
+QUERY = "SELECT ?s ?v WHERE { ?s <urn:test:value> ?v } ORDER BY ?v"
+UNI = Namespace('http://university.edu/ontology#')
+
+
+def build_graph(store, tmp_path):
+    if store == 'memory':
+        graph = DeadlineGraph()
+        for triple in TRIPLES:
+            graph.add(triple)
+    elif store == 'snapshot':
+        source = DeadlineGraph()
+        for triple in TRIPLES:
+            source.add(triple)
+        ttl_path = tmp_path / 'graph.ttl'
+        ttl_path.write_text('')
+        write_snapshot(source, str(ttl_path), str(tmp_path / 'snapshot'))
+        graph = DeadlineGraph(store=SnapshotStore())
+        graph.open(str(tmp_path / 'snapshot'))
+        columnar_eval.enable()
+    else:
+        graph = DeadlineGraph(store=SQLiteStore())
+        graph.open(str(tmp_path / 'store.sqlite'), create=True)
+        for triple in TRIPLES:
+            graph.add(triple)
+        graph.commit()
+    return graph
+
+
+@contextmanager
+def serve(graph, tmp_path):
+    EndpointHandler.endpoint = SparqlEndpoint(graph, cache_dir=str(tmp_path / 'query_cache'), timeout=10)
+    EndpointHandler.quiet = True
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EndpointHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        columnar_eval.disable()
+
+
+def get_json(url):
+    with urlopen(url, timeout=10) as response:
+        assert response.status == 200
+        return json.loads(response.read())
+
+
+@pytest.mark.parametrize('store', ['memory', 'snapshot', 'sqlite'])
+def test_query_on_request_threads(store, tmp_path):
+    graph = build_graph(store, tmp_path)
+    with serve(graph, tmp_path) as base:
+        url = f"{base}/sparql?{urlencode({'query': QUERY})}"
+        # Several at once: each request thread reads the store concurrently
+        with ThreadPoolExecutor(4) as pool:
+            bodies = list(pool.map(get_json, [url] * 8))
+    for body in bodies:
+        values = [int(row['v']['value']) for row in body['results']['bindings']]
+        assert values == list(range(25))
+
+
+class CountingGraph(DeadlineGraph):
+    """Counts the triples pattern lookups have handed out"""
+
+    read = 0
+
+    def triples(self, triple):
+        for found in super().triples(triple):
+            self.read += 1
+            yield found
+
+
+def test_construct_stops_at_triple_limit(tmp_path):
+    graph = CountingGraph()
+    for triple in TRIPLES:
+        graph.add(triple)
+    endpoint = SparqlEndpoint(graph, cache_dir=str(tmp_path / 'query_cache'), max_construct_triples=10)
+    construct = "CONSTRUCT { ?s <urn:test:copy> ?v } WHERE { ?s <urn:test:value> ?v }"
+    with pytest.raises(RequestError) as error:
+        endpoint.sparql({'query': construct})
+    assert error.value.status == 413
+    assert graph.read == 11  # stopped at the first triple over the limit
+
+    endpoint.max_construct_triples = 25
+    status, content_type, body = endpoint.sparql({'query': construct})
+    assert status == 200 and content_type == 'text/turtle'
+    assert len(Graph().parse(data=body.decode('utf-8'), format='turtle')) == 25
+    status, _, body = endpoint.sparql({'query': "DESCRIBE <urn:test:s3>"})
+    assert status == 200 and len(Graph().parse(data=body.decode('utf-8'), format='turtle')) == 1
+
+
+def test_path_view_rows_check_deadline(tmp_path):
+    graph = DeadlineGraph()
+    for i in range(5):
+        graph.add((URIRef(f'urn:test:e{i}'), UNI.enrollmentFor, URIRef('urn:test:course')))
+        graph.add((URIRef(f'urn:test:e{i}'), UNI.semester, Literal('Fall 2024')))
+    write_views(graph, 'test', str(tmp_path / 'views.sqlite'))
+    path_view_eval.enable(graph, ViewReader(str(tmp_path / 'views.sqlite'), load_views()))
+    # No solution survives the filter, so only the view's own rows are checked
+    query = ("PREFIX uni: <http://university.edu/ontology#> SELECT ?e WHERE { "
+             "?e uni:enrollmentFor ?course . ?e uni:semester ?semester FILTER(?semester = 'Spring') }")
+    try:
+        endpoint = SparqlEndpoint(graph, cache_dir=str(tmp_path / 'query_cache'), timeout=0)
+        with pytest.raises(RequestError) as error:
+            endpoint.sparql({'query': query})
+        assert error.value.status == 503
+    finally:
+        path_view_eval.disable()